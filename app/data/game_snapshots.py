@@ -0,0 +1,53 @@
+import logging
+import os
+import pickle
+from dataclasses import dataclass
+
+from app.helpers.profiles import Profile
+from app.helpers.uno_logic import UnoGame
+
+logger = logging.getLogger(__name__)
+
+# Snapshots written with another version are discarded instead of resumed
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class GameSnapshot:
+    """A game paused by a shutdown, with what is needed to resume it in its channel."""
+
+    game: UnoGame
+    guild_id: int
+    channel_id: int
+    game_channel_id: int
+    profiles: dict[int, Profile]
+    embed: dict
+    turn_number: int
+
+
+def save_game_snapshots(path: str, snapshots: list[GameSnapshot]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        pickle.dump({"version": SNAPSHOT_VERSION, "games": snapshots}, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def load_game_snapshots(path: str) -> list[GameSnapshot]:
+    """Reads the games paused by the last run and removes the file, so a game that
+    fails to resume is not resumed again on the next start."""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, "rb") as file:
+            data = pickle.load(file)
+    except Exception:
+        logger.exception(f"Could not read the game snapshots in {path}")
+        data = None
+    os.remove(path)
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        logger.warning(f"Discarding the game snapshots in {path}")
+        return []
+    return data["games"]
@@ -0,0 +1,198 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+from app.data.leaderboard import (
+    DictLeaderboard,
+    ColumnarLeaderboard,
+    WindowedLeaderboard,
+)
+from app.data.stats_spool import StatsSpool
+from app.data.uno_players import StatsWrite, UnoLeaderboardPlayer, is_write_applied
+
+# Length in days of the time windowed leaderboards
+WINDOWS = {"weekly": 7, "monthly": 30}
+# Seconds a load waits for the server's writes being sent to finish
+SETTLE_TIMEOUT = 5
+
+
+def current_day() -> int:
+    return int(time.time() // 86400)
+
+
+@dataclass
+class GuildStats:
+    guild_id: int
+    players: dict
+    leaderboard: DictLeaderboard | ColumnarLeaderboard
+    windows: dict[str, WindowedLeaderboard]
+    last_used: float = field(default_factory=time.monotonic)
+
+    def board(self, period: str):
+        """The all-time leaderboard or the windowed one for the given period."""
+        if period not in self.windows:
+            return self.leaderboard
+        window = self.windows[period]
+        window.expire(current_day())
+        return window
+
+
+class GuildStatsCache:
+    """Player stats of the servers that recently asked for them.
+
+    A server's stats are loaded the first time they are needed and evicted once
+    they have not been used for idle_timeout seconds, so memory and reads scale
+    with the active servers instead of every player the bot has seen.
+
+    The storage misses the writes of the spool that were not applied yet, they are
+    added to a server's stats when they are loaded. The server's writes are held
+    in the spool during the read, so the marker of each write tells whether the
+    read has it. Games that end while a server's stats are loading are added once
+    they are, their writes are held and so cannot be in the read.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float,
+        loader: Callable[[int, int], tuple[dict, dict]],
+        columnar: bool = False,
+        spool: StatsSpool = None,
+        is_applied: Callable[[StatsWrite], bool] = is_write_applied,
+    ):
+        self.idle_timeout = idle_timeout
+        self.loader = loader
+        self.columnar = columnar
+        self.spool = spool
+        self.is_applied = is_applied
+        self.guilds: OrderedDict[int, GuildStats] = OrderedDict()
+        self.loading: dict[int, asyncio.Future] = {}
+        # guild id -> (player, delta, day) of the games ended while loading
+        self.buffered: dict[int, list[tuple]] = {}
+
+    def __len__(self):
+        return len(self.guilds)
+
+    async def get(self, guild_id: int) -> GuildStats:
+        self.evict_idle()
+        stats = self.loaded(guild_id)
+        if stats is not None:
+            return stats
+        # Concurrent requests for the same server share a single read
+        loading = self.loading.get(guild_id)
+        if loading is None:
+            since_day = current_day() - max(WINDOWS.values()) + 1
+            loading = asyncio.ensure_future(self.load(guild_id, since_day))
+            self.loading[guild_id] = loading
+        try:
+            players, days, unapplied = await asyncio.shield(loading)
+        except Exception:
+            self.buffered.pop(guild_id, None)
+            raise
+        finally:
+            if loading.done():
+                self.loading.pop(guild_id, None)
+        return self.loaded(guild_id) or self.add(guild_id, players, days, unapplied)
+
+    async def load(
+        self, guild_id: int, since_day: int
+    ) -> tuple[dict, dict, list[StatsWrite]]:
+        """Reads the server's stats and the writes of the spool the read misses.
+        Writes still being sent after SETTLE_TIMEOUT are left out, as they may be
+        applied at any point of the read."""
+        if self.spool is None:
+            players, days = await asyncio.to_thread(self.loader, guild_id, since_day)
+            return players, days, []
+        prefix = ("guilds", str(guild_id))
+        with self.spool.hold(prefix):
+            await self.spool.settle(prefix, SETTLE_TIMEOUT)
+            writes = self.spool.pending_under(prefix)
+            return await asyncio.to_thread(self.read, guild_id, since_day, writes)
+
+    def read(
+        self, guild_id: int, since_day: int, writes: list[StatsWrite]
+    ) -> tuple[dict, dict, list[StatsWrite]]:
+        players, days = self.loader(guild_id, since_day)
+        return players, days, [write for write in writes if not self.is_applied(write)]
+
+    def add(
+        self, guild_id: int, players: dict, days: dict, unapplied: list[StatsWrite] = ()
+    ) -> GuildStats:
+        leaderboard = (
+            ColumnarLeaderboard.from_players(players)
+            if self.columnar
+            else DictLeaderboard(players)
+        )
+        windows = {
+            period: WindowedLeaderboard(length, columnar=self.columnar)
+            for period, length in WINDOWS.items()
+        }
+        for day, results in sorted(days.items()):
+            for user_id, (wins, played) in results.items():
+                for window in windows.values():
+                    window.add(day, user_id, wins, played)
+        stats = GuildStats(guild_id, players, leaderboard, windows)
+        self.guilds[guild_id] = stats
+        for write in unapplied:
+            user_id = int(write.path[-1])
+            if write.path[2] == "leaderboard":
+                self.add_totals(
+                    stats, UnoLeaderboardPlayer(user_id, write.username), write.delta
+                )
+            elif write.path[2] == "days":
+                self.add_day(stats, user_id, write.delta, int(write.path[3]))
+        for player, delta, day in self.buffered.pop(guild_id, []):
+            self.add_totals(stats, player, delta)
+            self.add_day(stats, player.user_id, delta, day)
+        return stats
+
+    def loaded(self, guild_id: int) -> GuildStats | None:
+        stats = self.guilds.get(guild_id)
+        if stats is not None:
+            stats.last_used = time.monotonic()
+            self.guilds.move_to_end(guild_id)
+        return stats
+
+    def apply(
+        self,
+        guild_id: int,
+        player: UnoLeaderboardPlayer,
+        delta: dict[str, int],
+        day: int,
+    ) -> None:
+        """Adds a player's stat delta to the server's stats if they are loaded or
+        being loaded."""
+        if guild_id in self.loading:
+            self.buffered.setdefault(guild_id, []).append((player, delta, day))
+            return
+        stats = self.loaded(guild_id)
+        if stats is None:
+            return
+        self.add_totals(stats, player, delta)
+        self.add_day(stats, player.user_id, delta, day)
+
+    def add_totals(
+        self, stats: GuildStats, player: UnoLeaderboardPlayer, delta: dict[str, int]
+    ) -> None:
+        current = stats.players.get(player.user_id)
+        if current is None:
+            current = stats.players[player.user_id] = player
+        for stat, amount in delta.items():
+            setattr(current, stat, getattr(current, stat) + amount)
+        stats.leaderboard.update(current)
+
+    def add_day(
+        self, stats: GuildStats, user_id: int, delta: dict[str, int], day: int
+    ) -> None:
+        for window in stats.windows.values():
+            window.add(day, user_id, delta["wins"], delta["played"])
+
+    def evict_idle(self) -> None:
+        # Servers are kept in order of use, so the idle ones are at the front
+        expired = time.monotonic() - self.idle_timeout
+        while self.guilds:
+            guild_id, stats = next(iter(self.guilds.items()))
+            if stats.last_used > expired:
+                return
+            self.guilds.pop(guild_id)
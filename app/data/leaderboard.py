@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import numpy as np
+
+MIN_RANKED_GAMES = 20
+
+
+@dataclass
+class LeaderboardEntry:
+    user_id: int
+    wins: int
+    played: int
+
+
+def board_key(entry, board: str) -> tuple:
+    if board == "winrate":
+        return entry.wins / entry.played, entry.played, entry.wins
+    return entry.wins, entry.played
+
+
+class DictLeaderboard:
+    """Ranks the players kept in a dict by sorting them, the sorted boards are
+    reused until a player is updated."""
+
+    def __init__(self, players: dict):
+        self.players = players
+        self.version = 0
+        self.sorted: dict[str, tuple[int, list]] = {}
+
+    def update(self, player) -> None:
+        self.version += 1
+
+    def ranked(self, board: str) -> list:
+        cached = self.sorted.get(board)
+        if cached and cached[0] == self.version:
+            return cached[1]
+        if board == "winrate":
+            eligible, ineligible = [], []
+            for player in self.players.values():
+                if player.played >= MIN_RANKED_GAMES:
+                    eligible.append(player)
+                elif player.played > 0 and player.wins > 0:
+                    ineligible.append(player)
+            eligible.sort(key=lambda p: board_key(p, board), reverse=True)
+            ineligible.sort(key=lambda p: board_key(p, board), reverse=True)
+            ranked = eligible + ineligible
+        else:
+            ranked = sorted(
+                (player for player in self.players.values() if player.wins > 0),
+                key=lambda p: board_key(p, board),
+                reverse=True,
+            )
+        self.sorted[board] = self.version, ranked
+        return ranked
+
+    def count(self, board: str) -> int:
+        return len(self.ranked(board))
+
+    def page(self, board: str, start: int, stop: int) -> list[LeaderboardEntry]:
+        return [
+            LeaderboardEntry(player.user_id, player.wins, player.played)
+            for player in self.ranked(board)[start:stop]
+        ]
+
+    def rank(self, board: str, user_id: int) -> int | None:
+        ranked = self.ranked(board)
+        for ranking, player in enumerate(ranked):
+            if player.user_id == user_id:
+                # Tied players share the rank of the first of them, one more than
+                # the players ahead of them like the columnar leaderboard
+                key = board_key(player, board)
+                while ranking > 0 and board_key(ranked[ranking - 1], board) == key:
+                    ranking -= 1
+                return ranking + 1
+        return None
+
+
+class ColumnarLeaderboard:
+    """Keeps player stats in parallel NumPy columns indexed by user id.
+
+    A page only needs the first ranks, so instead of sorting every player the
+    candidates for those ranks are selected in O(n) with a partition and only
+    they are sorted. Rank lookups count the better players with vectorized
+    comparisons.
+    """
+
+    stat_columns = ("wins", "played", "drawn_cards", "turns_skipped", "played_cards")
+
+    def __init__(self, capacity: int = 1024):
+        self.user_ids = np.zeros(capacity, np.int64)
+        self.columns = {
+            name: np.zeros(capacity, np.int64) for name in self.stat_columns
+        }
+        self.rows: dict[int, int] = {}
+        self.size = 0
+
+    @classmethod
+    def from_players(cls, players: dict) -> "ColumnarLeaderboard":
+        leaderboard = cls(capacity=max(64, len(players)))
+        for player in players.values():
+            leaderboard.update(player)
+        return leaderboard
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name][: self.size]
+
+    def update(self, player) -> None:
+        row = self.rows.get(player.user_id)
+        if row is None:
+            if self.size == len(self.user_ids):
+                self.grow()
+            row = self.size
+            self.rows[player.user_id] = row
+            self.user_ids[row] = player.user_id
+            self.size += 1
+        for name, column in self.columns.items():
+            column[row] = getattr(player, name, 0)
+
+    def grow(self) -> None:
+        capacity = len(self.user_ids) * 2
+        self.user_ids = np.resize(self.user_ids, capacity)
+        for name, column in self.columns.items():
+            self.columns[name] = np.resize(column, capacity)
+
+    def segments(self, board: str) -> list[tuple[np.ndarray, tuple[np.ndarray, ...]]]:
+        """The masks of the board's ranked groups, in order, and the sort keys
+        of the board with the most significant first."""
+        wins, played = self.column("wins"), self.column("played")
+        if board == "winrate":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                win_rate = np.where(played > 0, wins / played, 0)
+            keys = (win_rate, played, wins)
+            eligible = played >= MIN_RANKED_GAMES
+            return [(eligible, keys), (~eligible & (played > 0) & (wins > 0), keys)]
+        return [(wins > 0, (wins, played))]
+
+    @staticmethod
+    def top_rows(mask: np.ndarray, keys: tuple[np.ndarray, ...], k: int) -> np.ndarray:
+        rows = np.flatnonzero(mask)
+        if k <= 0:
+            return rows[:0]
+        if k < len(rows):
+            # Keep every row at least as good as the k-th best primary key, ties
+            # on it are settled by the secondary keys below
+            primary = keys[0][rows]
+            threshold = np.partition(primary, len(rows) - k)[len(rows) - k]
+            rows = rows[primary >= threshold]
+        order = np.lexsort(tuple(-key[rows] for key in reversed(keys)))
+        return rows[order[:k]]
+
+    def count(self, board: str) -> int:
+        return sum(int(mask.sum()) for mask, _ in self.segments(board))
+
+    def page(self, board: str, start: int, stop: int) -> list[LeaderboardEntry]:
+        rows, remaining = [], stop
+        for mask, keys in self.segments(board):
+            top = self.top_rows(mask, keys, remaining)
+            rows.append(top)
+            remaining -= len(top)
+            if remaining <= 0:
+                break
+        rows = np.concatenate(rows)[start:stop]
+        user_ids, wins, played = (
+            self.user_ids[rows],
+            self.column("wins")[rows],
+            self.column("played")[rows],
+        )
+        return [
+            LeaderboardEntry(int(user_id), int(win_count), int(played_count))
+            for user_id, win_count, played_count in zip(user_ids, wins, played)
+        ]
+
+    def rank(self, board: str, user_id: int) -> int | None:
+        row = self.rows.get(user_id)
+        if row is None:
+            return None
+        ranking = 1
+        for mask, keys in self.segments(board):
+            if not mask[row]:
+                ranking += int(mask.sum())
+                continue
+            better = np.zeros(self.size, bool)
+            tied = np.ones(self.size, bool)
+            for key in keys:
+                better |= tied & (key > key[row])
+                tied &= key == key[row]
+            return ranking + int((better & mask).sum())
+        return None
+
+
+class WindowedLeaderboard:
+    """Wins and games played over the last `days` days.
+
+    Results are counted in one bucket per day and the totals of the window are
+    kept alongside them. When a day falls out of the window its bucket is
+    subtracted from the totals and dropped, so each recorded result is added and
+    expired once instead of the window being recomputed from history.
+    """
+
+    def __init__(self, days: int, columnar: bool = False):
+        self.days = days
+        self.buckets: OrderedDict[int, dict[int, list[int]]] = OrderedDict()
+        self.players: dict[int, LeaderboardEntry] = {}
+        self.leaderboard = (
+            ColumnarLeaderboard() if columnar else DictLeaderboard(self.players)
+        )
+
+    def add(self, day: int, user_id: int, wins: int, played: int) -> None:
+        if self.buckets and day <= next(reversed(self.buckets)) - self.days:
+            return
+        if day not in self.buckets:
+            self.buckets[day] = {}
+            if len(self.buckets) > 1 and day < next(reversed(self.buckets)):
+                # A late result from a previous day, keep the buckets in day order
+                self.buckets = OrderedDict(sorted(self.buckets.items()))
+        counts = self.buckets[day].setdefault(user_id, [0, 0])
+        counts[0] += wins
+        counts[1] += played
+        self.change(user_id, wins, played)
+
+    def expire(self, today: int) -> None:
+        while self.buckets and next(iter(self.buckets)) <= today - self.days:
+            _, bucket = self.buckets.popitem(last=False)
+            for user_id, (wins, played) in bucket.items():
+                self.change(user_id, -wins, -played)
+
+    def change(self, user_id: int, wins: int, played: int) -> None:
+        player = self.players.get(user_id)
+        if player is None:
+            player = self.players[user_id] = LeaderboardEntry(user_id, 0, 0)
+        player.wins += wins
+        player.played += played
+        self.leaderboard.update(player)
+        if player.played <= 0:
+            self.players.pop(user_id)
+
+    def count(self, board: str) -> int:
+        return self.leaderboard.count(board)
+
+    def page(self, board: str, start: int, stop: int) -> list[LeaderboardEntry]:
+        return self.leaderboard.page(board, start, stop)
+
+    def rank(self, board: str, user_id: int) -> int | None:
+        return self.leaderboard.rank(board, user_id)
+
+
+Leaderboard = DictLeaderboard | ColumnarLeaderboard | WindowedLeaderboard
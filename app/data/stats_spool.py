@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict
+from itertools import islice
+from typing import Callable
+
+from app.data.uno_players import StatsWrite
+from app.helpers import metrics
+from app.helpers.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# The log is rewritten without the sent writes once this many were sent
+COMPACT_AFTER = 1000
+
+
+class StatsSpool:
+    """Write-ahead log of the stats writes.
+
+    Writes are appended to a local file before anything is sent and a background
+    task sends them to the storage, retrying with exponential backoff. Each sent
+    write is recorded in the file as well, so the writes left pending when the
+    process stopped are sent after a restart. A write that timed out or failed
+    may still have been applied, so writes carry an id that the storage uses to
+    apply each of them once. A write whose thread is still running after the
+    timeout is not sent again until the thread is done. While the circuit breaker
+    is open the storage is not called at all, so an outage costs neither retries
+    nor threads. The writes under a held path are not sent until it is released,
+    so whether they were applied does not change while it is held.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        writer: Callable[[StatsWrite], None],
+        batch_size: int = 8,
+        write_timeout: float = 30,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+        breaker: CircuitBreaker = None,
+    ):
+        self.path = path
+        self.writer = writer
+        self.batch_size = batch_size
+        self.write_timeout = write_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker("stats")
+        self.pending: OrderedDict[int, StatsWrite] = OrderedDict()
+        # Threads of the writes being sent and of those that outlived the timeout, by id
+        self.sending: dict[int, asyncio.Future] = {}
+        self.running: dict[int, asyncio.Future] = {}
+        self.held: Counter[tuple[str, ...]] = Counter()
+        self.next_id = 0
+        self.sent_since_compaction = 0
+        self.file = None
+        self.task: asyncio.Task | None = None
+        self.wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self.pending)
+
+    def load(self) -> int:
+        """Reads the writes left pending by the last run, returns how many there are."""
+        if self.file is not None:
+            return len(self.pending)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as spool:
+                for line in spool:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The last line is torn if the process died while appending it
+                        continue
+                    if "sent" in record:
+                        self.pending.pop(record["sent"], None)
+                        continue
+                    self.pending[record["id"]] = StatsWrite(
+                        tuple(record["path"]),
+                        record["username"],
+                        record["delta"],
+                        # Writes spooled before they had ids get a new one
+                        **{
+                            key: record[key]
+                            for key in ("write_id", "day")
+                            if key in record
+                        },
+                    )
+                    self.next_id = max(self.next_id, record["id"] + 1)
+        self.compact()
+        if self.pending:
+            logger.warning(
+                f"{len(self.pending)} stats writes were still pending from the last "
+                f"run, sending them"
+            )
+        return len(self.pending)
+
+    def append(self, writes: list[StatsWrite]) -> None:
+        """Records the writes on disk and queues them to be sent."""
+        self.load()
+        lines = []
+        for write in writes:
+            self.pending[self.next_id] = write
+            lines.append(json.dumps({"id": self.next_id, **asdict(write)}) + "\n")
+            self.next_id += 1
+        self.write_lines(lines)
+        self.start()
+        self.wakeup.set()
+
+    def pending_under(self, prefix: tuple[str, ...]) -> list[StatsWrite]:
+        """The writes to the paths starting with prefix that were not confirmed
+        and are not being sent, whether they were applied is told by their marker."""
+        return [
+            write
+            for write_id, write in self.pending.items()
+            if write.path[: len(prefix)] == prefix and not self.in_flight(write_id)
+        ]
+
+    def in_flight(self, write_id: int) -> bool:
+        thread = self.sending.get(write_id) or self.running.get(write_id)
+        return thread is not None and not thread.done()
+
+    @contextmanager
+    def hold(self, prefix: tuple[str, ...]):
+        """Keeps the writes to the paths starting with prefix from being sent."""
+        self.held[prefix] += 1
+        try:
+            yield
+        finally:
+            self.held[prefix] -= 1
+            if not self.held[prefix]:
+                del self.held[prefix]
+            self.wakeup.set()
+
+    async def settle(self, prefix: tuple[str, ...], timeout: float) -> None:
+        """Waits up to timeout seconds for the writes being sent to the paths
+        starting with prefix."""
+        threads = [
+            thread
+            for write_id, thread in (*self.sending.items(), *self.running.items())
+            if write_id in self.pending
+            and self.pending[write_id].path[: len(prefix)] == prefix
+            and not thread.done()
+        ]
+        if threads:
+            await asyncio.wait(threads, timeout=timeout)
+
+    def sendable(self, item: tuple[int, StatsWrite]) -> bool:
+        write_id, write = item
+        return write_id not in self.running and not any(
+            write.path[: len(prefix)] == prefix for prefix in self.held
+        )
+
+    def start(self) -> None:
+        self.load()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+
+    async def flush(self, timeout: float) -> bool:
+        """Waits up to timeout seconds for the pending writes to be sent, returns
+        whether they all were. The others stay in the log for the next run."""
+        self.start()
+        self.wakeup.set()
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        return not self.pending
+
+    def stop(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+
+    async def run(self):
+        backoff = self.min_backoff
+        while True:
+            if not any(map(self.sendable, self.pending.items())):
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            if not self.breaker.allow():
+                await asyncio.sleep(self.breaker.retry_in())
+                continue
+            # Only a single write is tried while the circuit is half open
+            size = self.batch_size if self.breaker.state == "closed" else 1
+            batch = list(islice(filter(self.sendable, self.pending.items()), size))
+            results = await asyncio.gather(
+                *(self.send(write_id, write) for write_id, write in batch)
+            )
+            self.mark_sent(
+                [write_id for (write_id, _), sent in zip(batch, results) if sent]
+            )
+            if all(results):
+                backoff = self.min_backoff
+                continue
+            await asyncio.sleep(backoff * random.uniform(0.5, 1))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    async def send(self, write_id: int, write: StatsWrite) -> bool:
+        thread = asyncio.ensure_future(asyncio.to_thread(self.writer, write))
+        self.sending[write_id] = thread
+        try:
+            await asyncio.wait_for(asyncio.shield(thread), self.write_timeout)
+        except Exception as e:
+            logger.warning(f"Could not write the stats at {'/'.join(write.path)}: {e}")
+            self.breaker.record_failure()
+            metrics.increment("stats.write_failures")
+            if not thread.done():
+                # The thread cannot be stopped and may still apply the write
+                self.running[write_id] = thread
+                thread.add_done_callback(
+                    lambda thread: self.finish_running(write_id, thread)
+                )
+            return False
+        finally:
+            self.sending.pop(write_id, None)
+        self.breaker.record_success()
+        metrics.increment("stats.writes")
+        return True
+
+    def finish_running(self, write_id: int, thread: asyncio.Future) -> None:
+        self.running.pop(write_id, None)
+        if not thread.cancelled() and thread.exception() is None:
+            metrics.increment("stats.writes")
+            self.mark_sent([write_id])
+        self.wakeup.set()
+
+    def mark_sent(self, write_ids: list[int]) -> None:
+        if not write_ids:
+            return
+        for write_id in write_ids:
+            self.pending.pop(write_id, None)
+        self.write_lines(
+            [json.dumps({"sent": write_id}) + "\n" for write_id in write_ids]
+        )
+        self.sent_since_compaction += len(write_ids)
+        if not self.pending or self.sent_since_compaction >= COMPACT_AFTER:
+            self.compact()
+
+    def write_lines(self, lines: list[str]) -> None:
+        self.file.write("".join(lines))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def compact(self) -> None:
+        """Rewrites the log with only the pending writes."""
+        if self.file is not None:
+            self.file.close()
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as spool:
+            for write_id, write in self.pending.items():
+                spool.write(json.dumps({"id": write_id, **asdict(write)}) + "\n")
+            spool.flush()
+            os.fsync(spool.fileno())
+        os.replace(temporary_path, self.path)
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.sent_since_compaction = 0
@@ -1,5 +1,10 @@
-from config import firebase_database
-from dataclasses import dataclass
+import time
+from config import get_database
+from dataclasses import dataclass, field
+from uuid import uuid4
+
+# Days the markers of applied writes are kept, a write is retried long before
+APPLIED_WRITE_DAYS = 30
 
 
 @dataclass
@@ -13,58 +18,143 @@ class UnoLeaderboardPlayer:
     played_cards: int = 0
 
 
-uno_database = firebase_database.child("uno")
-uno_leaderboard = uno_database.child("leaderboard")
+def uno_leaderboard():
+    """All-time stats of every player across servers."""
+    return get_database().child("uno").child("leaderboard")
+
+
+def uno_guilds():
+    """The same stats partitioned by server, /uno/guilds/{guild_id}/leaderboard/{user_id},
+    and the server's wins and games per day, /uno/guilds/{guild_id}/days/{day}/{user_id}.
+    """
+    return get_database().child("uno").child("guilds")
+
+
+def player_from_dict(user_id: int, value: dict) -> UnoLeaderboardPlayer:
+    return UnoLeaderboardPlayer(
+        user_id=user_id,
+        username=value.get("username"),
+        wins=value.get("wins", 0),
+        played=value.get("played", 0),
+        drawn_cards=value.get("drawn_cards", 0),
+        turns_skipped=value.get("turns_skipped", 0),
+        played_cards=value.get("played_cards", 0),
+    )
+
+
+def get_guild_players(guild_id: int) -> dict[int, UnoLeaderboardPlayer]:
+    result = uno_guilds().child(str(guild_id)).child("leaderboard").get()
+    if not result:
+        return {}
+    return {
+        int(key): player_from_dict(int(key), value) for key, value in result.items()
+    }
 
 
-def get_uno_players() -> dict[int, UnoLeaderboardPlayer]:
-    result = uno_leaderboard.get()
+def get_guild_days(guild_id: int, since_day: int) -> dict[int, dict[int, tuple]]:
+    days_ref = uno_guilds().child(str(guild_id)).child("days")
+    result = days_ref.order_by_key().start_at(str(since_day)).get()
     if not result:
         return {}
     return {
-        int(key): UnoLeaderboardPlayer(
-            user_id=int(key),
-            username=value.get("username"),
-            wins=value.get("wins", 0),
-            played=value.get("played", 0),
-            drawn_cards=value.get("drawn_cards", 0),
-            turns_skipped=value.get("turns_skipped", 0),
-            played_cards=value.get("played_cards", 0),
-        )
-        for key, value in result.items()
+        int(day): {
+            int(user_id): (value.get("wins", 0), value.get("played", 0))
+            for user_id, value in results.items()
+        }
+        for day, results in result.items()
+    }
+
+
+def prune_guild_days(guild_id: int, since_day: int) -> None:
+    """Deletes the server's days before since_day, which no window reaches any
+    more, so the stored days do not grow with the age of the server."""
+    days_ref = uno_guilds().child(str(guild_id)).child("days")
+    days = days_ref.get(shallow=True)
+    if not days:
+        return
+    stale = {day: None for day in days if int(day) < since_day}
+    if stale:
+        days_ref.update(stale)
+
+
+def get_guild_stats(guild_id: int, since_day: int) -> tuple[dict, dict]:
+    stats = get_guild_players(guild_id), get_guild_days(guild_id, since_day)
+    prune_guild_days(guild_id, since_day)
+    return stats
+
+
+def get_uno_player(user_id: int) -> UnoLeaderboardPlayer | None:
+    result = uno_leaderboard().child(str(user_id)).get()
+    if not result:
+        return None
+    return player_from_dict(user_id, result)
+
+
+@dataclass
+class StatsWrite:
+    """A stats delta to add to the player stats stored at /uno/{path}. The id
+    makes sending the write again harmless once it has been applied, its marker
+    is kept under the day the write was made."""
+
+    path: tuple[str, ...]
+    username: str
+    delta: dict[str, int]
+    write_id: str = field(default_factory=lambda: uuid4().hex)
+    day: int = field(default_factory=lambda: int(time.time() // 86400))
+
+
+def stats_writes(
+    guild_id: int, user_id: int, username: str, delta: dict[str, int], day: int
+) -> list[StatsWrite]:
+    """The writes that add a player's game to the server, day and all-time stats."""
+    guild = ("guilds", str(guild_id))
+    return [
+        StatsWrite((*guild, "leaderboard", str(user_id)), username, delta),
+        StatsWrite(
+            (*guild, "days", str(day), str(user_id)),
+            username,
+            {"wins": delta["wins"], "played": delta["played"]},
+        ),
+        StatsWrite(("leaderboard", str(user_id)), username, delta),
+    ]
+
+
+def applied_writes():
+    """Markers of the stats writes applied to the stored stats, kept apart from the
+    stats so reading them does not read the markers, /uno/applied/{day}/{write_id}."""
+    return get_database().child("uno").child("applied")
+
+
+def is_write_applied(write: StatsWrite) -> bool:
+    marker = applied_writes().child(str(write.day)).child(write.write_id)
+    return marker.get() is not None
+
+
+def apply_stats_write(write: StatsWrite) -> None:
+    """Adds the delta to the stored stats with server side increments, so a player's
+    stats can be updated without holding them in memory. Errors are raised for the
+    caller to retry. The increments and the write's marker are set in one atomic
+    update, so a write that was applied but not confirmed is skipped when it is
+    retried. The spool never sends a write again while it may still be running."""
+    if is_write_applied(write):
+        return
+    node = "/".join(write.path)
+    update = {
+        f"applied/{write.day}/{write.write_id}": True,
+        f"{node}/username": write.username,
+        # Left in the stats by the writes that kept their ids in the player node
+        f"{node}/applied_writes": None,
     }
+    for stat, amount in write.delta.items():
+        update[f"{node}/{stat}"] = {".sv": {"increment": amount}}
+    get_database().child("uno").update(update)
 
 
-def add_uno_player(player: UnoLeaderboardPlayer):
-    try:
-        uno_leaderboard.update(
-            {
-                str(player.user_id): {
-                    "username": player.username,
-                    "wins": player.wins,
-                    "played": player.played,
-                    "drawn_cards": player.drawn_cards,
-                    "turns_skipped": player.turns_skipped,
-                    "played_cards": player.played_cards,
-                }
-            }
-        )
-    except Exception as e:
-        print(e)
-
-
-def update_player(user_id: int, player: UnoLeaderboardPlayer):
-    try:
-        player_ref = uno_leaderboard.child(str(user_id))
-        player_ref.update(
-            {
-                "username": player.username,
-                "wins": player.wins,
-                "played": player.played,
-                "drawn_cards": player.drawn_cards,
-                "turns_skipped": player.turns_skipped,
-                "played_cards": player.played_cards,
-            }
-        )
-    except Exception as e:
-        print(e)
+def prune_applied_writes(today: int) -> None:
+    """Deletes the markers of the writes made APPLIED_WRITE_DAYS or more days ago."""
+    days = applied_writes().get(shallow=True)
+    if not days:
+        return
+    stale = {day: None for day in days if int(day) <= today - APPLIED_WRITE_DAYS}
+    if stale:
+        applied_writes().update(stale)
@@ -1,12 +1,95 @@
-from config import SERVER_IDS
+from config import (
+    SERVER_IDS,
+    MAX_GAMES_PER_CHANNEL,
+    MAX_ACTIVE_GAMES,
+    MAX_GUILD_GAMES,
+    MAX_OPEN_LOBBIES,
+    MAX_GUILD_LOBBIES,
+    LOBBY_QUEUE_LENGTH,
+    LOBBY_QUEUE_TIMEOUT,
+    LOBBY_IDLE_TIMEOUT,
+    LOBBY_MAX_LIFETIME,
+    MATCHMAKING_MAX_WAIT,
+    GAME_LOG_DIR,
+    STATS_SPOOL_DIR,
+    SNAPSHOT_DIR,
+    INSIGHTS_PATH,
+    COLUMNAR_LEADERBOARD,
+    GUILD_STATS_IDLE_TIMEOUT,
+    PROFILE_CACHE_SIZE,
+    IMAGE_MODE,
+    BUTTON_PRESS_RATE,
+    BUTTON_PRESS_BURST,
+    AI_MOVE_TIME,
+    AI_WORKERS,
+)
+from app.data.game_snapshots import (
+    GameSnapshot,
+    load_game_snapshots,
+    save_game_snapshots,
+)
+from app.data.guild_stats import GuildStatsCache, current_day
+from app.data.leaderboard import Leaderboard
+from app.data.stats_spool import StatsSpool
 from app.data.uno_players import (
     UnoLeaderboardPlayer,
-    get_uno_players,
-    add_uno_player,
-    update_player,
+    apply_stats_write,
+    get_guild_stats,
+    get_uno_player,
+    prune_applied_writes,
+    stats_writes,
+)
+from app.helpers import metrics
+from app.helpers.admission import AdmissionController
+from app.helpers.analytics import (
+    load_insights,
+    card_play_rates,
+    average_game_lengths,
+    penalty_win_rates,
+    head_to_head,
+)
+from app.helpers.game_log import open_game_recorder
+from app.helpers.interactions import acknowledged
+from app.helpers.matchmaking import MatchmakingPool, QueueEntry
+from app.helpers.cluster import (
+    current_worker_id,
+    owns_guild,
+    owns_key,
+    publish,
+    subscribe,
+    unsubscribe,
+)
+from app.helpers.purge import MessagePurger
+from app.helpers.registry import is_reloading, persistent, reload_extension
+from app.helpers.profiles import Profile, ProfileCache, profile_from_user
+from app.helpers.table_image import TableRenderer, table_state
+from app.helpers.throttle import ActionThrottle
+from app.helpers.messages import (
+    delete_message,
+    edit_message,
+    send_message,
+    create_thread,
+    archive_thread,
+    invalidate_logging_channel,
+)
+from app.helpers.uno_logic import (
+    UnoGame,
+    UnoPlayer,
+    Card,
+    Color,
+    Value,
+    VARIANTS,
+)
+from app.helpers.uno_ai import (
+    AI_SEATS,
+    is_ai_seat,
+    ai_seat_name,
+    apply_move,
+    checked_move,
+    choose_move,
+    greedy_move,
+    shutdown_search_pool,
 )
-from app.helpers.messages import delete_message, edit_message, send_message
-from app.helpers.uno_logic import UnoGame, UnoPlayer, Card, Color
 from app.utils.ui import PaginationView, ConfirmationView
 from app.utils.colors import random_color
 import nextcord
@@ -20,12 +103,124 @@ from nextcord import (
 )
 from nextcord.ui import Button, View
 from nextcord.ext.commands import Cog, Bot
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+import asyncio
+import copy
+import logging
+import os
+import time
 import random as rnd
-from io import StringIO
+from io import BytesIO, StringIO
 
+logger = logging.getLogger(__name__)
 zw = "\u200b"
-ongoing_games: dict[int, UnoGame] = {}
-uno_players: dict[int, UnoLeaderboardPlayer] = get_uno_players()
+restarting_message = "Uno is restarting, please try again in a minute."
+
+
+@dataclass
+class HostState:
+    """The games and lobbies hosted by the cog, shared with the cog that replaces
+    it on a reload so either can drain them."""
+
+    # Set on shutdown, no new games are started and the ongoing ones are paused
+    draining: bool = False
+    game_tasks: set[asyncio.Task] = field(default_factory=set)
+    notice_tasks: set[asyncio.Task] = field(default_factory=set)
+    lobby_views: set["UnoStartGameView"] = field(default_factory=set)
+    turn_views: dict[int, "UnoOngoingGameView"] = field(default_factory=dict)
+    paused_games: list[GameSnapshot] = field(default_factory=list)
+
+
+# The state below is kept in the registry, reloading this extension replaces its
+# code but keeps the live games and the caches
+ongoing_games: dict[int, UnoGame] = persistent("uno.ongoing_games", dict)
+channel_games: dict[int, set[int]] = persistent(
+    "uno.channel_games", lambda: defaultdict(set)
+)
+# Names and avatars of each game's players, seeded when they join
+game_profiles: dict[int, dict[int, Profile]] = persistent("uno.game_profiles", dict)
+profiles = persistent("uno.profiles", lambda: ProfileCache(PROFILE_CACHE_SIZE))
+purger = persistent("uno.purger", MessagePurger)
+throttle = persistent(
+    "uno.throttle", lambda: ActionThrottle(BUTTON_PRESS_RATE, BUTTON_PRESS_BURST)
+)
+admission = persistent(
+    "uno.admission",
+    lambda: AdmissionController(
+        max_games=MAX_ACTIVE_GAMES,
+        max_guild_games=MAX_GUILD_GAMES,
+        max_lobbies=MAX_OPEN_LOBBIES,
+        max_guild_lobbies=MAX_GUILD_LOBBIES,
+        max_queue_length=LOBBY_QUEUE_LENGTH,
+    ),
+)
+metrics.register_gauge("admission.open_lobbies", lambda: admission.lobby_count)
+metrics.register_gauge("admission.active_games", lambda: admission.game_count)
+metrics.register_gauge("admission.queue_length", lambda: len(admission.queue))
+metrics.register_gauge("profiles.cached", lambda: len(profiles))
+metrics.register_gauge("purge.tracked", lambda: len(purger))
+metrics.register_gauge("throttle.tracked", lambda: len(throttle))
+# Every worker process keeps its own log of the stats writes it owns
+stats_spool = persistent(
+    "uno.stats_spool",
+    lambda: StatsSpool(
+        os.path.join(STATS_SPOOL_DIR, f"stats-{current_worker_id()}.log"),
+        apply_stats_write,
+    ),
+)
+metrics.register_gauge("stats.pending_writes", lambda: len(stats_spool))
+guild_stats = persistent(
+    "uno.guild_stats",
+    lambda: GuildStatsCache(
+        GUILD_STATS_IDLE_TIMEOUT,
+        get_guild_stats,
+        columnar=COLUMNAR_LEADERBOARD,
+        spool=stats_spool,
+    ),
+)
+metrics.register_gauge("stats.loaded_guilds", lambda: len(guild_stats))
+snapshot_path = os.path.join(SNAPSHOT_DIR, f"games-{current_worker_id()}.pickle")
+ai_turns: set[asyncio.Task] = persistent("uno.ai_turns", set)
+# The card sprites are rasterized once, when the extension is first loaded
+table_renderer: TableRenderer | None = (
+    persistent("uno.table_renderer", TableRenderer) if IMAGE_MODE else None
+)
+if table_renderer is not None:
+    metrics.register_gauge("table_image.cached", lambda: len(table_renderer))
+hosting: HostState = persistent("uno.hosting", HostState)
+matchmaking: MatchmakingPool = persistent(
+    "uno.matchmaking", lambda: MatchmakingPool(MATCHMAKING_MAX_WAIT, None)
+)
+
+
+def player_mention(player_id: int) -> str:
+    return (
+        f"**{ai_seat_name(player_id)}**" if is_ai_seat(player_id) else f"<@{player_id}>"
+    )
+
+
+def plays_in(game: UnoGame, user_id: int) -> bool:
+    """Whether the user is in the game and has not left it to the bot."""
+    return user_id in game.players and user_id not in game.ai_players
+
+
+def seated(user_id: int) -> bool:
+    """Whether the user plays in a game or waits in its lobby."""
+    return any(plays_in(game, user_id) for game in ongoing_games.values())
+
+
+def lobby_description(game: UnoGame, player_count: int) -> str:
+    players_string = "\n".join(player_mention(player_id) for player_id in game.players)
+    return (
+        f"Waiting for players to join. ({len(game.players)}/{player_count})\n"
+        f"Players:\n{players_string}"
+    )
+
+
+# Joins and leaves within this many seconds of each other share one lobby edit
+LOBBY_UPDATE_DELAY = 1
 
 
 class UnoStartGameView(View):
@@ -34,8 +229,12 @@ class UnoStartGameView(View):
         self.game_id = game_id
         self.player_count = player_count
         self.cancelled = False
+        self.lobby_stale = False
+        self.lobby_interaction: Interaction | None = None
+        self.lobby_update: asyncio.Task | None = None
 
     @nextcord.ui.button(label="Join / Leave", style=nextcord.ButtonStyle.blurple)
+    @acknowledged
     async def btn_join_game(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
         if interaction.user.id in game.players:
@@ -45,22 +244,72 @@ class UnoStartGameView(View):
             game.players[interaction.user.id] = UnoPlayer(
                 interaction.user.id, interaction.user.name
             )
+            game_profiles[game.id][interaction.user.id] = profile_from_user(
+                interaction.user
+            )
+            # A seated player is not matched into another game
+            matchmaking.remove(interaction.guild.id, interaction.user.id)
             await interaction.send(content="Joined the game.", ephemeral=True)
-        embed = interaction.message.embeds[0]
-        players_string = "\n".join(
-            [f"<@{player.id}>" for player in game.players.values()]
-        )
-        embed.description = (
-            f"Waiting for players to join. ({len(game.players)}/{self.player_count})\n"
-            f"Players:\n{players_string}"
-        )
-        await interaction.followup.edit_message(
-            message_id=interaction.message.id, embed=embed
+        self.update_lobby(interaction, game)
+
+    @nextcord.ui.button(label="Add Bot", style=nextcord.ButtonStyle.grey)
+    @acknowledged
+    async def btn_add_bot(self, button: Button, interaction: Interaction):
+        game = ongoing_games[self.game_id]
+        if interaction.user.id != game.host_id:
+            await interaction.send(
+                content="Only the game host can add bots.", ephemeral=True
+            )
+            return
+        seat_id = next(
+            (
+                seat_id
+                for seat_id in range(1, AI_SEATS + 1)
+                if seat_id not in game.players
+            ),
+            None,
         )
+        if seat_id is None or len(game.players) >= self.player_count:
+            await interaction.send(content="The game is full.", ephemeral=True)
+            return
+        name = ai_seat_name(seat_id)
+        game.players[seat_id] = UnoPlayer(seat_id, name)
+        game.ai_players.add(seat_id)
+        game_profiles[game.id][seat_id] = Profile(seat_id, name, None)
+        await interaction.send(content=f"Added {name}.", ephemeral=True)
+        self.update_lobby(interaction, game)
+
+    def update_lobby(self, interaction: Interaction, game: UnoGame):
+        """Starts the game once the lobby is full, otherwise schedules an edit of
+        the lobby embed that shows every join and leave made until it is sent."""
         if len(game.players) == self.player_count:
             self.stop()
+            return
+        self.lobby_stale = True
+        self.lobby_interaction = interaction
+        if self.lobby_update is None or self.lobby_update.done():
+            self.lobby_update = asyncio.create_task(self.refresh_lobby(game))
+
+    async def refresh_lobby(self, game: UnoGame):
+        # A single task edits the lobby so the edits cannot overtake each other.
+        # Stopped lobbies are deleted or edited by the host instead.
+        while self.lobby_stale and not self.is_finished():
+            await asyncio.sleep(LOBBY_UPDATE_DELAY)
+            if self.is_finished():
+                return
+            self.lobby_stale = False
+            interaction = self.lobby_interaction
+            embed = interaction.message.embeds[0]
+            embed.description = lobby_description(game, self.player_count)
+            try:
+                await interaction.followup.edit_message(
+                    message_id=interaction.message.id, embed=embed
+                )
+            except nextcord.HTTPException as e:
+                logger.warning(f"Could not update the lobby: {e}")
 
     @nextcord.ui.button(label="Start", style=nextcord.ButtonStyle.green)
+    @acknowledged
     async def btn_start_game(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
         if interaction.user.id != game.host_id:
@@ -77,6 +326,7 @@ class UnoStartGameView(View):
         self.stop()
 
     @nextcord.ui.button(label="Cancel", style=nextcord.ButtonStyle.red)
+    @acknowledged
     async def btn_cancel_game(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
         if interaction.user.id != game.host_id:
@@ -89,27 +339,80 @@ class UnoStartGameView(View):
         self.stop()
 
 
+HAND_SELECT_THRESHOLD = 15
+
+
+def card_label(card: Card, count: int) -> str:
+    return card.value.value if count == 1 else f"{card.value.value} x{count}"
+
+
 class CardButton(Button):
-    def __init__(self, card: Card, enabled: bool):
-        super().__init__(label=str(card.value.value), emoji=card.color.value)
+    def __init__(
+        self,
+        card: Card,
+        enabled: bool,
+        count: int = 1,
+        style: nextcord.ButtonStyle = nextcord.ButtonStyle.grey,
+    ):
+        super().__init__(
+            label=card_label(card, count), emoji=card.color.value, style=style
+        )
         self.card = card
         self.disabled = not enabled
 
+    @acknowledged
     async def callback(self, interaction: Interaction) -> None:
         self.view.chosen_card = self.card
         self.view.stop()
 
 
+class CardSelect(nextcord.ui.StringSelect):
+    def __init__(self, groups: list[tuple[Card, int]]):
+        self.cards = {str(index): card for index, (card, _) in enumerate(groups)}
+        super().__init__(
+            placeholder="Select a card to play",
+            options=[
+                nextcord.SelectOption(
+                    label=card_label(card, count),
+                    value=str(index),
+                    emoji=card.color.value,
+                )
+                for index, (card, count) in enumerate(groups)
+            ],
+        )
+
+    @acknowledged
+    async def callback(self, interaction: Interaction) -> None:
+        self.view.chosen_card = self.cards[self.values[0]]
+        self.view.stop()
+
+
 class ChooseCardView(View):
-    def __init__(self, pile_top_card: Card, hand: list[Card]):
+    def __init__(self, game: UnoGame, player: UnoPlayer):
         super().__init__(timeout=7)
         self.chosen_card = None
         self.timed_out = False
-        for card in hand:
-            if UnoGame.card_is_eligible(card, pile_top_card):
-                self.add_item(CardButton(card, enabled=True))
-            else:
-                self.add_item(CardButton(card, enabled=False))
+        groups = player.hand.groups()
+        # Large hands only list the playable cards in a single select menu
+        if len(groups) > HAND_SELECT_THRESHOLD:
+            self.add_item(
+                CardSelect(
+                    [
+                        (card, count)
+                        for card, count in groups
+                        if game.can_play(player, card)
+                    ]
+                )
+            )
+            return
+        for card, count in groups:
+            self.add_item(
+                CardButton(
+                    card,
+                    enabled=game.can_play(player, card),
+                    count=count,
+                )
+            )
 
     async def on_timeout(self) -> None:
         self.timed_out = True
@@ -117,10 +420,57 @@ class ChooseCardView(View):
 
 
 class ShowHandView(View):
-    def __init__(self, hand: list[Card]):
-        super().__init__(timeout=None)
-        for card in hand:
-            self.add_item(CardButton(card, enabled=False))
+    """Sends an already serialized hand, as every card is disabled nothing needs
+    to be stored or listened to by the client."""
+
+    def __init__(self, components: list[dict]):
+        super().__init__(timeout=None, prevent_update=False)
+        self.components = components
+
+    def to_components(self) -> list[dict]:
+        return self.components
+
+
+@lru_cache(maxsize=1024)
+def render_hand(
+    signature: tuple[tuple[Color, Value, int], ...],
+    playable: frozenset[tuple[Color, Value]],
+) -> tuple[str, list[dict]]:
+    groups = [(Card(value, color), count) for color, value, count in signature]
+    if len(groups) > HAND_SELECT_THRESHOLD:
+        lines = {}
+        for card, count in groups:
+            lines.setdefault(card.color, []).append(card_label(card, count))
+        content = "\n".join(
+            f"{color.value} {', '.join(labels)}" for color, labels in lines.items()
+        )
+        return f"Your hand ({sum(count for _, count in groups)} cards):\n{content}", []
+    view = View(timeout=None, prevent_update=False)
+    for card, count in groups:
+        view.add_item(
+            CardButton(
+                card,
+                enabled=False,
+                count=count,
+                style=(
+                    nextcord.ButtonStyle.green
+                    if (card.color, card.value) in playable
+                    else nextcord.ButtonStyle.grey
+                ),
+            )
+        )
+    return "Your hand:", view.to_components()
+
+
+def get_hand_payload(game: UnoGame, player: UnoPlayer) -> tuple[str, list[dict]]:
+    """Returns the message content and components to show a hand, cached by the
+    cards in the hand and the ones that can be played."""
+    groups = player.hand.groups()
+    signature = tuple((card.color, card.value, count) for card, count in groups)
+    playable = frozenset(
+        (card.color, card.value) for card, _ in groups if game.can_play(player, card)
+    )
+    return render_hand(signature, playable)
 
 
 class PickColorButton(Button):
@@ -128,6 +478,7 @@ class PickColorButton(Button):
         super().__init__(label=zw, emoji=color.value)
         self.color = color
 
+    @acknowledged
     async def callback(self, interaction: Interaction) -> None:
         self.view.chosen_color = self.color
         self.view.stop()
@@ -151,6 +502,7 @@ class PickPlayerButton(Button):
         super().__init__(label=player_name)
         self.player_id = player_id
 
+    @acknowledged
     async def callback(self, interaction: Interaction) -> None:
         self.view.chosen_player_id = self.player_id
         self.view.chosen_player_username = self.label
@@ -182,12 +534,35 @@ class UnoOngoingGameView(View):
         self.drawn_card_playable = False
         self.skipped_player_id = None
         self.swapped_player_id = None
+        self.drawn_count = 1
+        self.penalty = 0
+        self.jumped_in = False
+        self.chosen_color = None
         self.play_in_progress = False
         self.card_choice_in_progress = False
         self.color_choice_in_progress = False
         self.swap_player_choice_in_progress = False
         self.end_game = None
-        self.current_player_left_game = False
+        self.actions = {
+            item.custom_id: name
+            for name, item in vars(self).items()
+            if isinstance(item, Button)
+        }
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        # Presses over the limit are only acknowledged, so Discord does not show
+        # them as failed and mashing the buttons costs one REST call per press
+        allowed = throttle.allow(
+            self.game_id,
+            interaction.user.id,
+            self.actions.get(interaction.data.get("custom_id"), "unknown"),
+        )
+        if not allowed:
+            try:
+                await interaction.response.defer()
+            except nextcord.HTTPException:
+                pass
+        return allowed
 
     async def pick_player_from_view(
         self, interaction: Interaction, pick_player_view: PickPlayerView
@@ -220,25 +595,32 @@ class UnoOngoingGameView(View):
         self.color_choice_in_progress = False
         return chosen_color
 
+    def turn_taken(self, game: UnoGame, player_id: int) -> bool:
+        """Whether the turn was taken from the player while they were picking,
+        by the turn ending or by a bot taking over their seat and playing it."""
+        return (
+            self.is_finished()
+            or not plays_in(game, player_id)
+            or game.current_player_id != player_id
+        )
+
     async def choose_card_from_view(
-        self, interaction: Interaction, choose_card_view: ChooseCardView
+        self, interaction: Interaction, game: UnoGame, choose_card_view: ChooseCardView
     ) -> Card | None:
         self.card_choice_in_progress = True
         await choose_card_view.wait()
-        if choose_card_view.timed_out:
+        if choose_card_view.timed_out or self.turn_taken(game, interaction.user.id):
             self.card_choice_in_progress = False
             return None
-        if choose_card_view.chosen_card.is_swap_hands():
-            pick_player_view = PickPlayerView(
-                ongoing_games[self.game_id].players, interaction.user.id
-            )
+        if choose_card_view.chosen_card.value in game.rules.swap_values:
+            pick_player_view = PickPlayerView(game.players, interaction.user.id)
             await interaction.edit_original_message(
                 content="Pick a player to swap hands with.", view=pick_player_view
             )
             chosen_player_id = await self.pick_player_from_view(
                 interaction, pick_player_view
             )
-            if not chosen_player_id:
+            if not chosen_player_id or self.turn_taken(game, interaction.user.id):
                 self.card_choice_in_progress = False
                 return None
             self.swapped_player_id = chosen_player_id
@@ -248,28 +630,47 @@ class UnoOngoingGameView(View):
                 content="Pick a new color.", view=pick_color_view
             )
             chosen_color = await self.pick_color_from_view(interaction, pick_color_view)
-            if not chosen_color:
+            if not chosen_color or self.turn_taken(game, interaction.user.id):
                 self.card_choice_in_progress = False
                 return None
-            choose_card_view.chosen_card.color = chosen_color
+            self.chosen_color = chosen_color
         self.card_choice_in_progress = False
         return choose_card_view.chosen_card
 
     async def draw_card_and_play(
         self, interaction: Interaction, game: UnoGame, player: UnoPlayer
     ):
-        card = game.draw_card(player)
+        if self.turn_taken(game, player.id):
+            await self.end_taken_turn(interaction)
+            return
+        if game.rules.draw_until_playable:
+            drawn_cards = game.draw_until_playable(player)
+        else:
+            card = game.draw_card(player)
+            drawn_cards = [card] if card else []
         # In the super low chance case the player has 25 cards and somehow has no playable card
-        if not card:
+        if not drawn_cards:
             await interaction.edit_original_message(
                 content="You have the maximum amount of cards.", view=None
             )
             self.made_move = "MAX_CARDS", None
             self.stop()
             return
-        if not UnoGame.card_is_eligible(card, game.get_top_card()):
+        card = drawn_cards[-1]
+        self.drawn_count = len(drawn_cards)
+        drew = (
+            "You drew"
+            if len(drawn_cards) == 1
+            else f"You drew {len(drawn_cards)} cards"
+        )
+        if not game.can_play(player, card):
             await interaction.edit_original_message(
-                content=f"You drew {card}. Skipping your turn.", view=None
+                content=(
+                    f"You drew {card}. Skipping your turn."
+                    if len(drawn_cards) == 1
+                    else f"{drew} without a playable one. Skipping your turn."
+                ),
+                view=None,
             )
             await interaction.delete_original_message()
             self.made_move = "DRAW_CARD", card
@@ -277,7 +678,8 @@ class UnoOngoingGameView(View):
             return
         self.drawn_card_playable = True
         played_card = card
-        if played_card.is_swap_hands():
+        chosen_color = None
+        if played_card.value in game.rules.swap_values:
             pick_player_view = PickPlayerView(game.players, player.id)
             await interaction.edit_original_message(
                 content="Pick a player to swap hands with.", view=pick_player_view
@@ -285,6 +687,9 @@ class UnoOngoingGameView(View):
             chosen_player_id = await self.pick_player_from_view(
                 interaction, pick_player_view
             )
+            if self.turn_taken(game, player.id):
+                await self.end_taken_turn(interaction)
+                return
             if not chosen_player_id:
                 self.play_in_progress = False
                 await interaction.edit_original_message(
@@ -299,17 +704,21 @@ class UnoOngoingGameView(View):
                 content="Pick a new color.", view=pick_color_view
             )
             chosen_color = await self.pick_color_from_view(interaction, pick_color_view)
+            if self.turn_taken(game, player.id):
+                await self.end_taken_turn(interaction)
+                return
             if not chosen_color:
                 self.play_in_progress = False
                 await interaction.edit_original_message(
                     content="You took too long. Press play again.", view=None
                 )
                 return
-            played_card.color = chosen_color
         if not self.swapped_player_id:
-            self.skipped_player_id = game.play_card(player, played_card)
+            self.skipped_player_id = game.play_card(
+                player, played_card, color=chosen_color
+            )
         await interaction.edit_original_message(
-            content=f"You drew and played {played_card}", view=None
+            content=f"{drew} and played {played_card}", view=None
         )
         await interaction.delete_original_message()
         self.made_move = "PLAY_CARD", played_card
@@ -318,12 +727,17 @@ class UnoOngoingGameView(View):
     @nextcord.ui.button(
         label=f"{zw} Play Card {zw} {zw}", style=nextcord.ButtonStyle.green, row=0
     )
+    @acknowledged(thinking=True)
     async def btn_play_card(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
-        if interaction.user.id not in game.players:
+        if not plays_in(game, interaction.user.id):
             await interaction.send(content="You are not in the game.", ephemeral=True)
             return
         if interaction.user.id != game.current_player_id:
+            player = game.players[interaction.user.id]
+            if game.can_jump_in(player) and not self.play_in_progress:
+                await self.jump_in(interaction, game, player)
+                return
             await interaction.send(content="Please wait for your turn.", ephemeral=True)
             return
         if self.color_choice_in_progress:
@@ -353,19 +767,25 @@ class UnoOngoingGameView(View):
         self.play_in_progress = True
         player = game.players[interaction.user.id]
         if not game.has_eligible_card(player):
+            if game.pending_draw:
+                await self.take_penalty(interaction, game, player)
+                return
             await interaction.send(
                 content="You do not have any eligible cards. Drawing a card...",
                 ephemeral=True,
             )
             await self.draw_card_and_play(interaction, game, player)
             return
-        choose_card_view = ChooseCardView(
-            pile_top_card=game.get_top_card(), hand=player.hand
-        )
+        choose_card_view = ChooseCardView(game, player)
         await interaction.send(
             content="Select a card to play.", view=choose_card_view, ephemeral=True
         )
-        chosen_card = await self.choose_card_from_view(interaction, choose_card_view)
+        chosen_card = await self.choose_card_from_view(
+            interaction, game, choose_card_view
+        )
+        if self.turn_taken(game, player.id):
+            await self.end_taken_turn(interaction)
+            return
         if not chosen_card:
             await interaction.edit_original_message(
                 content="You took too long. Press play again.", view=None
@@ -375,7 +795,9 @@ class UnoOngoingGameView(View):
         if self.swapped_player_id:
             game.play_card(player, chosen_card, self.swapped_player_id)
         else:
-            self.skipped_player_id = game.play_card(player, chosen_card)
+            self.skipped_player_id = game.play_card(
+                player, chosen_card, color=self.chosen_color
+            )
         await interaction.edit_original_message(
             content=f"You played {chosen_card}", view=None
         )
@@ -383,19 +805,49 @@ class UnoOngoingGameView(View):
         self.made_move = "PLAY_CARD", chosen_card
         self.stop()
 
+    async def end_taken_turn(self, interaction: Interaction):
+        # The turn is played or over, the flags belong to whoever has it now
+        await interaction.edit_original_message(content="Your turn is over.", view=None)
+
+    async def jump_in(self, interaction: Interaction, game: UnoGame, player: UnoPlayer):
+        """Plays the card identical to the top card out of turn, taking the turn."""
+        self.play_in_progress = True
+        card = game.jump_in(player)
+        self.skipped_player_id = game.play_card(player, card)
+        self.jumped_in = True
+        self.made_move = "PLAY_CARD", card
+        self.stop()
+        await interaction.send(content=f"You jumped in with {card}.", ephemeral=True)
+
+    async def take_penalty(
+        self, interaction: Interaction, game: UnoGame, player: UnoPlayer
+    ):
+        self.play_in_progress = True
+        self.penalty = game.take_penalty(player)
+        self.made_move = "PENALTY", None
+        self.stop()
+        await interaction.send(
+            content=f"You drew {self.penalty} stacked cards. Skipping your turn.",
+            ephemeral=True,
+        )
+
     @nextcord.ui.button(label="Show Hand", style=nextcord.ButtonStyle.blurple, row=1)
+    @acknowledged
     async def btn_show_hand(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
-        if interaction.user.id not in game.players:
+        if not plays_in(game, interaction.user.id):
             await interaction.send(content="You are not in the game.", ephemeral=True)
             return
-        view = ShowHandView(hand=game.players[interaction.user.id].hand)
-        await interaction.send(content="Your hand:", view=view, ephemeral=True)
+        content, components = get_hand_payload(game, game.players[interaction.user.id])
+        await interaction.send(
+            content=content, view=ShowHandView(components), ephemeral=True
+        )
 
     @nextcord.ui.button(label=f"{zw} {zw} {zw} Say Uno {zw} {zw} {zw} {zw}", row=1)
+    @acknowledged
     async def btn_say_uno(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
-        if interaction.user.id not in game.players:
+        if not plays_in(game, interaction.user.id):
             await interaction.send(content="You are not in the game.", ephemeral=True)
             return
         player = game.players[interaction.user.id]
@@ -413,14 +865,16 @@ class UnoOngoingGameView(View):
             await interaction.send(content="You have already said uno.", ephemeral=True)
             return
         player.said_uno = True
-        await interaction.channel.send(
-            content=f"<@{interaction.user.id}> said uno.", delete_after=15
+        message = await interaction.channel.send(
+            content=f"<@{interaction.user.id}> said uno."
         )
+        purger.track(message, delay=15, game_id=self.game_id)
 
     @nextcord.ui.button(label="Draw & Skip", row=0)
+    @acknowledged
     async def btn_draw_card(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
-        if interaction.user.id not in game.players:
+        if not plays_in(game, interaction.user.id):
             await interaction.send(content="You are not in the game.", ephemeral=True)
             return
         if interaction.user.id != game.current_player_id:
@@ -433,9 +887,15 @@ class UnoOngoingGameView(View):
             )
             return
         player = game.players[interaction.user.id]
+        if game.pending_draw:
+            await self.take_penalty(interaction, game, player)
+            return
+        # Keeps other players from jumping in until the turn is over
+        self.play_in_progress = True
         card = game.draw_card(player)
         if not card:
             if game.has_eligible_card(player):
+                self.play_in_progress = False
                 await interaction.send(
                     content="You have the maximum amount of cards. Play one.",
                     ephemeral=True,
@@ -455,13 +915,19 @@ class UnoOngoingGameView(View):
         self.stop()
 
     @nextcord.ui.button(label="Leave", style=nextcord.ButtonStyle.red, row=0)
+    @acknowledged(thinking=True)
     async def btn_leave_game(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
-        if interaction.user.id not in game.players:
+        if not plays_in(game, interaction.user.id):
             await interaction.send(content="You are not in the game.", ephemeral=True)
             return
         confirm_view = ConfirmationView(timeout=10)
-        if len(game.players) <= 2:
+        others_remain = any(
+            plays_in(game, player_id)
+            for player_id in game.players
+            if player_id != interaction.user.id
+        )
+        if not others_remain:
             await interaction.send(
                 content="The game will end if you leave it, are you sure you want to leave it?",
                 view=confirm_view,
@@ -469,30 +935,33 @@ class UnoOngoingGameView(View):
             )
         else:
             await interaction.send(
-                content="Are you sure you want to leave the game?",
+                content="Are you sure you want to leave the game? A bot will take over "
+                "your cards.",
                 view=confirm_view,
                 ephemeral=True,
             )
         confirm = await confirm_view.wait()
         if not confirm and confirm_view.value:
-            if len(game.players) <= 2:
+            if not others_remain:
                 self.end_game = "few_players"
                 self.stop()
                 await interaction.delete_original_message()
                 return
-            if interaction.user.id == game.current_player_id:
-                self.current_player_left_game = True
-                self.stop()
-            else:
-                game.remove_player(interaction.user.id)
-                await interaction.channel.send(
-                    content=f"{interaction.user.mention} left the game."
-                )
+            # The bot plays on with the same seat, so the turn order and the game
+            # log stay as they are
+            game.ai_players.add(interaction.user.id)
+            message = await interaction.channel.send(
+                content=f"{interaction.user.mention} left the game, a bot took over."
+            )
+            purger.track(message, game_id=self.game_id)
+            if interaction.user.id == game.current_player_id and not self.is_finished():
+                start_ai_turn(game, self)
         await interaction.delete_original_message()
 
     @nextcord.ui.button(
         label=f"{zw} {zw} End {zw} {zw}", style=nextcord.ButtonStyle.red, row=1
     )
+    @acknowledged(thinking=True)
     async def btn_end_game(self, button: Button, interaction: Interaction):
         game = ongoing_games[self.game_id]
         if interaction.user.id != game.host_id:
@@ -513,6 +982,100 @@ class UnoOngoingGameView(View):
         await interaction.delete_original_message()
 
 
+def start_ai_turn(game: UnoGame, view: UnoOngoingGameView):
+    task = asyncio.create_task(play_ai_turn(game, view))
+    ai_turns.add(task)
+    task.add_done_callback(ai_turns.discard)
+
+
+async def play_ai_turn(game: UnoGame, view: UnoOngoingGameView):
+    """Makes the current move for the bot like a player would through the view.
+    The move is searched for in a separate process, the turn may have ended by the
+    time it is found."""
+    player = game.players[game.current_player_id]
+    view.play_in_progress = True
+    try:
+        move, rollouts = await choose_move(game, player.id, AI_MOVE_TIME, AI_WORKERS)
+        metrics.increment("ai.rollouts", rollouts)
+    except Exception:
+        logger.exception("Move search failed, falling back to the greedy move")
+        metrics.increment("ai.fallbacks")
+        move = greedy_move(game, player, rnd)
+    if view.is_finished() or game.current_player_id != player.id:
+        return
+    if checked_move(game, player, move) is None:
+        logger.warning(
+            f"The searched move {move} cannot be made, making the greedy move"
+        )
+        metrics.increment("ai.fallbacks")
+        move = greedy_move(game, player, rnd)
+    result = apply_move(game, player, move)
+    metrics.increment("ai.moves")
+    view.made_move = result.made_move, result.card
+    view.drawn_card_playable = result.drawn_card_playable
+    view.skipped_player_id = result.skipped_player_id
+    view.swapped_player_id = result.swapped_player_id
+    view.drawn_count = result.drawn_count
+    view.penalty = result.penalty
+    if player.one_card_left():
+        player.said_uno = True
+    view.stop()
+
+
+def set_turn_fields(embed: Embed, game: UnoGame):
+    """Shows whose turn it is, with the turn order and the top card as text or,
+    in image mode, in the attached table image."""
+    embed.clear_fields()
+    if table_renderer is None:
+        turn_order = [
+            f"{index}. {player_mention(player_id)} **({len(game.players[player_id].hand)})**"
+            for index, player_id in enumerate(game.play_order)
+        ]
+        embed.add_field(name="Turn Order", value="\n".join(turn_order), inline=False)
+        # A game paused in image mode may be resumed without it
+        embed.set_image(url=None)
+    embed.add_field(
+        name="Current Turn",
+        value=player_mention(game.current_player_id),
+        inline=True,
+    )
+    if table_renderer is None:
+        embed.add_field(name="Current Card", value=game.get_top_card(), inline=True)
+    embed.add_field(
+        name="Next Turn",
+        value=player_mention(game.next_player_id),
+        inline=True,
+    )
+
+
+async def table_file(game: UnoGame, embed: Embed) -> nextcord.File | None:
+    """The table image to attach in image mode. A table that was shown before is
+    sent again as it was encoded, others are drawn in a thread."""
+    if table_renderer is None:
+        return None
+    state = table_state(game)
+    image = table_renderer.get(state)
+    if image is None:
+        image = await asyncio.to_thread(table_renderer.render, state)
+        table_renderer.put(state, image)
+    embed.set_image(url="attachment://table.png")
+    return nextcord.File(BytesIO(image), filename="table.png")
+
+
+def register_game(game: UnoGame, channel_id: int):
+    ongoing_games[game.id] = game
+    channel_games[channel_id].add(game.id)
+    game_profiles[game.id] = {}
+
+
+def unregister_game(game_id: int, channel_id: int):
+    ongoing_games.pop(game_id, None)
+    game_profiles.pop(game_id, None)
+    channel_games[channel_id].discard(game_id)
+    if not channel_games[channel_id]:
+        channel_games.pop(channel_id)
+
+
 def calculate_game_stats(game: UnoGame):
     total_drawn_cards, total_turns_skipped, total_played_cards = 0, 0, 0
     for player in game.players.values():
@@ -522,31 +1085,225 @@ def calculate_game_stats(game: UnoGame):
     return total_drawn_cards, total_turns_skipped, total_played_cards
 
 
-def update_player_stats(player_dict: dict[int, UnoPlayer], winner_id: int):
+def apply_stats_delta(
+    guild_id: int, day: int, user_id: int, username: str, delta: dict[str, int]
+):
+    # In cluster mode every worker applies the delta, the worker running the server's
+    # shard persists its stats and the player's owner their all-time stats
+    writes = [
+        write
+        for write in stats_writes(guild_id, user_id, username, delta, day)
+        if (owns_guild(guild_id) if write.path[0] == "guilds" else owns_key(user_id))
+    ]
+    guild_stats.apply(guild_id, UnoLeaderboardPlayer(user_id, username), delta, day)
+    if writes:
+        stats_spool.append(writes)
+
+
+def player_ranks(leaderboard: Leaderboard, user_id: int):
+    return " / ".join(
+        f"#{rank}" if rank else "-"
+        for rank in (
+            leaderboard.rank("wins", user_id),
+            leaderboard.rank("winrate", user_id),
+        )
+    )
+
+
+class LeaderboardPages:
+    """Leaderboard pages for PaginationView, each page is ranked when first viewed."""
+
+    def __init__(
+        self,
+        leaderboard: Leaderboard,
+        board: str,
+        page_length: int,
+    ):
+        self.leaderboard = leaderboard
+        self.board = board
+        self.page_length = page_length
+        self.player_count = leaderboard.count(board)
+        self.pages: dict[int, str] = {}
+
+    def __len__(self):
+        return -(-self.player_count // self.page_length)
+
+    def __getitem__(self, index: int) -> str:
+        if index not in self.pages:
+            start = index * self.page_length
+            page = StringIO()
+            for ranking, player in enumerate(
+                self.leaderboard.page(self.board, start, start + self.page_length),
+                start,
+            ):
+                stats = (
+                    f"Wins: ``{player.wins} ({player.played})``\n"
+                    f"Win Rate: ``{round(player.wins / player.played * 100, 2)}%``\n"
+                )
+                page.write(f"#**{ranking + 1}** <@{player.user_id}>\n{stats}\n")
+            self.pages[index] = page.getvalue()
+        return self.pages[index]
+
+
+def update_player_stats(
+    guild_id: int, player_dict: dict[int, UnoPlayer], winner_id: int
+):
+    day, deltas = current_day(), []
     for player_id, player in player_dict.items():
-        new_player = False
-        if player_id not in uno_players:
-            lb_player = UnoLeaderboardPlayer(player_id, player.username)
-            new_player = True
-        else:
-            lb_player = uno_players[player_id]
-        if lb_player.user_id == winner_id:
-            lb_player.wins += 1
-        lb_player.played += 1
-        lb_player.drawn_cards += player.drawn_cards
-        lb_player.turns_skipped += player.turns_skipped
-        lb_player.played_cards += player.played_cards
-        if new_player:
-            uno_players[lb_player.user_id] = lb_player
-            add_uno_player(lb_player)
-        else:
-            update_player(player_id, uno_players[player_id])
+        delta = {
+            "wins": int(player_id == winner_id),
+            "played": 1,
+            "drawn_cards": player.drawn_cards,
+            "turns_skipped": player.turns_skipped,
+            "played_cards": player.played_cards,
+        }
+        apply_stats_delta(guild_id, day, player_id, player.username, delta)
+        deltas.append((player_id, player.username, delta))
+    publish("stats", (guild_id, day, deltas))
+
+
+def on_remote_stats(
+    payload: tuple[int, int, list[tuple[int, str, dict[str, int]]]],
+):
+    guild_id, day, deltas = payload
+    for user_id, username, delta in deltas:
+        apply_stats_delta(guild_id, day, user_id, username, delta)
 
 
 class Uno(Cog):
     def __init__(self, bot: Bot):
         self.bot = bot
         self.phrases = ["dunked on", "trolled", "owned", "rekt"]
+        self.hosting = hosting
+        self.matchmaking = matchmaking
+        self.matchmaking.on_match = self.start_matched_game
+        self.matchmaking.on_expire = self.expire_queue_entry
+        subscribe("stats", on_remote_stats)
+        subscribe("reload", self.on_remote_reload)
+
+    def cog_unload(self):
+        unsubscribe("stats", on_remote_stats)
+        unsubscribe("reload", self.on_remote_reload)
+        if is_reloading():
+            # The cog replacing this one takes over the games and the background tasks
+            return
+        self.matchmaking.stop()
+        purger.stop()
+        stats_spool.stop()
+        shutdown_search_pool()
+
+    def reload(self) -> int:
+        """Reloads this extension without interrupting the games, returns the time it
+        took in milliseconds. Games already being played finish with the code they
+        started with, everything started after the reload uses the new code."""
+        start = time.perf_counter()
+        reload_extension(self.bot, __name__)
+        metrics.increment("extension.reloads")
+        return round((time.perf_counter() - start) * 1000)
+
+    def on_remote_reload(self, payload: None):
+        try:
+            elapsed = self.reload()
+        except Exception:
+            logger.exception("Could not reload the Uno extension")
+            return
+        logger.info(f"Reloaded the Uno extension in {elapsed} ms")
+
+    @Cog.listener()
+    async def on_ready(self):
+        # Sends the stats writes left pending by the last run
+        stats_spool.start()
+        self.resume_games()
+        try:
+            await asyncio.to_thread(prune_applied_writes, current_day())
+        except Exception:
+            logger.exception("Could not prune the markers of the applied stats writes")
+
+    async def shutdown(self, drain_timeout: float, flush_timeout: float):
+        """Stops starting new games and pauses the ongoing ones at the end of their
+        current turn, then saves them to be resumed on the next start and sends the
+        pending stats writes."""
+        self.hosting.draining = True
+        self.matchmaking.stop()
+        for view in list(self.hosting.lobby_views):
+            view.cancelled = True
+            view.stop()
+        deadline = time.monotonic() + drain_timeout
+        while ongoing_games and time.monotonic() < deadline:
+            await asyncio.sleep(0.5)
+        # Turns that did not end in time are played again after the restart
+        for view in list(self.hosting.turn_views.values()):
+            view.end_game = "restart"
+            view.stop()
+        deadline = time.monotonic() + 5
+        while ongoing_games and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        save_game_snapshots(snapshot_path, self.hosting.paused_games)
+        logger.info(f"Paused {len(self.hosting.paused_games)} games")
+        if not await stats_spool.flush(flush_timeout):
+            logger.warning(
+                f"{len(stats_spool)} stats writes are still pending, they will be "
+                f"sent on the next start"
+            )
+
+    def resume_games(self):
+        for snapshot in load_game_snapshots(snapshot_path):
+            game = snapshot.game
+            guild = self.bot.get_guild(snapshot.guild_id)
+            channel = guild and guild.get_channel_or_thread(snapshot.channel_id)
+            game_channel = guild and guild.get_channel_or_thread(
+                snapshot.game_channel_id
+            )
+            if channel is None or game_channel is None:
+                logger.warning(f"Could not resume game {game.id}, its channel is gone")
+                continue
+            if not admission.try_open_lobby(guild.id):
+                logger.warning(f"Could not resume game {game.id}, Uno is at capacity")
+                continue
+            admission.start_game(guild.id)
+            register_game(game, channel.id)
+            game_profiles[game.id] = snapshot.profiles
+            task = asyncio.create_task(
+                self.resume_game(guild, channel, game_channel, snapshot)
+            )
+            self.hosting.game_tasks.add(task)
+            task.add_done_callback(self.hosting.game_tasks.discard)
+            metrics.increment("games.resumed")
+
+    async def resume_game(
+        self,
+        guild: nextcord.Guild,
+        channel: nextcord.TextChannel | nextcord.Thread,
+        game_channel: nextcord.TextChannel | nextcord.Thread,
+        snapshot: GameSnapshot,
+    ):
+        try:
+            await self.run_game(
+                guild,
+                channel,
+                game_channel,
+                snapshot.game,
+                Embed.from_dict(snapshot.embed),
+                turn_number=snapshot.turn_number,
+            )
+        finally:
+            unregister_game(snapshot.game.id, channel.id)
+            admission.close_game(guild.id)
+
+    @Cog.listener()
+    async def on_guild_channel_create(self, channel: nextcord.abc.GuildChannel):
+        invalidate_logging_channel(channel.guild.id)
+
+    @Cog.listener()
+    async def on_guild_channel_delete(self, channel: nextcord.abc.GuildChannel):
+        invalidate_logging_channel(channel.guild.id)
+
+    @Cog.listener()
+    async def on_guild_channel_update(
+        self, before: nextcord.abc.GuildChannel, after: nextcord.abc.GuildChannel
+    ):
+        if before.name != after.name:
+            invalidate_logging_channel(after.guild.id)
 
     @slash_command(name="uno", guild_ids=SERVER_IDS)
     async def uno(self, interaction):
@@ -565,209 +1322,424 @@ class Uno(Cog):
             max_value=10,
             default=7,
         ),
+        rules: str = SlashOption(
+            description="House rules to play with",
+            choices={variant.label: name for name, variant in VARIANTS.items()},
+            default="standard",
+        ),
     ):
         await interaction.response.defer(ephemeral=True)
-        if interaction.channel.id in ongoing_games:
+        if self.hosting.draining:
+            await interaction.send(content=restarting_message)
+            return
+        channel_full_message = f"There are already {MAX_GAMES_PER_CHANNEL} games being hosted in this channel."
+        if len(channel_games[interaction.channel.id]) >= MAX_GAMES_PER_CHANNEL:
+            await interaction.send(content=channel_full_message)
+            return
+
+        async def notify_queue_position(position: int):
+            # A failed notice does not cost the place in the queue
+            try:
+                await interaction.edit_original_message(
+                    content=f"Uno is busy right now, you are #{position} in the queue. "
+                    f"Your lobby will open automatically."
+                )
+            except nextcord.HTTPException as e:
+                logger.warning(f"Could not show the queue position: {e}")
+
+        if not await admission.open_lobby(
+            interaction.guild.id, notify_queue_position, max_wait=LOBBY_QUEUE_TIMEOUT
+        ):
             await interaction.send(
-                content="There's already a game being hosted in this channel."
+                content="Uno is at capacity right now, please try again later."
             )
             return
+        if self.hosting.draining:
+            admission.close_lobby(interaction.guild.id)
+            await interaction.send(content=restarting_message)
+            return
+        # Other games may have started in this channel while waiting in the queue
+        if len(channel_games[interaction.channel.id]) >= MAX_GAMES_PER_CHANNEL:
+            admission.close_lobby(interaction.guild.id)
+            await interaction.send(content=channel_full_message)
+            return
         game = UnoGame(
-            interaction.channel.id, interaction.user.id, initial_card_count=cards
+            interaction.id, interaction.user.id, initial_card_count=cards, variant=rules
         )
-        ongoing_games[game.id] = game
-        game.players[interaction.user.id] = UnoPlayer(
-            interaction.user.id, interaction.user.name
+        register_game(game, interaction.channel.id)
+        game_started = False
+        try:
+            game.players[interaction.user.id] = UnoPlayer(
+                interaction.user.id, interaction.user.name
+            )
+            game_profiles[game.id][interaction.user.id] = profile_from_user(
+                interaction.user
+            )
+            self.matchmaking.remove(interaction.guild.id, interaction.user.id)
+            embed = Embed(
+                title="Uno Game",
+                color=random_color(),
+                timestamp=nextcord.utils.utcnow(),
+                description=f"Waiting for players to join. (1/{players})\nPlayers:\n"
+                f"<@{interaction.user.id}>",
+            )
+            embed.add_field(name="Cards per player", value=cards)
+            embed.add_field(name="Rules", value=VARIANTS[rules].label)
+            embed.add_field(
+                name="Info",
+                value=f"The game will begin when all {players} players have joined or "
+                f"when the host starts the game.",
+                inline=False,
+            )
+            embed.set_author(
+                name=self.bot.user.name,
+                icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None,
+            )
+            # The footer stays on the game's embed, so the players keep seeing the rules
+            rules_note = "" if rules == "standard" else f" • {VARIANTS[rules].label}"
+            embed.set_footer(
+                text=f"Hosted by {interaction.user.name}{rules_note}",
+                icon_url=interaction.user.display_avatar.url,
+            )
+            if self.bot.user.avatar:
+                embed.set_thumbnail(self.bot.user.avatar.url)
+            # The view times out when nobody interacts with it, abandoned lobbies are
+            # reaped after LOBBY_IDLE_TIMEOUT and busy ones after LOBBY_MAX_LIFETIME
+            start_game_view = UnoStartGameView(
+                game.id, player_count=players, timeout=LOBBY_IDLE_TIMEOUT
+            )
+            uno_role = nextcord.utils.get(interaction.guild.roles, name="Uno")
+            ping = uno_role.mention if uno_role else None
+            start_game_msg: Message = await interaction.channel.send(
+                content=ping, embed=embed, view=start_game_view
+            )
+            await interaction.send("Waiting for players to join.")
+            self.hosting.lobby_views.add(start_game_view)
+            try:
+                lobby_timed_out = await asyncio.wait_for(
+                    start_game_view.wait(), LOBBY_MAX_LIFETIME
+                )
+            except asyncio.TimeoutError:
+                start_game_view.stop()
+                lobby_timed_out = True
+            finally:
+                self.hosting.lobby_views.discard(start_game_view)
+            if lobby_timed_out or start_game_view.cancelled or self.hosting.draining:
+                if lobby_timed_out:
+                    metrics.increment("admission.lobbies_reaped")
+                await edit_message(
+                    start_game_msg,
+                    (
+                        restarting_message
+                        if self.hosting.draining
+                        else "The game timed out or was cancelled."
+                    ),
+                    embed=None,
+                    view=None,
+                )
+                purger.track(start_game_msg, delay=5)
+                return
+            admission.start_game(interaction.guild.id)
+            game_started = True
+            await delete_message(start_game_msg)
+            await self.host_game(
+                interaction.guild,
+                interaction.channel,
+                game,
+                embed,
+                thread_name=f"Uno - {interaction.user.name}'s game",
+            )
+        finally:
+            unregister_game(game.id, interaction.channel.id)
+            if game_started:
+                admission.close_game(interaction.guild.id)
+            else:
+                admission.close_lobby(interaction.guild.id)
+
+    def start_matched_game(self, guild_id: int, entries: list[QueueEntry]) -> bool:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None or self.hosting.draining:
+            return True
+        channel = next(
+            (
+                channel
+                for channel in map(guild.get_channel, (e.channel_id for e in entries))
+                if channel and len(channel_games[channel.id]) < MAX_GAMES_PER_CHANNEL
+            ),
+            None,
         )
+        if channel is None or not admission.try_open_lobby(guild_id):
+            return False
+        admission.start_game(guild_id)
+        game = UnoGame(entries[0].entry_id, entries[0].user_id)
+        register_game(game, channel.id)
+        for entry in entries:
+            game.players[entry.user_id] = UnoPlayer(entry.user_id, entry.username)
+            game_profiles[game.id][entry.user_id] = Profile(
+                entry.user_id, entry.username, entry.avatar_url
+            )
+        task = asyncio.create_task(self.run_matched_game(guild, channel, game))
+        self.hosting.game_tasks.add(task)
+        task.add_done_callback(self.hosting.game_tasks.discard)
+        return True
+
+    def expire_queue_entry(self, guild_id: int, entry: QueueEntry):
+        guild = self.bot.get_guild(guild_id)
+        channel = guild.get_channel(entry.channel_id) if guild else None
+        if channel is None:
+            return
+        task = asyncio.create_task(self.send_queue_expired(channel, entry))
+        self.hosting.notice_tasks.add(task)
+        task.add_done_callback(self.hosting.notice_tasks.discard)
+
+    async def send_queue_expired(
+        self, channel: nextcord.TextChannel | nextcord.Thread, entry: QueueEntry
+    ):
+        try:
+            message = await channel.send(
+                content=f"{player_mention(entry.user_id)} nobody else joined the "
+                f"matchmaking queue within {MATCHMAKING_MAX_WAIT} seconds, you have "
+                f"been removed from it.",
+            )
+        except nextcord.HTTPException as e:
+            logger.warning(f"Could not send the matchmaking timeout notice: {e}")
+            return
+        purger.track(message, delay=30)
+
+    async def run_matched_game(
+        self,
+        guild: nextcord.Guild,
+        channel: nextcord.TextChannel | nextcord.Thread,
+        game: UnoGame,
+    ):
         embed = Embed(
-            title="Uno Game",
-            color=random_color(),
-            timestamp=nextcord.utils.utcnow(),
-            description=f"Waiting for players to join. (1/{players})\nPlayers:\n"
-            f"<@{interaction.user.id}>",
-        )
-        embed.add_field(name="Cards per player", value=cards)
-        embed.add_field(
-            name="Info",
-            value=f"The game will begin when all {players} players have joined or "
-            f"when the host starts the game.",
-            inline=False,
-        )
-        embed.set_author(
-            name=self.bot.user.name,
-            icon_url=self.bot.user.avatar.url if self.bot.user.avatar else None,
-        )
-        embed.set_footer(
-            text=f"Hosted by {interaction.user.name}",
-            icon_url=interaction.user.avatar.url,
+            title="Uno Game", color=random_color(), timestamp=nextcord.utils.utcnow()
         )
+        embed.set_footer(text="Matchmade game")
         if self.bot.user.avatar:
             embed.set_thumbnail(self.bot.user.avatar.url)
-        start_game_view = UnoStartGameView(game.id, player_count=players, timeout=600)
-        uno_role = nextcord.utils.get(interaction.guild.roles, name="Uno")
-        ping = uno_role.mention if uno_role else None
-        start_game_msg: Message = await interaction.channel.send(
-            content=ping, embed=embed, view=start_game_view
-        )
-        await interaction.send("Waiting for players to join.")
-        if await start_game_view.wait() or start_game_view.cancelled:
-            await edit_message(
-                start_game_msg,
-                "The game timed out or was cancelled.",
-                embed=None,
-                view=None,
+        mentions = " ".join(player_mention(player_id) for player_id in game.players)
+        try:
+            await self.host_game(
+                guild,
+                channel,
+                game,
+                embed,
+                thread_name="Uno - Matchmade game",
+                announcement=f"Match found! {mentions}",
             )
-            if game.id in ongoing_games:
-                ongoing_games.pop(game.id)
-            await delete_message(start_game_msg, 5)
-            return
-        timeout = 60
+        finally:
+            unregister_game(game.id, channel.id)
+            admission.close_game(guild.id)
+
+    async def host_game(
+        self,
+        guild: nextcord.Guild,
+        channel: nextcord.TextChannel | nextcord.Thread,
+        game: UnoGame,
+        embed: Embed,
+        thread_name: str,
+        announcement: str = None,
+    ):
+        game.recorder = open_game_recorder(GAME_LOG_DIR, game.id)
         game.start_game()
+        game_channel = channel
+        if isinstance(channel, nextcord.TextChannel):
+            game_channel = await create_thread(channel, thread_name) or channel
+        await self.run_game(guild, channel, game_channel, game, embed, announcement)
+
+    async def run_game(
+        self,
+        guild: nextcord.Guild,
+        channel: nextcord.TextChannel | nextcord.Thread,
+        game_channel: nextcord.TextChannel | nextcord.Thread,
+        game: UnoGame,
+        embed: Embed,
+        announcement: str = None,
+        turn_number: int = None,
+    ):
+        """Plays a started game, or one resumed at turn_number after a restart."""
+        timeout = 60
+        paused = False
+        try:
+            if announcement:
+                await send_message(game_channel, announcement)
+            paused = await self.play_game(
+                guild, channel, game_channel, game, embed, timeout, turn_number
+            )
+        finally:
+            self.hosting.turn_views.pop(game.id, None)
+            # A paused game keeps its log open and its thread for when it resumes
+            if not paused:
+                game.end(game.check_winner())
+            await purger.purge_game(game.id)
+            if game_channel is not channel and not paused:
+                await archive_thread(game_channel)
+
+    async def player_profile(
+        self, guild: nextcord.Guild, game: UnoGame, user_id: int
+    ) -> Profile:
+        profile = game_profiles.get(game.id, {}).get(user_id)
+        return profile or await profiles.resolve(self.bot, user_id, guild)
+
+    async def play_game(
+        self,
+        guild: nextcord.Guild,
+        channel: nextcord.TextChannel | nextcord.Thread,
+        game_channel: nextcord.TextChannel | nextcord.Thread,
+        game: UnoGame,
+        embed: Embed,
+        timeout: int,
+        turn_number: int = None,
+    ) -> bool:
+        """Plays the game until it ends, returns True if it was paused by a shutdown."""
         ongoing_game_view = UnoOngoingGameView(game.id, timeout=timeout)
-        turn_number = 1
+        self.hosting.turn_views[game.id] = ongoing_game_view
+        resumed = turn_number is not None
+        if not resumed:
+            turn_number = 1
+            embed.description = "The game has begun"
         embed.title = f"Turn {turn_number}"
-        embed.description = "The game has begun"
-        current_member = interaction.guild.get_member(game.current_player_id)
-        embed.set_author(name=current_member.name, icon_url=current_member.avatar.url)
-        turn_order = [
-            f"{index}. <@{player_id}> **({len(game.players[player_id].hand)})**"
-            for index, player_id in enumerate(game.play_order)
-        ]
-        embed.clear_fields()
-        embed.add_field(name="Turn Order", value="\n".join(turn_order), inline=False)
-        embed.add_field(
-            name="Current Turn", value=f"<@{game.current_player_id}>", inline=True
-        )
-        embed.add_field(name="Current Card", value=game.get_top_card(), inline=True)
-        embed.add_field(
-            name="Next Turn", value=f"<@{game.next_player_id}>", inline=True
-        )
-        await delete_message(start_game_msg)
-        game_msg = await interaction.channel.send(
-            content=f"Game started, <@{game.current_player_id}>'s turn.",
+        profile = await self.player_profile(guild, game, game.current_player_id)
+        embed.set_author(name=profile.name, icon_url=profile.avatar_url)
+        set_turn_fields(embed, game)
+        game_msg = await game_channel.send(
+            content=f"Game {'resumed' if resumed else 'started'}, "
+            f"{player_mention(game.current_player_id)}'s turn.",
             embed=embed,
             view=ongoing_game_view,
+            file=await table_file(game, embed),
         )
+        if game.current_player_id in game.ai_players:
+            start_ai_turn(game, ongoing_game_view)
         # Wait until the player that has the current move makes a move or the view times out
         consecutive_skips = 0
         while True:
             timed_out = await ongoing_game_view.wait()
+            if ongoing_game_view.end_game == "restart":
+                return await self.pause_game(
+                    guild, channel, game_channel, game, embed, turn_number, game_msg
+                )
             if ongoing_game_view.end_game:
-                if game.id in ongoing_games:
-                    ongoing_games.pop(game.id)
                 await delete_message(game_msg)
                 if ongoing_game_view.end_game == "host":
-                    await send_message(
-                        interaction.channel,
-                        "The game was ended by the host.",
-                        delete_after=10,
-                    )
+                    notice = "The game was ended by the host."
                 else:
-                    await send_message(
-                        interaction.channel,
-                        "The game was ended as there were not enough players remaining.",
-                        delete_after=10,
+                    notice = (
+                        "The game was ended as there were not enough players remaining."
                     )
+                message = await send_message(channel, notice)
+                # Not tracked with the game, whose messages are purged as it ends
+                if message is not None:
+                    purger.track(message, delay=10)
                 return
             winner = game.check_winner()
             if winner:
-                if game.id in ongoing_games:
-                    ongoing_games.pop(game.id)
                 embed.description = "Game has ended"
                 embed.clear_fields().add_field(
-                    name="Winner", value=f"<@{winner}>", inline=False
+                    name="Winner", value=player_mention(winner), inline=False
                 )
                 game_stats = calculate_game_stats(game)
                 embed.add_field(name="Played Cards", value=game_stats[2])
                 embed.add_field(name="Cards Drawn", value=game_stats[0])
                 embed.add_field(name="Turns Skipped", value=game_stats[1])
+                file = await table_file(game, embed)
                 await delete_message(game_msg)
-                await interaction.channel.send(embed=embed)
-                update_player_stats(game.players, winner)
+                await channel.send(embed=embed, file=file)
+                update_player_stats(
+                    guild.id,
+                    {
+                        player_id: player
+                        for player_id, player in game.players.items()
+                        if player_id not in game.ai_players
+                    },
+                    winner,
+                )
                 return
-            player_left_game, leaving_player_id = (
-                ongoing_game_view.current_player_left_game,
-                game.current_player_id,
-            )
-            if player_left_game:
-                round_result = f"<@{game.current_player_id}> left the game."
-            elif timed_out:
-                random_draw = rnd.randint(2, 4)
-                game.draw_cards(game.players[game.current_player_id], random_draw)
-                round_result = f"<@{game.current_player_id}> randomly drew {random_draw} for taking too long to move"
+            if timed_out:
+                player = game.players[game.current_player_id]
+                if game.pending_draw:
+                    drew = f"drew {game.take_penalty(player)} stacked cards"
+                else:
+                    drew = f"randomly drew {game.timeout_penalty(player)}"
+                round_result = f"{player_mention(game.current_player_id)} {drew} for taking too long to move"
                 consecutive_skips += 1
                 if consecutive_skips > len(game.players) + 1:
-                    if game.id in ongoing_games:
-                        ongoing_games.pop(game.id)
                     await edit_message(
                         game_msg,
                         content="Game is inactive, ending the game.",
                         embed=None,
                         view=None,
                     )
-                    await delete_message(game_msg, delay=5)
+                    purger.track(game_msg, delay=5)
                     return
-                await interaction.channel.send(
-                    f"<@{game.current_player_id}> randomly drew {random_draw} for "
-                    f"taking too long to move",
-                    delete_after=5,
-                )
+                message = await game_channel.send(round_result)
+                purger.track(message, delay=5, game_id=game.id)
             else:
                 consecutive_skips = 0
                 made_move, played_card = ongoing_game_view.made_move
+                drawn_count = ongoing_game_view.drawn_count
+                drew = "drew" if drawn_count == 1 else f"drew {drawn_count} cards"
                 if ongoing_game_view.drawn_card_playable:
-                    if played_card.is_punishing():
+                    if (
+                        played_card.is_punishing()
+                        and ongoing_game_view.skipped_player_id
+                    ):
                         round_result = (
-                            f"<@{game.current_player_id}> drew and {rnd.choice(self.phrases)} "
-                            f"<@{ongoing_game_view.skipped_player_id}> with {played_card}"
+                            f"{player_mention(game.current_player_id)} {drew} and {rnd.choice(self.phrases)} "
+                            f"{player_mention(ongoing_game_view.skipped_player_id)} with {played_card}"
                         )
-                    elif (
-                        played_card.is_swap_hands()
-                        and ongoing_game_view.swapped_player_id
-                    ):
+                    elif ongoing_game_view.swapped_player_id:
                         round_result = (
-                            f"<@{game.current_player_id}> drew and swapped hands with "
-                            f"<@{ongoing_game_view.swapped_player_id}> with {played_card}"
+                            f"{player_mention(game.current_player_id)} {drew} and swapped hands with "
+                            f"{player_mention(ongoing_game_view.swapped_player_id)} with {played_card}"
                         )
-                    else:
+                    elif played_card.value in game.rules.rotate_values:
                         round_result = (
-                            f"<@{game.current_player_id}> drew and played {played_card}"
+                            f"{player_mention(game.current_player_id)} {drew} and played {played_card}, "
+                            f"every hand moved to the next player"
                         )
+                    else:
+                        round_result = f"{player_mention(game.current_player_id)} {drew} and played {played_card}"
                 else:
                     if made_move == "DRAW_CARD":
-                        round_result = f"<@{game.current_player_id}> drew a card"
-                    elif made_move == "MAX_CARDS":
                         round_result = (
-                            f"<@{game.current_player_id}> reached the card limit"
-                        )
-                    elif played_card.is_punishing():
-                        round_result = (
-                            f"<@{game.current_player_id}> {rnd.choice(self.phrases)} "
-                            f"<@{ongoing_game_view.skipped_player_id}> with {played_card}"
+                            f"{player_mention(game.current_player_id)} drew a card"
+                            if drawn_count == 1
+                            else f"{player_mention(game.current_player_id)} drew {drawn_count} cards"
                         )
+                    elif made_move == "MAX_CARDS":
+                        round_result = f"{player_mention(game.current_player_id)} reached the card limit"
+                    elif made_move == "PENALTY":
+                        round_result = f"{player_mention(game.current_player_id)} drew {ongoing_game_view.penalty} stacked cards"
                     elif (
-                        played_card.is_swap_hands()
-                        and ongoing_game_view.swapped_player_id
+                        played_card.is_punishing()
+                        and ongoing_game_view.skipped_player_id
                     ):
                         round_result = (
-                            f"<@{game.current_player_id}> swapped hands with "
-                            f"<@{ongoing_game_view.swapped_player_id}> with {played_card}"
+                            f"{player_mention(game.current_player_id)} {rnd.choice(self.phrases)} "
+                            f"{player_mention(ongoing_game_view.skipped_player_id)} with {played_card}"
                         )
-                    else:
+                    elif ongoing_game_view.swapped_player_id:
                         round_result = (
-                            f"<@{game.current_player_id}> played {played_card}"
+                            f"{player_mention(game.current_player_id)} swapped hands with "
+                            f"{player_mention(ongoing_game_view.swapped_player_id)} with {played_card}"
                         )
-            if (
-                player_left_game
-                and game.player_id_that_has_to_say_uno == leaving_player_id
-            ):
-                game.player_id_that_has_to_say_uno = -1
+                    elif played_card.value in game.rules.rotate_values:
+                        round_result = (
+                            f"{player_mention(game.current_player_id)} played {played_card}, "
+                            f"every hand moved to the next player"
+                        )
+                    else:
+                        round_result = f"{player_mention(game.current_player_id)} played {played_card}"
+                if ongoing_game_view.jumped_in:
+                    round_result = f"{player_mention(game.current_player_id)} jumped in.\n{round_result}"
             if game.player_id_that_has_to_say_uno != -1:
                 player_that_has_to_say_uno = game.players[
                     game.player_id_that_has_to_say_uno
                 ]
                 if not player_that_has_to_say_uno.said_uno and len(game.players) > 2:
-                    round_result = f"<@{player_that_has_to_say_uno.id}> forgot to say uno.\n{round_result}"
+                    round_result = f"{player_mention(player_that_has_to_say_uno.id)} forgot to say uno.\n{round_result}"
                     game.draw_cards(player_that_has_to_say_uno, 2)
                 player_that_has_to_say_uno.said_uno = False
                 game.player_id_that_has_to_say_uno = -1
@@ -777,34 +1749,101 @@ class Uno(Cog):
             embed.title = f"Turn {turn_number}"
             embed.description = round_result
             game.advance_turn()
-            if player_left_game:
-                game.remove_player(leaving_player_id)
+            if game.pending_draw:
+                embed.description += (
+                    f"\n{player_mention(game.current_player_id)} has to stack a draw "
+                    f"card or draw {game.pending_draw}."
+                )
+            if self.hosting.draining:
+                return await self.pause_game(
+                    guild, channel, game_channel, game, embed, turn_number, game_msg
+                )
             ongoing_game_view = UnoOngoingGameView(game.id, timeout=timeout)
-            current_member = interaction.guild.get_member(game.current_player_id)
-            embed.set_author(
-                name=current_member.name, icon_url=current_member.avatar.url
-            )
-            embed.clear_fields()
-            turn_order = [
-                f"{index}. <@{player_id}> **({len(game.players[player_id].hand)})**"
-                for index, player_id in enumerate(game.play_order)
-            ]
-            embed.add_field(
-                name="Turn Order", value="\n".join(turn_order), inline=False
-            )
-            embed.add_field(
-                name="Current Turn", value=f"<@{game.current_player_id}>", inline=True
-            )
-            embed.add_field(name="Current Card", value=game.get_top_card(), inline=True)
-            embed.add_field(
-                name="Next Turn", value=f"<@{game.next_player_id}>", inline=True
-            )
+            self.hosting.turn_views[game.id] = ongoing_game_view
+            profile = await self.player_profile(guild, game, game.current_player_id)
+            embed.set_author(name=profile.name, icon_url=profile.avatar_url)
+            set_turn_fields(embed, game)
+            file = await table_file(game, embed)
             await delete_message(game_msg)
-            game_msg = await interaction.channel.send(
-                content=f"<@{game.current_player_id}>'s turn.",
+            game_msg = await game_channel.send(
+                content=f"{player_mention(game.current_player_id)}'s turn.",
                 embed=embed,
                 view=ongoing_game_view,
+                file=file,
+            )
+            if game.current_player_id in game.ai_players:
+                start_ai_turn(game, ongoing_game_view)
+
+    async def pause_game(
+        self,
+        guild: nextcord.Guild,
+        channel: nextcord.TextChannel | nextcord.Thread,
+        game_channel: nextcord.TextChannel | nextcord.Thread,
+        game: UnoGame,
+        embed: Embed,
+        turn_number: int,
+        game_msg: Message,
+    ) -> bool:
+        await delete_message(game_msg)
+        if game.recorder:
+            game.recorder.flush()
+        # The game is copied as it is now, a menu that is still open may change it
+        # and its events are no longer recorded
+        self.hosting.paused_games.append(
+            GameSnapshot(
+                copy.deepcopy(game),
+                guild.id,
+                channel.id,
+                game_channel.id,
+                dict(game_profiles.get(game.id, {})),
+                embed.to_dict(),
+                turn_number,
             )
+        )
+        game.recorder = None
+        await send_message(
+            game_channel,
+            "Uno is restarting, this game will resume where it left off in a moment.",
+        )
+        return True
+
+    @uno.subcommand(name="queue", description="Join or leave the matchmaking queue")
+    async def uno_queue(
+        self,
+        interaction: Interaction,
+        players: int = SlashOption(
+            description="Number of players in the game", min_value=2, max_value=10
+        ),
+    ):
+        await interaction.response.defer(ephemeral=True)
+        if self.hosting.draining:
+            await interaction.send(content=restarting_message)
+            return
+        if self.matchmaking.remove(interaction.guild.id, interaction.user.id):
+            await interaction.send(content="Left the matchmaking queue.")
+            return
+        if seated(interaction.user.id):
+            await interaction.send(
+                content="You are already in a game, leave it before joining the queue."
+            )
+            return
+        waiting = self.matchmaking.add(
+            interaction.guild.id,
+            players,
+            QueueEntry(
+                interaction.id,
+                interaction.user.id,
+                interaction.user.name,
+                interaction.channel.id,
+                interaction.user.display_avatar.url,
+            ),
+        )
+        await interaction.send(
+            content=f"Joined the matchmaking queue for a {players} player game "
+            f"({waiting}/{players}). The game will start when enough players have "
+            f"joined or after {MATCHMAKING_MAX_WAIT} seconds with at least 2 players, "
+            f"you will be removed from the queue if nobody else joins by then."
+        )
 
     @uno.subcommand(name="leaderboard", description="View the leaderboard for Uno")
     async def uno_leaderboard(
@@ -814,6 +1853,11 @@ class Uno(Cog):
             description="The name of the leaderboard to view",
             choices={"Wins": "wins", "Win Rate": "winrate"},
         ),
+        period: str = SlashOption(
+            description="The period the leaderboard covers",
+            choices={"All Time": "alltime", "Weekly": "weekly", "Monthly": "monthly"},
+            default="alltime",
+        ),
         page_length: int = SlashOption(
             description="The number of players to show per page",
             default=5,
@@ -827,64 +1871,21 @@ class Uno(Cog):
     ):
         await interaction.response.defer(ephemeral=hidden)
         embed = Embed(color=random_color())
-        embed.set_thumbnail(url=self.bot.user.avatar.url)
+        embed.set_thumbnail(url=self.bot.user.display_avatar.url)
+        period_name = {"weekly": "Weekly ", "monthly": "Monthly "}.get(period, "")
         if name == "winrate":
-            embed.title = "Uno Win Rate Leaderboard"
+            embed.title = f"Uno {period_name}Win Rate Leaderboard"
             embed.set_footer(
                 text="Players with less than 20 games played are ranked separately"
             )
-            eligible_players, ineligible_players = [], []
-            for uno_player in uno_players.values():
-                if uno_player.played >= 20:
-                    eligible_players.append(uno_player)
-                elif uno_player.played > 0 and uno_player.wins > 0:
-                    ineligible_players.append(uno_player)
-            eligible_players.sort(
-                key=lambda p: (p.wins / p.played, p.played, p.wins), reverse=True
-            )
-            ineligible_players.sort(
-                key=lambda p: (p.wins / p.played, p.played, p.wins), reverse=True
-            )
-            players_sorted = eligible_players + ineligible_players
         else:
-            embed.title = "Uno Wins Leaderboard"
-            eligible_players = [
-                uno_player for uno_player in uno_players.values() if uno_player.wins > 0
-            ]
-            players_sorted = sorted(
-                eligible_players, key=lambda p: (p.wins, p.played), reverse=True
-            )
-        leaderboard = StringIO()
-        embed_pages = []
-        for ranking, player in enumerate(players_sorted):
-            stats = (
-                f"Wins: ``{player.wins} ({player.played})``\n"
-                f"Win Rate: ``{round(player.wins / player.played * 100, 2)}%``\n"
-            )
-            leaderboard.write(f"#**{ranking + 1}** <@{player.user_id}>\n{stats}\n")
-            if (ranking + 1) % page_length == 0:
-                embed_pages.append(leaderboard.getvalue())
-                leaderboard = StringIO()
-        if len(players_sorted) < page_length:
-            embed.description = leaderboard.getvalue()
+            embed.title = f"Uno {period_name}Wins Leaderboard"
+        stats = await guild_stats.get(interaction.guild.id)
+        embed_pages = LeaderboardPages(stats.board(period), name, page_length)
+        if len(embed_pages) <= 1:
+            embed.description = embed_pages[0] if embed_pages else ""
             await interaction.send(embed=embed)
             return
-        # Add the remaining page that got left out
-        if len(players_sorted) % page_length != 0:
-            remaining_players = len(players_sorted) % page_length
-            remaining_player_string = ""
-            for ranking, player in enumerate(
-                players_sorted[-remaining_players:],
-                len(players_sorted) - remaining_players,
-            ):
-                stats = (
-                    f"Wins: ``{player.wins} ({player.played})``\n"
-                    f"Win Rate: ``{round(player.wins / player.played * 100, 2)}%``\n"
-                )
-                remaining_player_string += (
-                    f"#**{ranking + 1}** <@{player.user_id}>\n{stats}\n"
-                )
-            embed_pages.append(remaining_player_string)
         embed.description = embed_pages[0]
         pagination_view = PaginationView(embed=embed, pages=embed_pages, timeout=20)
         await interaction.send(embed=embed, view=pagination_view)
@@ -905,12 +1906,13 @@ class Uno(Cog):
     ):
         await interaction.response.defer(ephemeral=hidden)
         user = user if user else interaction.user
-        if user.id not in uno_players:
+        player = await asyncio.to_thread(get_uno_player, user.id)
+        if player is None:
             await interaction.send(
                 f"{user.mention} hasn't played Uno yet.", ephemeral=True
             )
             return
-        player = uno_players[user.id]
+        server_stats = await guild_stats.get(interaction.guild.id)
         stats = (
             f"```"
             f"Wins: {player.wins}\n"
@@ -918,21 +1920,81 @@ class Uno(Cog):
             f"Win Rate: {round(player.wins / player.played * 100, 2)}%\n"
             f"Cards Played: {player.played_cards}\n"
             f"Cards Drawn: {player.drawn_cards}\n"
-            f"Times Skipped: {player.turns_skipped}"
+            f"Times Skipped: {player.turns_skipped}\n"
+            f"Server Rank (Wins / Win Rate): "
+            f"{player_ranks(server_stats.leaderboard, player.user_id)}"
             f"```"
         )
         embed = Embed(description=stats, color=random_color())
-        embed.set_thumbnail(url=self.bot.user.avatar.url)
-        embed.set_author(name=user.name, icon_url=user.avatar.url)
+        embed.set_thumbnail(url=self.bot.user.display_avatar.url)
+        embed.set_author(name=user.name, icon_url=user.display_avatar.url)
+        await interaction.send(embed=embed)
+
+    @uno.subcommand(name="insights", description="View insights from recorded games")
+    async def uno_insights(
+        self,
+        interaction: Interaction,
+        user: nextcord.Member = SlashOption(
+            description="User to show head to head records for", default=None
+        ),
+        hidden: bool = SlashOption(
+            description="Whether to hide the insights from other players", default=True
+        ),
+    ):
+        await interaction.response.defer(ephemeral=hidden)
+        insights = await asyncio.to_thread(load_insights, INSIGHTS_PATH)
+        if insights is None or not insights["games"]:
+            await interaction.send("No insights have been computed yet.")
+            return
+        user = user if user else interaction.user
+        embed = Embed(
+            title="Uno Insights",
+            description=f"Based on {insights['games']} recorded games",
+            color=random_color(),
+        )
+        embed.set_thumbnail(url=self.bot.user.display_avatar.url)
+        embed.add_field(
+            name="Most Played Cards",
+            value="\n".join(
+                f"{color.value} {value.value} ``{round(rate * 100, 2)}%``"
+                for color, value, rate in card_play_rates(insights)
+            ),
+        )
+        embed.add_field(
+            name="Average Game Length",
+            value="\n".join(
+                f"{player_count} players: ``{round(turns, 1)} turns``"
+                for player_count, turns in average_game_lengths(insights).items()
+            ),
+        )
+        embed.add_field(
+            name="Win Rate by Penalty Cards Received",
+            value="\n".join(
+                f"{low}+ cards: ``{round(rate * 100, 2)}%`` ({seats})"
+                for low, rate, seats in penalty_win_rates(insights)
+            ),
+            inline=False,
+        )
+        records = head_to_head(insights, user.id)
+        embed.add_field(
+            name=f"{user.name}'s Head to Head",
+            value="\n".join(
+                f"{player_mention(opponent_id)} ``{wins} - {losses}``"
+                for opponent_id, wins, losses in records
+            )
+            or "No recorded games.",
+            inline=False,
+        )
         await interaction.send(embed=embed)
 
     @user_command(name="Uno Stats", guild_ids=SERVER_IDS)
     async def user_uno_stats(self, interaction: Interaction, user: nextcord.Member):
         await interaction.response.defer(ephemeral=True)
-        if user.id not in uno_players:
+        player = await asyncio.to_thread(get_uno_player, user.id)
+        if player is None:
             await interaction.send(f"{user.mention} hasn't played Uno yet.")
             return
-        player = uno_players[user.id]
+        server_stats = await guild_stats.get(interaction.guild.id)
         stats = (
             f"```"
             f"Wins: {player.wins}\n"
@@ -940,14 +2002,60 @@ class Uno(Cog):
             f"Win Rate: {round(player.wins / player.played * 100, 2)}%\n"
             f"Cards Played: {player.played_cards}\n"
             f"Cards Drawn: {player.drawn_cards}\n"
-            f"Times Skipped: {player.turns_skipped}"
+            f"Times Skipped: {player.turns_skipped}\n"
+            f"Server Rank (Wins / Win Rate): "
+            f"{player_ranks(server_stats.leaderboard, player.user_id)}"
             f"```"
         )
         embed = Embed(description=stats, color=random_color())
-        embed.set_thumbnail(url=self.bot.user.avatar.url)
-        embed.set_author(name=user.name, icon_url=user.avatar.url)
+        embed.set_thumbnail(url=self.bot.user.display_avatar.url)
+        embed.set_author(name=user.name, icon_url=user.display_avatar.url)
+        await interaction.send(embed=embed)
+
+    @slash_command(
+        name="unoadmin",
+        guild_ids=SERVER_IDS,
+        default_member_permissions=nextcord.Permissions(manage_guild=True),
+    )
+    async def uno_admin(self, interaction):
+        pass
+
+    @uno_admin.subcommand(name="metrics", description="View Uno load metrics")
+    async def uno_admin_metrics(self, interaction: Interaction):
+        await interaction.response.defer(ephemeral=True)
+        lines = "\n".join(
+            f"{name}: {value}" for name, value in metrics.snapshot().items()
+        )
+        embed = Embed(
+            title="Uno Metrics",
+            description=f"```{lines or 'No metrics recorded yet.'}```",
+            color=random_color(),
+        )
         await interaction.send(embed=embed)
 
+    @uno_admin.subcommand(
+        name="reload", description="Reload the Uno code without interrupting games"
+    )
+    async def uno_admin_reload(self, interaction: Interaction):
+        await interaction.response.defer(ephemeral=True)
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.send(content="Only the owner of the bot can reload it.")
+            return
+        try:
+            elapsed = self.reload()
+        except Exception as e:
+            logger.exception("Could not reload the Uno extension")
+            await interaction.send(
+                content=f"The reload failed, the previous code is still running: {e}"
+            )
+            return
+        # The other workers reload their copy of the extension too
+        publish("reload", None)
+        await interaction.send(
+            content=f"Reloaded in {elapsed} ms, {len(ongoing_games)} games and lobbies "
+            f"kept running."
+        )
+
 
 def setup(bot):
     bot.add_cog(Uno(bot))
@@ -0,0 +1,149 @@
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.helpers import metrics
+
+
+@dataclass
+class AdmissionWaiter:
+    guild_id: int
+    admitted: asyncio.Future = field(
+        default_factory=lambda: asyncio.get_running_loop().create_future()
+    )
+
+
+class AdmissionController:
+    """Caps the number of open lobbies and active games globally and per guild.
+
+    Every admitted lobby reserves a game slot, so a lobby that fills up can always
+    start. Requests beyond the caps wait in a FIFO queue and are admitted in order
+    as soon as a slot their guild may use frees up.
+    """
+
+    def __init__(
+        self,
+        max_games: int,
+        max_guild_games: int,
+        max_lobbies: int,
+        max_guild_lobbies: int,
+        max_queue_length: int,
+    ):
+        self.max_games = max_games
+        self.max_guild_games = max_guild_games
+        self.max_lobbies = max_lobbies
+        self.max_guild_lobbies = max_guild_lobbies
+        self.max_queue_length = max_queue_length
+        self.lobbies: Counter[int] = Counter()
+        self.games: Counter[int] = Counter()
+        self.lobby_count = 0
+        self.game_count = 0
+        self.queue: deque[AdmissionWaiter] = deque()
+
+    def has_capacity(self, guild_id: int) -> bool:
+        return (
+            self.lobby_count < self.max_lobbies
+            and self.lobbies[guild_id] < self.max_guild_lobbies
+            and self.lobby_count + self.game_count < self.max_games
+            and self.lobbies[guild_id] + self.games[guild_id] < self.max_guild_games
+        )
+
+    def position(self, waiter: AdmissionWaiter) -> int:
+        return self.queue.index(waiter) + 1
+
+    def try_open_lobby(self, guild_id: int) -> bool:
+        """Reserves a lobby slot for the guild without waiting in the queue."""
+        if not self.has_capacity(guild_id):
+            return False
+        self._reserve(guild_id)
+        metrics.increment("admission.admitted")
+        return True
+
+    async def open_lobby(
+        self,
+        guild_id: int,
+        on_position_change: Callable[[int], Awaitable[None]],
+        max_wait: float,
+        poll_interval: float = 30,
+    ) -> bool:
+        """Reserves a lobby slot for the guild, waiting in the queue if needed.
+        Returns False if the queue is full or the wait took longer than max_wait.
+        A slot reserved for the guild is given back if the caller does not get it,
+        when on_position_change raised or the wait was cancelled.
+        """
+        if self.try_open_lobby(guild_id):
+            return True
+        if len(self.queue) >= self.max_queue_length:
+            metrics.increment("admission.rejected")
+            return False
+        waiter = AdmissionWaiter(guild_id)
+        self.queue.append(waiter)
+        metrics.increment("admission.queued")
+        deadline = time.monotonic() + max_wait
+        last_position = None
+        opened = False
+        try:
+            while True:
+                position = self.position(waiter)
+                if position != last_position:
+                    last_position = position
+                    await on_position_change(position)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.increment("admission.rejected")
+                    return False
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(waiter.admitted), min(remaining, poll_interval)
+                    )
+                    metrics.increment("admission.admitted")
+                    opened = True
+                    return True
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if not waiter.admitted.done():
+                self.queue.remove(waiter)
+                waiter.admitted.cancel()
+            elif not opened:
+                self.close_lobby(guild_id)
+
+    def start_game(self, guild_id: int) -> None:
+        """Converts the guild's reserved lobby slot into an active game."""
+        self.lobbies[guild_id] -= 1
+        self.lobby_count -= 1
+        if not self.lobbies[guild_id]:
+            del self.lobbies[guild_id]
+        self.games[guild_id] += 1
+        self.game_count += 1
+        self._admit_waiters()
+
+    def close_lobby(self, guild_id: int) -> None:
+        self.lobbies[guild_id] -= 1
+        self.lobby_count -= 1
+        if not self.lobbies[guild_id]:
+            del self.lobbies[guild_id]
+        self._admit_waiters()
+
+    def close_game(self, guild_id: int) -> None:
+        self.games[guild_id] -= 1
+        self.game_count -= 1
+        if not self.games[guild_id]:
+            del self.games[guild_id]
+        self._admit_waiters()
+
+    def _reserve(self, guild_id: int) -> None:
+        self.lobbies[guild_id] += 1
+        self.lobby_count += 1
+
+    def _admit_waiters(self) -> None:
+        # Waiters of guilds that are at their own cap do not block other guilds
+        for waiter in list(self.queue):
+            if self.lobby_count >= self.max_lobbies:
+                return
+            if self.has_capacity(waiter.guild_id):
+                self.queue.remove(waiter)
+                self._reserve(waiter.guild_id)
+                waiter.admitted.set_result(True)
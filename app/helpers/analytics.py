@@ -0,0 +1,299 @@
+import argparse
+import logging
+import os
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from app.helpers.game_log import replay_events, encode_card, color_index, value_index
+from app.helpers.uno_logic import Color, Value, Event
+
+logger = logging.getLogger(__name__)
+
+MAX_SEATS = 10
+MAX_PENALTY = 40
+CARD_CODES = 16 * len(Color)
+PENALTY_EVENTS = (Event.TIMEOUT, Event.DRAW_MANY, Event.PENALTY)
+
+
+class EventChunk:
+    """Columnar buffer of decoded events for a bounded number of whole games."""
+
+    def __init__(self, capacity: int, max_games: int):
+        self.capacity = capacity
+        self.max_games = max_games
+        self.game = np.zeros(capacity, np.int32)
+        self.event = np.zeros(capacity, np.int8)
+        self.seat = np.zeros(capacity, np.int8)
+        self.card = np.zeros(capacity, np.int16)
+        self.target = np.zeros(capacity, np.int8)
+        self.amount = np.zeros(capacity, np.int16)
+        self.player_ids = np.zeros((max_games, MAX_SEATS), np.int64)
+        self.player_count = np.zeros(max_games, np.int8)
+        self.winner = np.zeros(max_games, np.int8)
+        self.size = 0
+        self.games = 0
+
+    def fits(self, rows: int) -> bool:
+        return self.size + rows <= self.capacity and self.games < self.max_games
+
+    def add_game(self, player_ids: list[int], winner_seat: int, rows: list[tuple]):
+        if len(rows) > self.capacity:
+            raise ValueError(f"A game has more than {self.capacity} events")
+        end = self.size + len(rows)
+        columns = np.array(rows, np.int32).reshape(-1, 5)
+        self.game[self.size : end] = self.games
+        self.event[self.size : end] = columns[:, 0]
+        self.seat[self.size : end] = columns[:, 1]
+        self.card[self.size : end] = columns[:, 2]
+        self.target[self.size : end] = columns[:, 3]
+        self.amount[self.size : end] = columns[:, 4]
+        self.player_ids[self.games, : len(player_ids)] = player_ids
+        self.player_count[self.games] = len(player_ids)
+        self.winner[self.games] = winner_seat
+        self.size = end
+        self.games += 1
+
+    def clear(self):
+        self.size = 0
+        self.games = 0
+
+
+def decode_game(data: bytes) -> tuple[list[int], int, list[tuple]]:
+    """Replays a game log into rows of (event, seat, card, target seat, amount)."""
+    rows = []
+    seats, player_ids, winner_seat = {}, [], -1
+    for game, event, args, result in replay_events(data):
+        if event == Event.START:
+            player_ids = list(game.players)
+            seats = {player_id: seat for seat, player_id in enumerate(player_ids)}
+        elif event == Event.PLAY:
+            player_id, card, color, _ = args
+            # Wild cards are recolored when played, count them as the card in the deck
+            code = (
+                color_index[Color.BLACK] << 4 | value_index[card.value]
+                if color
+                else encode_card(card)
+            )
+            penalty = {Value.DRAW_TWO: 2, Value.DRAW_FOUR: 4}.get(card.value, 0)
+            target = seats[result] if penalty and result else -1
+            rows.append((event, seats[player_id], code, target, penalty))
+        elif event in (Event.TIMEOUT, Event.PENALTY):
+            rows.append((event, seats[args[0]], -1, -1, result))
+        elif event == Event.DRAW_MANY:
+            rows.append((event, seats[args[0]], -1, -1, args[1]))
+        elif event == Event.END:
+            winner_seat = seats[args[0]] if args[0] else -1
+            rows.append((event, winner_seat, -1, -1, 0))
+        elif event in (Event.DRAW, Event.ADVANCE, Event.REMOVE):
+            seat = seats[args[0]] if args else -1
+            rows.append((event, seat, -1, -1, int(event == Event.DRAW)))
+    return player_ids, winner_seat, rows
+
+
+class InsightsAccumulator:
+    """Running aggregates, every chunk is reduced with vectorized operations."""
+
+    def __init__(self):
+        self.games = 0
+        self.card_plays = np.zeros(CARD_CODES, np.int64)
+        self.length_sum = np.zeros(MAX_SEATS + 1, np.int64)
+        self.length_games = np.zeros(MAX_SEATS + 1, np.int64)
+        self.penalty_seats = np.zeros(MAX_PENALTY + 1, np.int64)
+        self.penalty_wins = np.zeros(MAX_PENALTY + 1, np.int64)
+        self.h2h_pairs = np.zeros((0, 2), np.int64)
+        self.h2h_wins = np.zeros(0, np.int64)
+
+    def add_chunk(self, chunk: EventChunk):
+        n, games = chunk.size, chunk.games
+        if not games:
+            return
+        game, event = chunk.game[:n], chunk.event[:n]
+        seat, target = chunk.seat[:n].astype(np.int64), chunk.target[:n].astype(
+            np.int64
+        )
+        amount = chunk.amount[:n]
+        player_count = chunk.player_count[:games].astype(np.int64)
+        winner = chunk.winner[:games].astype(np.int64)
+        finished = winner >= 0
+        self.games += int(finished.sum())
+
+        plays = event == Event.PLAY
+        self.card_plays += np.bincount(chunk.card[:n][plays], minlength=CARD_CODES)
+
+        turns = np.bincount(game[event == Event.ADVANCE], minlength=games)
+        self.length_sum += np.bincount(
+            player_count[finished], weights=turns[finished], minlength=MAX_SEATS + 1
+        ).astype(np.int64)
+        self.length_games += np.bincount(
+            player_count[finished], minlength=MAX_SEATS + 1
+        )
+
+        # Penalty cards received per seat: +2/+4 count for their target, timeouts,
+        # stacked draw cards and forgetting to say uno for the player themselves
+        penalized = (plays & (target >= 0)) | np.isin(event, PENALTY_EVENTS)
+        penalized_seat = np.where(plays, target, seat)
+        received = np.bincount(
+            game[penalized] * MAX_SEATS + penalized_seat[penalized],
+            weights=amount[penalized],
+            minlength=games * MAX_SEATS,
+        ).reshape(games, MAX_SEATS)
+        seat_index = np.arange(MAX_SEATS)
+        seated = (seat_index < player_count[:, None]) & finished[:, None]
+        won = seat_index == winner[:, None]
+        buckets = np.minimum(received, MAX_PENALTY).astype(np.int64)
+        self.penalty_seats += np.bincount(buckets[seated], minlength=MAX_PENALTY + 1)
+        self.penalty_wins += np.bincount(
+            buckets[seated & won], minlength=MAX_PENALTY + 1
+        )
+
+        player_ids = chunk.player_ids[:games]
+        lost = seated & ~won
+        winner_ids = np.broadcast_to(
+            player_ids[np.arange(games), np.maximum(winner, 0)][:, None], lost.shape
+        )
+        pairs = np.stack([winner_ids[lost], player_ids[lost]], axis=1)
+        self.merge_head_to_head(pairs, np.ones(len(pairs), np.int64))
+
+    def merge_head_to_head(self, pairs: np.ndarray, wins: np.ndarray):
+        all_pairs = np.concatenate([self.h2h_pairs, pairs])
+        all_wins = np.concatenate([self.h2h_wins, wins])
+        if not len(all_pairs):
+            return
+        self.h2h_pairs, inverse = np.unique(all_pairs, axis=0, return_inverse=True)
+        self.h2h_wins = np.bincount(inverse.ravel(), weights=all_wins).astype(np.int64)
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            games=np.int64(self.games),
+            card_plays=self.card_plays,
+            length_sum=self.length_sum,
+            length_games=self.length_games,
+            penalty_seats=self.penalty_seats,
+            penalty_wins=self.penalty_wins,
+            h2h_pairs=self.h2h_pairs,
+            h2h_wins=self.h2h_wins,
+        )
+
+
+def iter_game_logs(paths: Iterable[str]) -> Iterator[bytes]:
+    for path in paths:
+        if os.path.isdir(path):
+            with os.scandir(path) as entries:
+                files = sorted(e.path for e in entries if e.name.endswith(".unolog"))
+            yield from iter_game_logs(files)
+            continue
+        with open(path, "rb") as file:
+            yield file.read()
+
+
+def build_insights(
+    paths: Iterable[str], chunk_events: int = 1_000_000, chunk_games: int = 50_000
+) -> InsightsAccumulator:
+    accumulator = InsightsAccumulator()
+    chunk = EventChunk(chunk_events, chunk_games)
+    for data in iter_game_logs(paths):
+        try:
+            player_ids, winner_seat, rows = decode_game(data)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable game log: {e}")
+            continue
+        if not chunk.fits(len(rows)):
+            accumulator.add_chunk(chunk)
+            chunk.clear()
+        chunk.add_game(player_ids, winner_seat, rows)
+    accumulator.add_chunk(chunk)
+    return accumulator
+
+
+insights_cache: dict[str, tuple[float, dict[str, np.ndarray]]] = {}
+
+
+def load_insights(path: str) -> dict[str, np.ndarray] | None:
+    """Loads computed insights, reusing them until the file changes."""
+    try:
+        modified = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = insights_cache.get(path)
+    if cached and cached[0] == modified:
+        return cached[1]
+    with np.load(path) as data:
+        insights = {key: data[key] for key in data.files}
+    insights_cache[path] = (modified, insights)
+    return insights
+
+
+def card_play_rates(insights: dict, top: int = 5) -> list[tuple[Color, Value, float]]:
+    plays = insights["card_plays"]
+    total = plays.sum()
+    if not total:
+        return []
+    colors, values = list(Color), list(Value)
+    codes = np.argsort(plays)[::-1][:top]
+    return [
+        (colors[code >> 4], values[code & 0xF], float(plays[code] / total))
+        for code in codes
+        if plays[code]
+    ]
+
+
+def average_game_lengths(insights: dict) -> dict[int, float]:
+    games = insights["length_games"]
+    return {
+        int(count): float(insights["length_sum"][count] / games[count])
+        for count in np.flatnonzero(games)
+    }
+
+
+def penalty_win_rates(
+    insights: dict, bucket_size: int = 5
+) -> list[tuple[int, float, int]]:
+    """Win rate of players by penalty cards received, in buckets of bucket_size."""
+    bins = np.arange(MAX_PENALTY + 1) // bucket_size
+    seats = np.bincount(bins, weights=insights["penalty_seats"])
+    wins = np.bincount(bins, weights=insights["penalty_wins"])
+    return [
+        (
+            int(bucket * bucket_size),
+            float(wins[bucket] / seats[bucket]),
+            int(seats[bucket]),
+        )
+        for bucket in np.flatnonzero(seats)
+    ]
+
+
+def head_to_head(
+    insights: dict, user_id: int, top: int = 5
+) -> list[tuple[int, int, int]]:
+    """A player's most frequent opponents as (opponent id, wins, losses)."""
+    pairs, wins = insights["h2h_pairs"], insights["h2h_wins"]
+    won, lost = pairs[:, 0] == user_id, pairs[:, 1] == user_id
+    opponents = np.concatenate([pairs[won, 1], pairs[lost, 0]])
+    if not len(opponents):
+        return []
+    opponent_ids, inverse = np.unique(opponents, return_inverse=True)
+    wins_against = np.bincount(
+        inverse[: won.sum()], weights=wins[won], minlength=len(opponent_ids)
+    )
+    losses_against = np.bincount(
+        inverse[won.sum() :], weights=wins[lost], minlength=len(opponent_ids)
+    )
+    order = np.argsort(wins_against + losses_against)[::-1][:top]
+    return [
+        (int(opponent_ids[i]), int(wins_against[i]), int(losses_against[i]))
+        for i in order
+    ]
+
+
+if __name__ == "__main__":
+    # python -m app.helpers.analytics game_logs -o insights.npz
+    parser = argparse.ArgumentParser(description="Compute Uno insights from game logs")
+    parser.add_argument("paths", nargs="+", help="Game log files or directories")
+    parser.add_argument("-o", "--output", default="insights.npz")
+    parser.add_argument("--chunk-events", type=int, default=1_000_000)
+    arguments = parser.parse_args()
+    result = build_insights(arguments.paths, chunk_events=arguments.chunk_events)
+    result.save(arguments.output)
+    print(f"Wrote insights for {result.games} games to {arguments.output}")
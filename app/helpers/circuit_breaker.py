@@ -0,0 +1,54 @@
+import time
+
+from app.helpers import metrics
+
+
+class CircuitBreaker:
+    """Stops calling a backend that keeps failing.
+
+    After failure_threshold failures in a row the circuit opens and calls are
+    refused for reset_timeout seconds. Then a single trial call is let through,
+    which closes the circuit if it succeeds and opens it again otherwise.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.trial else "open"
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.trial or self.retry_in() > 0:
+            return False
+        self.trial = True
+        return True
+
+    def retry_in(self) -> float:
+        """Seconds until a trial call is let through, 0 when the circuit is closed."""
+        if self.opened_at is None:
+            return 0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial or (
+            self.opened_at is None and self.failures >= self.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+            self.trial = False
+            metrics.increment(f"{self.name}.circuit_opened")
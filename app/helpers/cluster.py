@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from multiprocessing.queues import Queue
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class ClusterLink:
+    """Message link between a worker process and the supervisor.
+
+    Workers publish ``(kind, payload)`` messages to the shared outbox, the
+    supervisor relays them to the inbox of every other worker where they are
+    dispatched to the handlers subscribed for that kind on the worker's loop.
+    """
+
+    def __init__(
+        self,
+        worker_id: int,
+        worker_count: int,
+        inbox: Queue,
+        outbox: Queue,
+        shard_count: int = None,
+    ):
+        self.worker_id = worker_id
+        self.worker_count = worker_count
+        self.shard_count = shard_count or worker_count
+        self.inbox = inbox
+        self.outbox = outbox
+        self.handlers: dict[str, list[Callable[[Any], None]]] = defaultdict(list)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.reader: threading.Thread | None = None
+
+    def subscribe(self, kind: str, handler: Callable[[Any], None]) -> None:
+        self.handlers[kind].append(handler)
+
+    def unsubscribe(self, kind: str, handler: Callable[[Any], None]) -> None:
+        if handler in self.handlers[kind]:
+            self.handlers[kind].remove(handler)
+
+    def publish(self, kind: str, payload: Any) -> None:
+        self.outbox.put((self.worker_id, kind, payload))
+
+    def owns(self, key: int) -> bool:
+        """Whether this worker is the single writer for the given key."""
+        return key % self.worker_count == self.worker_id
+
+    def owns_guild(self, guild_id: int) -> bool:
+        """Whether the guild's shard is run by this worker."""
+        shard = (guild_id >> 22) % self.shard_count
+        return shard % self.worker_count == self.worker_id
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.reader = threading.Thread(
+            target=self._read_inbox, name=f"cluster-inbox-{self.worker_id}", daemon=True
+        )
+        self.reader.start()
+
+    def _read_inbox(self) -> None:
+        while True:
+            message = self.inbox.get()
+            if message is None:
+                return
+            kind, payload = message
+            for handler in self.handlers.get(kind, ()):
+                self.loop.call_soon_threadsafe(handler, payload)
+
+
+cluster_link: ClusterLink | None = None
+
+
+def current_worker_id() -> int:
+    return cluster_link.worker_id if cluster_link is not None else 0
+
+
+def owns_key(key: int) -> bool:
+    """Whether this process persists the given key, always True outside of cluster mode."""
+    return cluster_link is None or cluster_link.owns(key)
+
+
+def owns_guild(guild_id: int) -> bool:
+    """Whether this process runs the guild's shard and so persists its stats,
+    always True outside of cluster mode."""
+    return cluster_link is None or cluster_link.owns_guild(guild_id)
+
+
+def publish(kind: str, payload: Any) -> None:
+    if cluster_link is not None:
+        cluster_link.publish(kind, payload)
+
+
+def subscribe(kind: str, handler: Callable[[Any], None]) -> None:
+    if cluster_link is not None:
+        cluster_link.subscribe(kind, handler)
+
+
+def unsubscribe(kind: str, handler: Callable[[Any], None]) -> None:
+    if cluster_link is not None:
+        cluster_link.unsubscribe(kind, handler)
+
+
+def relay_messages(outbox: Queue, inboxes: dict[int, Queue]) -> None:
+    """Supervisor side: forwards every published message to all other workers."""
+    while True:
+        message = outbox.get()
+        if message is None:
+            return
+        sender_id, kind, payload = message
+        for worker_id, inbox in inboxes.items():
+            if worker_id != sender_id:
+                inbox.put((kind, payload))
+
+
+def shards_for_worker(worker_id: int, worker_count: int, shard_count: int) -> list[int]:
+    return [shard for shard in range(shard_count) if shard % worker_count == worker_id]
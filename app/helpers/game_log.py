@@ -0,0 +1,234 @@
+import logging
+import os
+import struct
+import sys
+import time
+from typing import Iterator
+
+from app.helpers.uno_logic import (
+    UnoGame,
+    UnoPlayer,
+    Card,
+    Color,
+    Value,
+    Event,
+    VARIANTS,
+)
+
+logger = logging.getLogger(__name__)
+
+# A log starts with a header holding everything needed to recreate the game,
+# followed by one record per event: an event byte and a fixed size payload.
+# Players are referred to by their seat, the index in the header's player list.
+# Logs of the first version have no variant and were played with the standard rules.
+MAGIC = b"UNO\x02"
+MAGIC_V1 = b"UNO\x01"
+HEADER = struct.Struct("<4sQQQBBB")
+HEADER_V1 = struct.Struct("<4sQQQBB")
+PLAYER = struct.Struct("<Q")
+PAYLOADS = {
+    Event.PLAY: struct.Struct("<BBBB"),
+    Event.DRAW: struct.Struct("<B"),
+    Event.DRAW_MANY: struct.Struct("<BB"),
+    Event.TIMEOUT: struct.Struct("<B"),
+    Event.ADVANCE: struct.Struct("<"),
+    Event.REMOVE: struct.Struct("<B"),
+    Event.END: struct.Struct("<B"),
+    Event.JUMP_IN: struct.Struct("<B"),
+    Event.PENALTY: struct.Struct("<B"),
+}
+NONE = 0xFF
+colors = list(Color)
+values = list(Value)
+variants = list(VARIANTS)
+color_index = {color: index for index, color in enumerate(colors)}
+value_index = {value: index for index, value in enumerate(values)}
+
+
+def encode_card(card: Card) -> int:
+    return color_index[card.color] << 4 | value_index[card.value]
+
+
+def decode_card(code: int) -> Card:
+    return Card(values[code & 0xF], colors[code >> 4])
+
+
+class GameRecorder:
+    """Appends the events of a game to its log file, buffering them for a turn."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.buffer = bytearray()
+        self.seats: dict[int, int] = {}
+
+    def record(self, event: Event, *args) -> None:
+        if event == Event.START:
+            game: UnoGame = args[0]
+            self.seats = {
+                player_id: seat for seat, player_id in enumerate(game.players)
+            }
+            self.buffer += HEADER.pack(
+                MAGIC,
+                game.id,
+                game.host_id,
+                game.seed,
+                game.initial_card_count,
+                len(self.seats),
+                variants.index(game.variant),
+            )
+            for player_id in game.players:
+                self.buffer += PLAYER.pack(player_id)
+            return
+        self.buffer.append(event)
+        if event == Event.PLAY:
+            player_id, card, color, swapped_player_id = args
+            self.buffer += PAYLOADS[event].pack(
+                self.seats[player_id],
+                encode_card(card),
+                color_index[color] if color else NONE,
+                self.seats[swapped_player_id] if swapped_player_id else NONE,
+            )
+        elif event == Event.DRAW_MANY:
+            self.buffer += PAYLOADS[event].pack(self.seats[args[0]], args[1])
+        elif event == Event.END:
+            self.buffer.append(self.seats[args[0]] if args[0] else NONE)
+        elif event != Event.ADVANCE:
+            self.buffer.append(self.seats[args[0]])
+        if event in (Event.ADVANCE, Event.END):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        try:
+            with open(self.path, "ab") as file:
+                file.write(self.buffer)
+        except OSError as e:
+            logger.error(f"Could not write game log {self.path}: {e}")
+        self.buffer.clear()
+
+
+def open_game_recorder(log_dir: str, game_id: int) -> GameRecorder | None:
+    if not log_dir:
+        return None
+    os.makedirs(log_dir, exist_ok=True)
+    return GameRecorder(os.path.join(log_dir, f"{game_id}.unolog"))
+
+
+def read_game_log(data: bytes) -> tuple[dict, Iterator[tuple[Event, tuple]]]:
+    """Parses a game log into its header and an iterator over its events, where
+    players are given by their ids and cards as Card objects."""
+    if data[:4] == MAGIC_V1:
+        _, game_id, host_id, seed, card_count, player_count = HEADER_V1.unpack_from(
+            data
+        )
+        variant, offset = 0, HEADER_V1.size
+    elif data[:4] == MAGIC:
+        _, game_id, host_id, seed, card_count, player_count, variant = (
+            HEADER.unpack_from(data)
+        )
+        offset = HEADER.size
+    else:
+        raise ValueError("Not an uno game log")
+    player_ids = []
+    for _ in range(player_count):
+        player_ids.append(PLAYER.unpack_from(data, offset)[0])
+        offset += PLAYER.size
+    header = {
+        "game_id": game_id,
+        "host_id": host_id,
+        "seed": seed,
+        "initial_card_count": card_count,
+        "player_ids": player_ids,
+        "variant": variants[variant],
+    }
+
+    def player(seat: int) -> int | None:
+        return None if seat == NONE else player_ids[seat]
+
+    def events(offset: int = offset):
+        while offset < len(data):
+            event = Event(data[offset])
+            payload = PAYLOADS[event]
+            fields = payload.unpack_from(data, offset + 1)
+            offset += 1 + payload.size
+            if event == Event.PLAY:
+                seat, card, color, swapped_seat = fields
+                yield event, (
+                    player(seat),
+                    decode_card(card),
+                    None if color == NONE else colors[color],
+                    player(swapped_seat),
+                )
+            elif event == Event.DRAW_MANY:
+                yield event, (player(fields[0]), fields[1])
+            elif event == Event.ADVANCE:
+                yield event, ()
+            else:
+                yield event, (player(fields[0]),)
+
+    return header, events()
+
+
+def replay_events(data: bytes) -> Iterator[tuple[UnoGame, Event, tuple, object]]:
+    """Rebuilds a game from its log, yielding the game after every event together
+    with the event, its arguments and the value returned by the engine."""
+    header, events = read_game_log(data)
+    game = UnoGame(
+        header["game_id"],
+        header["host_id"],
+        initial_card_count=header["initial_card_count"],
+        seed=header["seed"],
+        variant=header["variant"],
+    )
+    for player_id in header["player_ids"]:
+        game.players[player_id] = UnoPlayer(player_id, str(player_id))
+    game.start_game()
+    yield game, Event.START, (), None
+    for event, args in events:
+        result = None
+        if event == Event.PLAY:
+            player_id, card, color, swapped_player_id = args
+            result = game.play_card(
+                game.players[player_id], card, swapped_player_id, color
+            )
+        elif event == Event.DRAW:
+            result = game.draw_card(game.players[args[0]])
+        elif event == Event.DRAW_MANY:
+            result = game.draw_cards(game.players[args[0]], args[1])
+        elif event == Event.TIMEOUT:
+            result = game.timeout_penalty(game.players[args[0]])
+        elif event == Event.ADVANCE:
+            game.advance_turn()
+        elif event == Event.REMOVE:
+            game.remove_player(args[0])
+        elif event == Event.JUMP_IN:
+            result = game.jump_in(game.players[args[0]])
+        elif event == Event.PENALTY:
+            result = game.take_penalty(game.players[args[0]])
+        yield game, event, args, result
+
+
+def replay(data: bytes, until: int = None) -> UnoGame:
+    """Rebuilds a game from its log, optionally stopping after the given number of events."""
+    game = None
+    for count, (game, *_) in enumerate(replay_events(data)):
+        if until is not None and count >= until:
+            break
+    return game
+
+
+if __name__ == "__main__":
+    # python -m app.helpers.game_log game_logs/*.unolog
+    total_events, start = 0, time.perf_counter()
+    for path in sys.argv[1:]:
+        with open(path, "rb") as file:
+            data = file.read()
+        game = replay(data)
+        total_events += sum(1 for _ in read_game_log(data)[1])
+        print(
+            f"{path}: {len(game.players)} players left, top card {game.get_top_card()}, "
+            f"hands {[len(player.hand) for player in game.players.values()]}"
+        )
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {total_events} events in {elapsed:.3f}s")
@@ -0,0 +1,68 @@
+import functools
+import logging
+from typing import Awaitable, Callable
+
+import nextcord
+from nextcord import utils
+
+from app.helpers import metrics
+
+logger = logging.getLogger(__name__)
+
+# Discord fails an interaction that is not acknowledged within 3 seconds of its
+# creation, acknowledgements with less headroom than this are logged
+ACK_DEADLINE = 3.0
+LOW_HEADROOM = 1.0
+
+Handler = Callable[..., Awaitable[None]]
+
+
+def acknowledged(handler: Handler = None, *, thinking: bool = False):
+    """Acknowledges a component interaction before running the handler, so the
+    game logic and REST calls of the handler no longer count against Discord's
+    deadline. The interaction is the last argument of the handler.
+
+    By default the interaction is deferred without a visible response, and the
+    handler's messages are sent as ephemeral followups. With thinking, the deferred
+    response is an ephemeral message that the handler's first message replaces,
+    for handlers that edit or delete their original message.
+
+    The headroom left when the acknowledgement went through is recorded in
+    milliseconds. The time of the interaction comes from its snowflake, so it also
+    carries the clock offset between Discord and the host. When the deadline has
+    passed, the miss is counted for the handler and the handler is not run, as the
+    user has already been told that the interaction failed. Neither is it run when
+    its view stopped while the interaction was being acknowledged, like nextcord
+    does not dispatch interactions to stopped views.
+    """
+    if handler is None:
+        return functools.partial(acknowledged, thinking=thinking)
+    name = handler.__qualname__
+
+    @functools.wraps(handler)
+    async def wrapper(*args) -> None:
+        owner, interaction = args[0], args[-1]
+        view = owner if isinstance(owner, nextcord.ui.View) else owner.view
+        if not interaction.response.is_done():
+            try:
+                await interaction.response.defer(ephemeral=True, with_message=thinking)
+            except nextcord.NotFound:
+                metrics.increment(f"interactions.deadline_misses.{name}")
+                logger.warning("%s missed the acknowledgement deadline", name)
+                return
+            age = (utils.utcnow() - interaction.created_at).total_seconds()
+            headroom = ACK_DEADLINE - age
+            metrics.observe("interactions.headroom_ms", round(headroom * 1000))
+            if headroom < LOW_HEADROOM:
+                logger.warning(
+                    "%s was acknowledged %.0f ms before the deadline",
+                    name,
+                    headroom * 1000,
+                )
+            if view.is_finished():
+                if thinking:
+                    await interaction.delete_original_message()
+                return
+        await handler(*args)
+
+    return wrapper
@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueEntry:
+    entry_id: int
+    user_id: int
+    username: str
+    channel_id: int
+    avatar_url: str | None = None
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class MatchmakingPool:
+    """Groups queued players of a guild into games of the size they asked for.
+
+    Players wait in one FIFO bucket per (guild, size). A bucket is matched as soon as
+    it is full, or with whoever is waiting once its oldest player has waited longer
+    than max_wait. A player still alone in their bucket by then is removed from the
+    queue and passed to on_expire. A single background task sleeps until the next
+    enqueue or deadline, so the cost of matching does not depend on how many players
+    are waiting.
+    """
+
+    def __init__(
+        self,
+        max_wait: float,
+        on_match: Callable[[int, list[QueueEntry]], bool],
+        retry_delay: float = 10,
+        on_expire: Callable[[int, QueueEntry], None] = None,
+    ):
+        self.max_wait = max_wait
+        self.on_match = on_match
+        self.on_expire = on_expire
+        self.retry_delay = retry_delay
+        self.buckets: dict[tuple[int, int], OrderedDict[int, QueueEntry]] = {}
+        self.user_buckets: dict[tuple[int, int], tuple[int, int]] = {}
+        self.deadlines: list[tuple[float, tuple[int, int]]] = []
+        self.dirty: set[tuple[int, int]] = set()
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def __len__(self):
+        return len(self.user_buckets)
+
+    def add(self, guild_id: int, size: int, entry: QueueEntry) -> int:
+        """Adds a player to the queue, returns the number of players waiting for that size."""
+        key = (guild_id, size)
+        bucket = self.buckets.setdefault(key, OrderedDict())
+        bucket[entry.user_id] = entry
+        self.user_buckets[(guild_id, entry.user_id)] = key
+        heapq.heappush(self.deadlines, (entry.queued_at + self.max_wait, key))
+        self.dirty.add(key)
+        self.wakeup.set()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return len(bucket)
+
+    def remove(self, guild_id: int, user_id: int) -> bool:
+        key = self.user_buckets.pop((guild_id, user_id), None)
+        if key is None:
+            return False
+        bucket = self.buckets[key]
+        bucket.pop(user_id)
+        if not bucket:
+            self.buckets.pop(key)
+        return True
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def run(self):
+        while self.buckets:
+            timeout = None
+            if self.deadlines:
+                timeout = max(self.deadlines[0][0] - time.monotonic(), 0)
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            now = time.monotonic()
+            while self.deadlines and self.deadlines[0][0] <= now:
+                self.dirty.add(heapq.heappop(self.deadlines)[1])
+            dirty, self.dirty = self.dirty, set()
+            for key in dirty:
+                try:
+                    self.match_bucket(key, now)
+                except Exception as e:
+                    logger.exception(f"Matchmaking failed for {key}: {e}")
+
+    def match_bucket(self, key: tuple[int, int], now: float):
+        guild_id, size = key
+        bucket = self.buckets.get(key)
+        while bucket:
+            oldest = next(iter(bucket.values()))
+            if len(bucket) == 1 and now - oldest.queued_at >= self.max_wait:
+                self.remove(guild_id, oldest.user_id)
+                if self.on_expire is not None:
+                    self.on_expire(guild_id, oldest)
+                return
+            if len(bucket) < size and (
+                len(bucket) < 2 or now - oldest.queued_at < self.max_wait
+            ):
+                return
+            entries = [bucket[user_id] for user_id in list(bucket)[:size]]
+            for entry in entries:
+                self.remove(guild_id, entry.user_id)
+            if not self.on_match(guild_id, entries):
+                # The game could not be started yet, keep their place in the queue
+                bucket = self.buckets.setdefault(key, OrderedDict())
+                for entry in reversed(entries):
+                    bucket[entry.user_id] = entry
+                    bucket.move_to_end(entry.user_id, last=False)
+                    self.user_buckets[(guild_id, entry.user_id)] = key
+                heapq.heappush(self.deadlines, (now + self.retry_delay, key))
+                return
+            bucket = self.buckets.get(key)
@@ -1,16 +1,50 @@
+import asyncio
 import nextcord
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-async def log_error_message(
+# Errors are sent to the logging channel in batches, at most this many embeds per message
+LOG_BATCH_SIZE = 10
+LOG_FLUSH_DELAY = 5
+logging_channel_ids: dict[int, int | None] = {}
+pending_errors: dict[int, dict[str, list]] = {}
+flush_tasks: dict[int, asyncio.Task] = {}
+
+
+def get_logging_channel(guild: nextcord.Guild) -> nextcord.TextChannel | None:
+    """Gets the logging channel of a guild, the lookup is cached until the
+    guild's channels change.
+    Parameters
+    ----------
+    guild:
+        the guild to find the logging channel of
+    Returns
+    -------
+    nextcord.TextChannel | None
+        The channel named "logs" if the guild has one, None otherwise
+    """
+    if guild.id not in logging_channel_ids:
+        logging_channel = nextcord.utils.get(guild.channels, name="logs")
+        logging_channel_ids[guild.id] = logging_channel.id if logging_channel else None
+    channel_id = logging_channel_ids[guild.id]
+    return guild.get_channel(channel_id) if channel_id else None
+
+
+def invalidate_logging_channel(guild_id: int) -> None:
+    logging_channel_ids.pop(guild_id, None)
+
+
+def log_error_message(
     context: (
         nextcord.Interaction | nextcord.Message | nextcord.TextChannel | nextcord.User
     ),
     error_message: str,
 ) -> None:
-    """Sends an error message to the logging channel.
+    """Queues an error message to be sent to the logging channel. Errors of a guild
+    are sent together after LOG_FLUSH_DELAY seconds, repeated errors only once with
+    the number of times they occurred.
     Parameters
     ----------
     context:
@@ -18,17 +52,66 @@ async def log_error_message(
     error_message:
         the error message to send
     """
-    embed = nextcord.Embed(
-        description=error_message, color=0xFF0000, timestamp=nextcord.utils.utcnow()
-    )
-    logging_channel = nextcord.utils.get(context.guild.channels, name="logs")
+    guild = context.guild
+    errors = pending_errors.setdefault(guild.id, {})
+    if error_message in errors:
+        errors[error_message][0] += 1
+    else:
+        errors[error_message] = [1, nextcord.utils.utcnow()]
+    if guild.id not in flush_tasks:
+        flush_tasks[guild.id] = asyncio.create_task(flush_error_messages(guild))
+
+
+async def flush_error_messages(guild: nextcord.Guild) -> None:
+    """Sends the queued error messages of a guild to its logging channel.
+    Parameters
+    ----------
+    guild:
+        the guild to send the error messages of
+    """
+    await asyncio.sleep(LOG_FLUSH_DELAY)
+    # Errors logged while sending start the next batch
+    flush_tasks.pop(guild.id, None)
+    errors = pending_errors.pop(guild.id, {})
+    logging_channel = get_logging_channel(guild)
     if not logging_channel:
-        logging.error(f'Could not find logging channel "logs"')
+        logging.error('Could not find logging channel "logs"')
         return
-    try:
-        await logging_channel.send(content=f"", embed=embed)
-    except Exception as e:
-        logging.error(f"Could not send error message to the logging channel: {e}")
+    embeds = [
+        nextcord.Embed(
+            description=error_message if count == 1 else f"{error_message} (x{count})",
+            color=0xFF0000,
+            timestamp=first_seen,
+        )
+        for error_message, (count, first_seen) in errors.items()
+    ]
+    unsent = list(errors.items())
+    for start in range(0, len(embeds), LOG_BATCH_SIZE):
+        try:
+            await logging_channel.send(embeds=embeds[start : start + LOG_BATCH_SIZE])
+        except Exception as e:
+            logging.error(f"Could not send error messages to the logging channel: {e}")
+            restore_error_messages(guild.id, unsent[start:])
+            return
+
+
+def restore_error_messages(guild_id: int, unsent: list[tuple[str, list]]) -> None:
+    """Puts back error messages that could not be sent, they are sent with the next
+    errors of the guild.
+    Parameters
+    ----------
+    guild_id:
+        the id of the guild the error messages belong to
+    unsent:
+        the error messages with the number of times and when they first occurred
+    """
+    errors = pending_errors.setdefault(guild_id, {})
+    for error_message, (count, first_seen) in unsent:
+        if error_message in errors:
+            errors[error_message][0] += count
+            errors[error_message][1] = min(errors[error_message][1], first_seen)
+        else:
+            errors[error_message] = [count, first_seen]
 
 
 async def delete_message(
@@ -56,7 +139,7 @@ async def delete_message(
             f'Bot is missing the "Manage Messages" permission in channel #{message.channel}'
         )
         if log:
-            await log_error_message(
+            log_error_message(
                 context=message,
                 error_message=f'**Bot is missing the "Manage Messages" permission in '
                 f"{message.channel.mention}**",
@@ -66,7 +149,7 @@ async def delete_message(
     except Exception as e:
         logging.error(f"Error deleting message: {e}")
         if log:
-            await log_error_message(
+            log_error_message(
                 context=message, error_message=f"**Could not delete message: {e}**"
             )
     return False
@@ -79,8 +162,8 @@ async def send_message(
     view: nextcord.ui.View = None,
     delete_after: float = None,
     log: bool = False,
-) -> bool:
-    """Sends a message to a channel, returns True if successful, False otherwise.
+) -> nextcord.Message | None:
+    """Sends a message to a channel, returns the message if successful, None otherwise.
     Parameters
     ----------
     channel: nextcord.TextChannel
@@ -97,28 +180,27 @@ async def send_message(
         (Optional) whether to send potential error messages to the log channel
     Returns
     -------
-    bool
-        True if sending the message was successful, False otherwise
+    nextcord.Message | None
+        The sent message if sending it was successful, None otherwise
     """
     try:
-        await channel.send(
+        return await channel.send(
             content=content, embed=embed, view=view, delete_after=delete_after
         )
-        return True
     except nextcord.Forbidden:
         logging.error(
             f'Bot is missing the "Send Messages" permission in channel #{channel}'
         )
         if log:
-            await log_error_message(
+            log_error_message(
                 channel,
                 f'**Bot is missing the "Send Messages" permission in {channel.mention}**',
             )
     except Exception as e:
         logging.error(f"Error sending message: {e}")
         if log:
-            await log_error_message(channel, f"**Could not send message: {e}**")
-    return False
+            log_error_message(channel, f"**Could not send message: {e}**")
+    return None
 
 
 async def send_private_message(
@@ -175,7 +257,7 @@ async def reply_to_message(
         return True
     except Exception as e:
         if log:
-            await log_error_message(
+            log_error_message(
                 context=message, error_message=f"**Could not reply to message: {e}**"
             )
         logging.error(e)
@@ -210,3 +292,68 @@ async def edit_message(
     except nextcord.HTTPException:
         pass
     return False
+
+
+async def create_thread(
+    channel: nextcord.TextChannel, name: str, log: bool = False
+) -> nextcord.Thread | None:
+    """Creates a public thread under a channel.
+    Parameters
+    ----------
+    channel:
+        the channel to create the thread in
+    name:
+        the name of the thread
+    log:
+        (Optional) whether to send potential error messages to the log channel
+    Returns
+    -------
+    nextcord.Thread | None
+        The created thread if successful, None otherwise
+    """
+    try:
+        return await channel.create_thread(
+            name=name,
+            type=nextcord.ChannelType.public_thread,
+            auto_archive_duration=60,
+        )
+    except nextcord.Forbidden:
+        logging.error(
+            f'Bot is missing the "Create Public Threads" permission in channel #{channel}'
+        )
+        if log:
+            log_error_message(
+                channel,
+                f'**Bot is missing the "Create Public Threads" permission in {channel.mention}**',
+            )
+    except Exception as e:
+        logging.error(f"Error creating thread: {e}")
+        if log:
+            log_error_message(channel, f"**Could not create thread: {e}**")
+    return None
+
+
+async def archive_thread(thread: nextcord.Thread) -> bool:
+    """Archives and locks a thread, only archiving it if the bot cannot lock it.
+    Parameters
+    ----------
+    thread:
+        the thread to archive
+    Returns
+    -------
+    bool
+        True if archiving the thread was successful, False otherwise
+    """
+    try:
+        await thread.edit(archived=True, locked=True)
+        return True
+    except nextcord.Forbidden:
+        pass
+    except nextcord.HTTPException:
+        return False
+    try:
+        await thread.edit(archived=True)
+        return True
+    except nextcord.HTTPException:
+        pass
+    return False
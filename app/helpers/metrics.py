@@ -0,0 +1,36 @@
+from collections import Counter, deque
+from typing import Callable
+
+# Distributions keep their most recent samples only
+SAMPLE_COUNT = 1000
+PERCENTILES = (1, 50, 99)
+
+counters: Counter[str] = Counter()
+gauges: dict[str, Callable[[], float]] = {}
+samples: dict[str, deque[float]] = {}
+
+
+def increment(name: str, amount: int = 1) -> None:
+    counters[name] += amount
+
+
+def register_gauge(name: str, getter: Callable[[], float]) -> None:
+    gauges[name] = getter
+
+
+def observe(name: str, value: float) -> None:
+    if name not in samples:
+        samples[name] = deque(maxlen=SAMPLE_COUNT)
+    samples[name].append(value)
+
+
+def snapshot() -> dict[str, float]:
+    values = dict(sorted(counters.items()))
+    for name, getter in sorted(gauges.items()):
+        values[name] = getter()
+    for name, recent in sorted(samples.items()):
+        ordered = sorted(recent)
+        for percentile in PERCENTILES:
+            index = min(len(ordered) - 1, len(ordered) * percentile // 100)
+            values[f"{name}.p{percentile}"] = ordered[index]
+    return values
@@ -0,0 +1,65 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import nextcord
+
+from app.helpers import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Profile:
+    user_id: int
+    name: str
+    avatar_url: str | None = None
+
+
+def profile_from_user(user: nextcord.abc.User) -> Profile:
+    return Profile(user.id, user.name, user.display_avatar.url)
+
+
+class ProfileCache:
+    """Names and avatars of the most recently seen users.
+
+    Used instead of the member cache so the bot can run without the members
+    intent, users missing from it are fetched once and kept while they are used.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.profiles: OrderedDict[int, Profile] = OrderedDict()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def get(self, user_id: int) -> Profile | None:
+        profile = self.profiles.get(user_id)
+        if profile is not None:
+            self.profiles.move_to_end(user_id)
+        return profile
+
+    def put(self, profile: Profile) -> None:
+        self.profiles[profile.user_id] = profile
+        self.profiles.move_to_end(profile.user_id)
+        while len(self.profiles) > self.max_size:
+            self.profiles.popitem(last=False)
+
+    async def resolve(
+        self, client: nextcord.Client, user_id: int, guild: nextcord.Guild = None
+    ) -> Profile:
+        profile = self.get(user_id)
+        if profile is not None:
+            return profile
+        user = (guild and guild.get_member(user_id)) or client.get_user(user_id)
+        if user is None:
+            metrics.increment("profiles.fetched")
+            try:
+                user = await client.fetch_user(user_id)
+            except nextcord.HTTPException as e:
+                logger.warning(f"Could not fetch user {user_id}: {e}")
+                return Profile(user_id, str(user_id))
+        profile = profile_from_user(user)
+        self.put(profile)
+        return profile
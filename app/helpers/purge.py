@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+import nextcord
+
+from app.helpers import metrics
+
+logger = logging.getLogger(__name__)
+
+# Discord only bulk deletes up to 100 messages at a time
+BULK_DELETE_LIMIT = 100
+
+
+class MessagePurger:
+    """Deletes the transient messages of games in bulk.
+
+    Messages are tracked with an optional deadline instead of a delete_after timer
+    each. A single sweep task deletes the ones that are due with one bulk delete
+    per channel, and all of a game's messages are deleted when it ends. Channels
+    where bulk deletes are not permitted fall back to deleting the bot's messages
+    one at a time, spaced out by single_delete_interval.
+    """
+
+    def __init__(self, sweep_interval: float = 5, single_delete_interval: float = 0.5):
+        self.sweep_interval = sweep_interval
+        self.single_delete_interval = single_delete_interval
+        self.channels: dict[int, nextcord.abc.Messageable] = {}
+        # channel id -> message id -> (game id, deadline)
+        self.messages: dict[int, dict[int, tuple[int | None, float | None]]] = (
+            defaultdict(dict)
+        )
+        self.single_delete_channels: set[int] = set()
+        self.task: asyncio.Task | None = None
+
+    def __len__(self):
+        return sum(len(messages) for messages in self.messages.values())
+
+    def track(
+        self, message: nextcord.Message, delay: float = None, game_id: int = None
+    ) -> None:
+        """Deletes the message after delay seconds, or when its game ends if it has no delay."""
+        deadline = time.monotonic() + delay if delay is not None else None
+        self.channels[message.channel.id] = message.channel
+        self.messages[message.channel.id][message.id] = (game_id, deadline)
+        if deadline is not None and (self.task is None or self.task.done()):
+            self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    async def run(self):
+        while any(
+            deadline is not None
+            for messages in self.messages.values()
+            for _, deadline in messages.values()
+        ):
+            await asyncio.sleep(self.sweep_interval)
+            now = time.monotonic()
+            await self.purge(lambda game_id, deadline: deadline and deadline <= now)
+
+    async def purge_game(self, game_id: int) -> None:
+        await self.purge(lambda message_game_id, _: message_game_id == game_id)
+
+    async def purge(self, predicate) -> None:
+        for channel_id, messages in list(self.messages.items()):
+            message_ids = [
+                message_id
+                for message_id, (game_id, deadline) in messages.items()
+                if predicate(game_id, deadline)
+            ]
+            if not message_ids:
+                continue
+            for message_id in message_ids:
+                messages.pop(message_id)
+            channel = self.channels[channel_id]
+            if not messages:
+                self.messages.pop(channel_id)
+                self.channels.pop(channel_id)
+            await self.delete(channel, message_ids)
+
+    async def delete(self, channel, message_ids: list[int]) -> None:
+        if len(message_ids) > 1 and channel.id not in self.single_delete_channels:
+            try:
+                for start in range(0, len(message_ids), BULK_DELETE_LIMIT):
+                    chunk = message_ids[start : start + BULK_DELETE_LIMIT]
+                    await channel.delete_messages([nextcord.Object(id) for id in chunk])
+                    metrics.increment("purge.bulk_deletes")
+                return
+            except nextcord.Forbidden:
+                # Bulk deletes need Manage Messages, the bot can still delete its own
+                self.single_delete_channels.add(channel.id)
+            except nextcord.HTTPException as e:
+                logger.warning(f"Bulk delete failed in channel {channel.id}: {e}")
+        for index, message_id in enumerate(message_ids):
+            if index:
+                await asyncio.sleep(self.single_delete_interval)
+            try:
+                await channel.get_partial_message(message_id).delete()
+                metrics.increment("purge.single_deletes")
+            except nextcord.NotFound:
+                pass
+            except nextcord.HTTPException as e:
+                logger.warning(f"Could not delete message {message_id}: {e}")
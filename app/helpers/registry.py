@@ -0,0 +1,63 @@
+import logging
+from typing import Any, Callable, TypeVar
+
+from nextcord.ext.commands import Bot
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Values by name with the version of their layout. This module is not part of any
+# extension, so it is not reloaded with them.
+entries: dict[str, tuple[int, Any]] = {}
+reloading = False
+
+
+def persistent(
+    name: str,
+    factory: Callable[[], T],
+    version: int = 1,
+    migrations: dict[int, Callable[[Any], Any]] = None,
+) -> T:
+    """The value kept under name, created by factory the first time it is asked for.
+
+    A reloaded extension gets back the values of the code it replaced. A value kept
+    by an older version is upgraded first, migrations maps each version to the
+    function turning a value of that version into one of the next. Games started
+    before the reload keep using the old value, so migrations should update it in
+    place. RuntimeError is raised when there is no way to the requested version,
+    which fails the reload and keeps the previous code running.
+    """
+    if name not in entries:
+        value = factory()
+        entries[name] = (version, value)
+        return value
+    stored_version, value = entries[name]
+    if stored_version > version:
+        raise RuntimeError(
+            f"{name} is at version {stored_version}, newer than version {version}"
+        )
+    while stored_version < version:
+        migration = (migrations or {}).get(stored_version)
+        if migration is None:
+            raise RuntimeError(f"No migration of {name} from version {stored_version}")
+        value = migration(value)
+        stored_version += 1
+        logger.info(f"Migrated {name} to version {stored_version}")
+    entries[name] = (version, value)
+    return value
+
+
+def is_reloading() -> bool:
+    """Whether the extensions are being reloaded, in which case an unloaded cog
+    leaves its background tasks to the one replacing it."""
+    return reloading
+
+
+def reload_extension(bot: Bot, name: str) -> None:
+    global reloading
+    reloading = True
+    try:
+        bot.reload_extension(name)
+    finally:
+        reloading = False
@@ -0,0 +1,378 @@
+import io
+import logging
+import math
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import OrderedDict
+from typing import NamedTuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from app.helpers import metrics
+from app.helpers.uno_logic import UnoGame, Color, Value
+
+logger = logging.getLogger(__name__)
+
+EMBLEM_PATH = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, "assets", "uno.svg"
+)
+CARD_SIZE = (80, 120)
+ROW_HEIGHT = 30
+WIDTH = 480
+# Where the rows of the turn order start, right of the top card
+ROW_LEFT = 122
+BACKGROUND = (43, 45, 49)
+HIGHLIGHT = (64, 66, 73)
+TEXT = (242, 243, 245)
+MUTED = (181, 186, 193)
+CARD_COLORS = {
+    Color.RED: (215, 38, 0),
+    Color.BLUE: (9, 86, 191),
+    Color.GREEN: (55, 151, 17),
+    Color.YELLOW: (236, 212, 7),
+    Color.BLACK: (30, 30, 30),
+    Color.WHITE: (150, 150, 160),
+}
+# The bundled font has no emoji, the special cards get short labels instead
+LABELS = {
+    Value.DRAW_TWO: "+2",
+    Value.BLOCK: "SKIP",
+    Value.REVERSE: "REV",
+    Value.DRAW_FOUR: "+4",
+    Value.RAINBOW: "WILD",
+    Value.SWAP_HANDS: "SWAP",
+}
+MAX_NAME_LENGTH = 20
+
+
+class TableState(NamedTuple):
+    """Everything the table image shows, images are cached by it."""
+
+    top_card: tuple[Color, Value]
+    # Names and hand sizes in the turn order, the current player first
+    players: tuple[tuple[str, int], ...]
+    pending_draw: int
+
+
+def table_state(game: UnoGame) -> TableState:
+    top_card = game.get_top_card()
+    return TableState(
+        (top_card.color, top_card.value),
+        tuple(
+            (game.players[player_id].username, len(game.players[player_id].hand))
+            for player_id in game.play_order
+        ),
+        game.pending_draw,
+    )
+
+
+PATH_TOKEN = re.compile(r"[MmLlHhVvCcAaZz]|[-+]?(?:\d*\.\d+|\d+\.?)(?:[eE][-+]?\d+)?")
+PATH_ARGUMENTS = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "A": 7, "Z": 0}
+CURVE_STEPS = 12
+
+
+def arc_points(start, radii, rotation, large_arc, sweep, end) -> list:
+    """Points along an SVG elliptical arc, from its endpoint parameterization."""
+    (x1, y1), (x2, y2) = start, end
+    rx, ry = abs(radii[0]), abs(radii[1])
+    if not rx or not ry:
+        return [end]
+    phi = math.radians(rotation)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p, y1p = cos_phi * dx + sin_phi * dy, -sin_phi * dx + cos_phi * dy
+    # Radii too small to reach the end point are scaled up
+    scale = x1p**2 / rx**2 + y1p**2 / ry**2
+    if scale > 1:
+        rx, ry = rx * math.sqrt(scale), ry * math.sqrt(scale)
+    numerator = rx**2 * ry**2 - rx**2 * y1p**2 - ry**2 * x1p**2
+    denominator = rx**2 * y1p**2 + ry**2 * x1p**2
+    factor = math.sqrt(max(0.0, numerator / denominator))
+    if large_arc == sweep:
+        factor = -factor
+    cxp, cyp = factor * rx * y1p / ry, -factor * ry * x1p / rx
+    cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+    cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+    theta = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    delta = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - theta
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+    points = []
+    for step in range(1, CURVE_STEPS + 1):
+        angle = theta + delta * step / CURVE_STEPS
+        x, y = rx * math.cos(angle), ry * math.sin(angle)
+        points.append((cx + cos_phi * x - sin_phi * y, cy + sin_phi * x + cos_phi * y))
+    return points
+
+
+def path_polygons(data: str) -> list[list[tuple[float, float]]]:
+    """Flattens SVG path data into polygons, one per subpath. Only the commands
+    used by the bundled art are supported."""
+    tokens = PATH_TOKEN.findall(data)
+    polygons, polygon = [], []
+    x = y = start_x = start_y = 0.0
+    index, command = 0, None
+    while index < len(tokens):
+        if tokens[index].isalpha():
+            command = tokens[index]
+            index += 1
+        elif command is None:
+            raise ValueError(f"Path data does not start with a command: {data[:20]}")
+        upper = command.upper()
+        if upper not in PATH_ARGUMENTS:
+            raise ValueError(f"Unsupported path command {command}")
+        count = PATH_ARGUMENTS[upper]
+        values = [float(token) for token in tokens[index : index + count]]
+        index += count
+        relative = command.islower()
+        if upper == "Z":
+            x, y = start_x, start_y
+            if polygon:
+                polygons.append(polygon)
+            polygon = []
+            continue
+        if upper == "M":
+            if polygon:
+                polygons.append(polygon)
+            x, y = (x + values[0], y + values[1]) if relative else values
+            start_x, start_y = x, y
+            polygon = [(x, y)]
+            # Coordinates following a move are line segments
+            command = "l" if relative else "L"
+        elif upper in ("L", "H", "V"):
+            if upper == "L":
+                x, y = (x + values[0], y + values[1]) if relative else values
+            elif upper == "H":
+                x = x + values[0] if relative else values[0]
+            else:
+                y = y + values[0] if relative else values[0]
+            polygon.append((x, y))
+        elif upper == "C":
+            offset = (x, y) if relative else (0.0, 0.0)
+            c1 = (values[0] + offset[0], values[1] + offset[1])
+            c2 = (values[2] + offset[0], values[3] + offset[1])
+            end = (values[4] + offset[0], values[5] + offset[1])
+            for step in range(1, CURVE_STEPS + 1):
+                t = step / CURVE_STEPS
+                u = 1 - t
+                polygon.append(
+                    (
+                        u**3 * x
+                        + 3 * u**2 * t * c1[0]
+                        + 3 * u * t**2 * c2[0]
+                        + t**3 * end[0],
+                        u**3 * y
+                        + 3 * u**2 * t * c1[1]
+                        + 3 * u * t**2 * c2[1]
+                        + t**3 * end[1],
+                    )
+                )
+            x, y = end
+        elif upper == "A":
+            end = (x + values[5], y + values[6]) if relative else (values[5], values[6])
+            polygon.extend(
+                arc_points((x, y), values[0:2], values[2], values[3], values[4], end)
+            )
+            x, y = end
+    if polygon:
+        polygons.append(polygon)
+    return polygons
+
+
+def rasterize_svg(path: str, size: int) -> Image.Image:
+    """Renders the filled paths of a simple SVG into a square RGBA image, drawn at
+    four times the size and scaled down for smooth edges."""
+    root = ElementTree.parse(path).getroot()
+    _, _, view_width, view_height = (
+        float(value) for value in root.get("viewBox").split()
+    )
+    scale = 4 * size / max(view_width, view_height)
+    image = Image.new("RGBA", (4 * size, 4 * size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for element in root.iter("{http://www.w3.org/2000/svg}path"):
+        fill = element.get("fill", "#000")
+        for polygon in path_polygons(element.get("d")):
+            if len(polygon) > 2:
+                draw.polygon([(x * scale, y * scale) for x, y in polygon], fill=fill)
+    return image.resize((size, size), Image.LANCZOS)
+
+
+def font(size: int) -> ImageFont.ImageFont:
+    return ImageFont.load_default(size=size)
+
+
+class SpriteAtlas:
+    """Every card face rasterized once into a single image, including the wild
+    cards in each of the colors they can be given."""
+
+    def __init__(self):
+        start = time.perf_counter()
+        width, height = CARD_SIZE
+        self.emblem = rasterize_svg(EMBLEM_PATH, 24)
+        self.image = Image.new("RGBA", (width * len(Value), height * len(Color)))
+        self.boxes: dict[tuple[Color, Value], tuple[int, int, int, int]] = {}
+        for row, color in enumerate(Color):
+            for column, value in enumerate(Value):
+                x, y = column * width, row * height
+                self.image.paste(self.draw_card(color, value), (x, y))
+                self.boxes[(color, value)] = (x, y, x + width, y + height)
+        self.build_time = time.perf_counter() - start
+        logger.info(
+            f"Rasterized {len(self.boxes)} card sprites in "
+            f"{self.build_time * 1000:.0f} ms"
+        )
+
+    def draw_card(self, color: Color, value: Value) -> Image.Image:
+        width, height = CARD_SIZE
+        card = Image.new("RGBA", CARD_SIZE, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(card)
+        draw.rounded_rectangle(
+            (0, 0, width - 1, height - 1), radius=10, fill=(255, 255, 255)
+        )
+        draw.rounded_rectangle(
+            (4, 4, width - 5, height - 5), radius=8, fill=CARD_COLORS[color]
+        )
+        # The tilted oval in the middle of the card
+        oval = Image.new("RGBA", CARD_SIZE, (0, 0, 0, 0))
+        ImageDraw.Draw(oval).ellipse(
+            (12, 28, width - 12, height - 28), fill=(255, 255, 255)
+        )
+        card.alpha_composite(oval.rotate(-30, resample=Image.BICUBIC))
+        label = LABELS.get(value, value.value)
+        ink = (
+            (30, 30, 30) if color in (Color.BLACK, Color.WHITE) else CARD_COLORS[color]
+        )
+        draw.text(
+            (width / 2, height / 2),
+            label,
+            fill=ink,
+            font=font(26 if len(label) <= 2 else 18),
+            anchor="mm",
+        )
+        draw.text((9, 7), label, fill=(255, 255, 255), font=font(13))
+        card.alpha_composite(self.emblem, (width - 30, height - 30))
+        return card
+
+    def sprite(self, color: Color, value: Value) -> Image.Image:
+        return self.image.crop(self.boxes[(color, value)])
+
+
+class TableRenderer:
+    """Draws the table of a game from the sprites of the atlas and keeps the
+    encoded PNGs of the most recently shown states, so a turn that leaves the
+    table as it was or looks like an earlier one is not drawn again. A table that
+    was not shown before is put together from cached tiles of the top card and of
+    each row of the turn order, which only change a few at a time.
+
+    Only render is run in threads, the cached images are looked up and stored
+    by get and put on the event loop."""
+
+    def __init__(self, max_size: int = 256):
+        self.atlas = SpriteAtlas()
+        self.max_size = max_size
+        self.images: OrderedDict[TableState, bytes] = OrderedDict()
+        self.tiles: OrderedDict[tuple, Image.Image] = OrderedDict()
+        # Tables are drawn in threads and the tiles and fonts are not safe to share
+        # between them
+        self.lock = threading.Lock()
+        self.name_font = font(16)
+        self.title_font = font(14)
+
+    def __len__(self):
+        return len(self.images)
+
+    def get(self, state: TableState) -> bytes | None:
+        image = self.images.get(state)
+        if image is not None:
+            self.images.move_to_end(state)
+            metrics.increment("table_image.hits")
+        return image
+
+    def put(self, state: TableState, image: bytes) -> None:
+        self.images[state] = image
+        self.images.move_to_end(state)
+        while len(self.images) > self.max_size:
+            self.images.popitem(last=False)
+
+    def render(self, state: TableState) -> bytes:
+        with self.lock:
+            image = self.encode(self.draw(state))
+        metrics.increment("table_image.renders")
+        return image
+
+    def draw(self, state: TableState) -> Image.Image:
+        height = max(CARD_SIZE[1] + 60, 20 + ROW_HEIGHT * len(state.players) + 20)
+        image = Image.new("RGB", (WIDTH, height), BACKGROUND)
+        image.paste(self.tile(("card", state.top_card, state.pending_draw)), (0, 0))
+        for index, (name, hand_size) in enumerate(state.players):
+            image.paste(
+                self.tile(("row", index, name, hand_size)),
+                (ROW_LEFT, 17 + index * ROW_HEIGHT),
+            )
+        return image
+
+    def tile(self, key: tuple) -> Image.Image:
+        tile = self.tiles.get(key)
+        if tile is None:
+            if key[0] == "card":
+                tile = self.draw_card_tile(*key[1:])
+            else:
+                tile = self.draw_row_tile(*key[1:])
+            self.tiles[key] = tile
+            # Each table has at most 11 tiles
+            while len(self.tiles) > self.max_size * 11:
+                self.tiles.popitem(last=False)
+        else:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def draw_card_tile(
+        self, top_card: tuple[Color, Value], pending_draw: int
+    ) -> Image.Image:
+        tile = Image.new("RGB", (ROW_LEFT, CARD_SIZE[1] + 60), BACKGROUND)
+        draw = ImageDraw.Draw(tile)
+        sprite = self.atlas.sprite(*top_card)
+        tile.paste(sprite, (20, 30), sprite)
+        draw.text((20, 8), "Current card", fill=MUTED, font=self.title_font)
+        if pending_draw:
+            draw.text(
+                (20, 30 + CARD_SIZE[1] + 8),
+                f"+{pending_draw} stacked",
+                fill=TEXT,
+                font=self.title_font,
+            )
+        return tile
+
+    def draw_row_tile(self, index: int, name: str, hand_size: int) -> Image.Image:
+        width = WIDTH - 12 - ROW_LEFT
+        tile = Image.new("RGB", (width, ROW_HEIGHT - 2), BACKGROUND)
+        draw = ImageDraw.Draw(tile)
+        # The current player is always first in the turn order
+        if index == 0:
+            draw.rounded_rectangle(
+                (0, 0, width - 1, ROW_HEIGHT - 3), radius=6, fill=HIGHLIGHT
+            )
+        if len(name) > MAX_NAME_LENGTH:
+            name = name[: MAX_NAME_LENGTH - 1] + "…"
+        draw.text((8, 3), f"{index + 1}. {name}", fill=TEXT, font=self.name_font)
+        emblem = self.atlas.emblem
+        tile.paste(emblem, (width - 68, 1), emblem)
+        draw.text(
+            (width - 40, 3),
+            str(hand_size),
+            fill=TEXT if hand_size > 1 else (237, 66, 69),
+            font=self.name_font,
+        )
+        return tile
+
+    @staticmethod
+    def encode(image: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        # The images are small and short lived, encoding speed matters more than size
+        image.save(buffer, "PNG", compress_level=1)
+        return buffer.getvalue()
@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+
+from app.helpers import metrics
+
+
+class ActionThrottle:
+    """Token buckets limiting how fast each user can press the buttons of a game.
+
+    Every user gets a bucket of burst presses per game, refilled at rate presses
+    per second. A bucket that has refilled is the same as no bucket, so buckets
+    are forgotten once they have been idle long enough to be full again, and the
+    least recently used ones once there are more than max_size.
+    """
+
+    def __init__(self, rate: float, burst: int, max_size: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_size = max_size
+        self.refill_time = burst / rate
+        # (game id, user id) -> (tokens, last update), the least recently used first
+        self.buckets: OrderedDict[tuple[int, int], tuple[float, float]] = OrderedDict()
+
+    def __len__(self):
+        return len(self.buckets)
+
+    def allow(self, game_id: int, user_id: int, action: str) -> bool:
+        """Takes a token from the user's bucket, returns False and counts the
+        throttled action when it is empty."""
+        now = time.monotonic()
+        self.expire(now)
+        key = game_id, user_id
+        bucket = self.buckets.pop(key, None)
+        if bucket is None:
+            tokens = self.burst
+        else:
+            tokens, updated = bucket
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            metrics.increment(f"throttle.dropped.{action}")
+        self.buckets[key] = tokens, now
+        while len(self.buckets) > self.max_size:
+            self.buckets.popitem(last=False)
+        return allowed
+
+    def expire(self, now: float) -> None:
+        while self.buckets:
+            key, (_, updated) = next(iter(self.buckets.items()))
+            if now - updated < self.refill_time:
+                return
+            del self.buckets[key]
@@ -0,0 +1,337 @@
+import asyncio
+import math
+import multiprocessing
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+from app.helpers.uno_logic import UnoGame, UnoPlayer, Card, Color, Value, wild_colors
+
+# Bot seats use ids no Discord user can have
+AI_SEATS = 10
+PLAY_COLORS = (Color.RED, Color.GREEN, Color.BLUE, Color.YELLOW)
+EXPLORATION = math.sqrt(2)
+MAX_ROLLOUT_TURNS = 300
+
+
+def is_ai_seat(player_id: int) -> bool:
+    return 0 < player_id <= AI_SEATS
+
+
+def ai_seat_name(player_id: int) -> str:
+    return f"Bot {player_id}"
+
+
+class Move(NamedTuple):
+    """Playing the card with the given (color, value), or drawing when card is None."""
+
+    card: tuple[Color, Value] | None
+    color: Color | None = None
+    swapped_player_id: int | None = None
+
+
+DRAW = Move(None)
+
+
+@dataclass
+class SearchState:
+    """What the player to move knows about a game, small enough to send to the
+    search processes."""
+
+    player_id: int
+    hand: list[Card]
+    hand_sizes: dict[int, int]
+    play_order: list[int]
+    top_card: Card
+    # The cards in the deck and in the other players' hands, in no particular order
+    unseen: list[Card]
+    variant: str = "standard"
+    pending_draw: int = 0
+
+
+def search_state(game: UnoGame, player_id: int) -> SearchState:
+    unseen = list(game.deck)
+    for other_id, player in game.players.items():
+        if other_id != player_id:
+            unseen.extend(player.hand)
+    return SearchState(
+        player_id=player_id,
+        hand=list(game.players[player_id].hand),
+        hand_sizes={
+            other_id: len(player.hand) for other_id, player in game.players.items()
+        },
+        play_order=list(game.play_order),
+        top_card=game.get_top_card(),
+        unseen=unseen,
+        variant=game.variant,
+        pending_draw=game.pending_draw,
+    )
+
+
+def determinize(state: SearchState, rng: random.Random) -> UnoGame:
+    """A full game consistent with the state, the unseen cards dealt at random."""
+    game = UnoGame(0, 0, seed=rng.getrandbits(64), variant=state.variant)
+    unseen = [Card(card.value, card.color) for card in state.unseen]
+    rng.shuffle(unseen)
+    for player_id in state.play_order:
+        player = UnoPlayer(player_id, "")
+        if player_id == state.player_id:
+            cards = [Card(card.value, card.color) for card in state.hand]
+        else:
+            size = state.hand_sizes[player_id]
+            cards, unseen = unseen[:size], unseen[size:]
+        for card in cards:
+            player.hand.add(card)
+        game.players[player_id] = player
+    game.deck = unseen
+    game.discard_pile = [Card(state.top_card.value, state.top_card.color)]
+    game.play_order = deque(state.play_order)
+    game.current_player_id = game.play_order[0]
+    game.next_player_id = game.play_order[1]
+    game.pending_draw = state.pending_draw
+    return game
+
+
+def legal_moves(game: UnoGame, player: UnoPlayer) -> list[Move]:
+    if not game.has_eligible_card(player):
+        return [DRAW]
+    moves = []
+    for card, _ in player.hand.groups():
+        if not game.can_play(player, card):
+            continue
+        key = (card.color, card.value)
+        if card.is_wildcard():
+            moves.extend(Move(key, color) for color in PLAY_COLORS)
+        elif card.value in game.rules.swap_values:
+            moves.extend(
+                Move(key, swapped_player_id=other_id)
+                for other_id in game.play_order
+                if other_id != player.id
+            )
+        else:
+            moves.append(Move(key))
+    return moves
+
+
+def random_move(game: UnoGame, player: UnoPlayer, rng: random.Random) -> Move:
+    return rng.choice(legal_moves(game, player))
+
+
+def rollout_move(game: UnoGame, player: UnoPlayer, rng: random.Random) -> Move:
+    """A random move picked from the distinct playable cards without listing every
+    color and swap target, the playouts spend most of their time here."""
+    top_card, rules = game.get_top_card(), game.rules
+    if game.pending_draw:
+        stackable = rules.stacks.get(top_card.value, ())
+        keys = [key for key in player.hand.cards if key[1] in stackable]
+    else:
+        wild_top = top_card.color in wild_colors
+        keys = [
+            key
+            for key in player.hand.cards
+            if wild_top
+            or key[0] in wild_colors
+            or key[0] is top_card.color
+            or key[1] is top_card.value
+        ]
+    if not keys or (len(player.hand) == 1 and keys[0][1] in rules.last_card_forbidden):
+        return DRAW
+    key = rng.choice(keys)
+    if key[0] is Color.BLACK:
+        return Move(key, rng.choice(PLAY_COLORS))
+    if key[1] in rules.swap_values:
+        others = [other_id for other_id in game.play_order if other_id != player.id]
+        return Move(key, swapped_player_id=rng.choice(others))
+    return Move(key)
+
+
+def greedy_move(game: UnoGame, player: UnoPlayer, rng: random.Random) -> Move:
+    """Plays punishing cards first and wild cards last, picking the color it holds the most of."""
+    moves = legal_moves(game, player)
+    if moves == [DRAW]:
+        return DRAW
+    best_color = favorite_color(player)
+
+    def priority(move: Move) -> tuple:
+        color, value = move.card
+        card = Card(value, color)
+        return (
+            card.is_punishing() and not card.is_wildcard(),
+            not card.is_wildcard() and value not in game.rules.swap_values,
+            move.color == best_color,
+            player.hand.color_counts[color],
+        )
+
+    return max(moves, key=priority)
+
+
+def favorite_color(player: UnoPlayer) -> Color:
+    return max(PLAY_COLORS, key=lambda color: player.hand.color_counts[color])
+
+
+def fewest_cards_opponent(game: UnoGame, player: UnoPlayer) -> int:
+    return min(
+        (other_id for other_id in game.play_order if other_id != player.id),
+        key=lambda other_id: len(game.players[other_id].hand),
+    )
+
+
+class MoveResult(NamedTuple):
+    """What a move did, in the terms of the game view: the made move ("PLAY_CARD",
+    "DRAW_CARD", "MAX_CARDS" or "PENALTY"), the card, whether the card was drawn
+    before it was played, the skipped or swapped player, the number of cards drawn
+    and the stacked draw cards taken."""
+
+    made_move: str
+    card: Card | None
+    drawn_card_playable: bool = False
+    skipped_player_id: int | None = None
+    swapped_player_id: int | None = None
+    drawn_count: int = 1
+    penalty: int = 0
+
+
+def apply_move(game: UnoGame, player: UnoPlayer, move: Move) -> MoveResult:
+    """Makes a move like a player would through the game view. A drawn card that
+    can be played is played right away."""
+    if move.card is not None:
+        card = player.hand.cards[move.card][-1]
+        skipped_player_id = game.play_card(
+            player, card, move.swapped_player_id, move.color
+        )
+        return MoveResult(
+            "PLAY_CARD", card, False, skipped_player_id, move.swapped_player_id
+        )
+    if game.pending_draw:
+        return MoveResult("PENALTY", None, penalty=game.take_penalty(player))
+    if game.rules.draw_until_playable:
+        drawn_cards = game.draw_until_playable(player)
+    else:
+        card = game.draw_card(player)
+        drawn_cards = [card] if card else []
+    if not drawn_cards:
+        return MoveResult("MAX_CARDS", None)
+    card = drawn_cards[-1]
+    if not game.can_play(player, card):
+        return MoveResult("DRAW_CARD", card, drawn_count=len(drawn_cards))
+    color = favorite_color(player) if card.is_wildcard() else None
+    swapped_player_id = (
+        fewest_cards_opponent(game, player)
+        if card.value in game.rules.swap_values
+        else None
+    )
+    skipped_player_id = game.play_card(player, card, swapped_player_id, color)
+    return MoveResult(
+        "PLAY_CARD",
+        card,
+        True,
+        skipped_player_id,
+        swapped_player_id,
+        drawn_count=len(drawn_cards),
+    )
+
+
+def rollout(
+    game: UnoGame, rng: random.Random, policy: Callable = rollout_move
+) -> int | None:
+    """Plays the game to its end, returns the winner or None if it takes too long."""
+    for _ in range(MAX_ROLLOUT_TURNS):
+        winner = game.check_winner()
+        if winner is not None:
+            return winner
+        player = game.players[game.current_player_id]
+        apply_move(game, player, policy(game, player, rng))
+        if game.check_winner() is None:
+            game.advance_turn()
+    return None
+
+
+def search(
+    state: SearchState, time_budget: float, seed: int = None
+) -> tuple[Move, int]:
+    """Determinized Monte Carlo search: every iteration deals the unseen cards at
+    random, makes one of the moves picked by UCB1 and plays the game out with
+    random moves. Returns the most visited move and the number of rollouts."""
+    rng = random.Random(seed)
+    deadline = time.perf_counter() + time_budget
+    root = determinize(state, rng)
+    moves = legal_moves(root, root.players[state.player_id])
+    if len(moves) == 1:
+        return moves[0], 0
+    visits, rewards, total = [0] * len(moves), [0.0] * len(moves), 0
+    while total < len(moves) or time.perf_counter() < deadline:
+        if total < len(moves):
+            index = total
+        else:
+            log_total = math.log(total)
+            index = max(
+                range(len(moves)),
+                key=lambda i: rewards[i] / visits[i]
+                + EXPLORATION * math.sqrt(log_total / visits[i]),
+            )
+        game = determinize(state, rng)
+        apply_move(game, game.players[state.player_id], moves[index])
+        winner = game.check_winner()
+        if winner is None:
+            game.advance_turn()
+            winner = rollout(game, rng)
+        visits[index] += 1
+        rewards[index] += 1.0 if winner == state.player_id else 0.0
+        total += 1
+    best = max(range(len(moves)), key=lambda i: visits[i])
+    return moves[best], total
+
+
+search_pool: ProcessPoolExecutor | None = None
+searches_running = 0
+
+
+def get_search_pool(workers: int) -> ProcessPoolExecutor:
+    global search_pool
+    if search_pool is None:
+        search_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return search_pool
+
+
+def shutdown_search_pool() -> None:
+    global search_pool
+    if search_pool is not None:
+        search_pool.shutdown(wait=False, cancel_futures=True)
+        search_pool = None
+
+
+async def choose_move(
+    game: UnoGame, player_id: int, time_budget: float, workers: int = 1
+) -> tuple[Move, int]:
+    """Searches for a move in the process pool so the event loop keeps running.
+    While there are more searches than workers the time budget is shared between
+    them, so the bots of other games do not wait for whole budgets in the queue. A
+    pool with a crashed process is replaced for the next search."""
+    global searches_running
+    loop = asyncio.get_running_loop()
+    searches_running += 1
+    try:
+        return await loop.run_in_executor(
+            get_search_pool(workers),
+            search,
+            search_state(game, player_id),
+            time_budget * min(1.0, workers / searches_running),
+        )
+    except BrokenProcessPool:
+        shutdown_search_pool()
+        raise
+    finally:
+        searches_running -= 1
+
+
+def checked_move(game: UnoGame, player: UnoPlayer, move: Move) -> Move | None:
+    """The move if the player can still make it, drawing always is."""
+    if move == DRAW or move in legal_moves(game, player):
+        return move
+    return None
@@ -1,8 +1,13 @@
-from dataclasses import dataclass
-from collections import deque
-from enum import Enum
+from dataclasses import dataclass, field
+from collections import Counter, deque
+from enum import Enum, IntEnum
+from functools import lru_cache
+from typing import Callable
+import logging
 import random
 
+logger = logging.getLogger(__name__)
+
 
 class Value(Enum):
     ZERO = "0"
@@ -60,11 +65,97 @@ class Card:
         return self.value in {Value.BLOCK, Value.DRAW_FOUR, Value.DRAW_TWO}
 
 
+color_rank = {color: rank for rank, color in enumerate(Color)}
+value_rank = {value: rank for rank, value in enumerate(Value)}
+# Members hash by name in Python, the tables read on every play are indexed by rank
+for value, rank in value_rank.items():
+    value.rank = rank
+wild_colors = (Color.BLACK, Color.WHITE)
+
+
+class Hand:
+    """A multiset of cards indexed by (color, value) that keeps per-color and
+    per-value tallies, so adding, removing and counting playable cards take
+    constant time."""
+
+    def __init__(self, cards: list[Card] = ()):
+        self.cards: dict[tuple[Color, Value], list[Card]] = {}
+        self.color_counts: Counter[Color] = Counter()
+        self.value_counts: Counter[Value] = Counter()
+        self.size = 0
+        for card in cards:
+            self.add(card)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for bucket in self.cards.values():
+            yield from bucket
+
+    def __contains__(self, card: Card):
+        return (card.color, card.value) in self.cards
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def count(self, color: Color, value: Value) -> int:
+        bucket = self.cards.get((color, value))
+        return len(bucket) if bucket else 0
+
+    def add(self, card: Card) -> None:
+        self.cards.setdefault((card.color, card.value), []).append(card)
+        self.color_counts[card.color] += 1
+        self.value_counts[card.value] += 1
+        self.size += 1
+
+    def remove(self, card: Card) -> bool:
+        key = (card.color, card.value)
+        bucket = self.cards.get(key)
+        if not bucket:
+            return False
+        # Equal cards are interchangeable but views hold on to the exact object
+        for index in range(len(bucket) - 1, -1, -1):
+            if bucket[index] is card:
+                bucket.pop(index)
+                break
+        else:
+            bucket.pop()
+        if not bucket:
+            del self.cards[key]
+        self.color_counts[card.color] -= 1
+        self.value_counts[card.value] -= 1
+        self.size -= 1
+        return True
+
+    def playable_count(self, top_card: Card) -> int:
+        """Number of cards that can be played on top of the given card."""
+        if top_card.color in wild_colors:
+            return self.size
+        wild_count = sum(self.color_counts[color] for color in wild_colors)
+        # Cards matching both the color and the value, and wild cards matching the
+        # value, would otherwise be counted twice
+        return (
+            wild_count
+            + self.color_counts[top_card.color]
+            + self.value_counts[top_card.value]
+            - self.count(top_card.color, top_card.value)
+            - sum(self.count(color, top_card.value) for color in wild_colors)
+        )
+
+    def groups(self) -> list[tuple[Card, int]]:
+        """Identical cards with their counts, sorted by color, then by value."""
+        return sorted(
+            ((bucket[0], len(bucket)) for bucket in self.cards.values()),
+            key=lambda group: (color_rank[group[0].color], value_rank[group[0].value]),
+        )
+
+
 class UnoPlayer:
     def __init__(self, player_id: int, username: str):
         self.id = player_id
         self.username = username
-        self.hand: list[Card] = []
+        self.hand = Hand()
         self.drawn_cards = 0
         self.turns_skipped = 0
         self.played_cards = 0
@@ -74,14 +165,15 @@ class UnoPlayer:
         return f"UnoPlayer(Id: {self.id}, Hand: {self.hand})"
 
     def remove_from_hand(self, card: Card) -> None:
-        try:
-            self.hand.remove(card)
+        if self.hand.remove(card):
             self.played_cards += 1
-        except ValueError:
-            print(f"Card {card} not in {self.username}'s hand. Hand: {self.hand}")
+        else:
+            logger.warning(
+                f"Card {card} not in {self.username}'s hand. Hand: {self.hand}"
+            )
 
     def add_to_hand(self, card: Card) -> Card:
-        self.hand.append(card)
+        self.hand.add(card)
         self.drawn_cards += 1
         return card
 
@@ -89,11 +181,146 @@ class UnoPlayer:
         return len(self.hand) == 1
 
 
+class Event(IntEnum):
+    START = 1
+    PLAY = 2
+    DRAW = 3
+    DRAW_MANY = 4
+    TIMEOUT = 5
+    ADVANCE = 6
+    REMOVE = 7
+    END = 8
+    JUMP_IN = 9
+    PENALTY = 10
+
+
+# The rules are declared in the tables below, compile_rules turns the tables of a
+# variant into the lookup and dispatch tables a game uses.
+
+# What playing a card of each value does: an effect_ method of UnoGame and its amount
+EFFECTS: dict[Value, tuple[str, int]] = {
+    Value.DRAW_TWO: ("skip_and_draw", 2),
+    Value.DRAW_FOUR: ("skip_and_draw", 4),
+    Value.BLOCK: ("skip", 0),
+    Value.REVERSE: ("reverse", 0),
+    Value.SWAP_HANDS: ("swap_hands", 0),
+}
+# Cards a player cannot end the game with
+LAST_CARD_FORBIDDEN = frozenset({Value.DRAW_FOUR, Value.RAINBOW})
+
+
+@dataclass(frozen=True)
+class Variant:
+    """House rules, applied on top of the standard ones."""
+
+    name: str
+    label: str
+    # Effects replacing the standard ones
+    effects: dict[Value, tuple[str, int]] = field(default_factory=dict)
+    # Values that can be played on each draw card to pass its penalty on, with the
+    # stack_draw effect
+    stacks: dict[Value, frozenset[Value]] = field(default_factory=dict)
+    # Players may play a card identical to the top card out of turn
+    jump_in: bool = False
+    # A player without a playable card draws until they have one
+    draw_until_playable: bool = False
+
+
+VARIANTS: dict[str, Variant] = {
+    variant.name: variant
+    for variant in (
+        Variant("standard", "Standard"),
+        Variant(
+            "stacking",
+            "Stacking +2/+4",
+            effects={
+                Value.DRAW_TWO: ("stack_draw", 2),
+                Value.DRAW_FOUR: ("stack_draw", 4),
+            },
+            stacks={
+                Value.DRAW_TWO: frozenset({Value.DRAW_TWO, Value.DRAW_FOUR}),
+                Value.DRAW_FOUR: frozenset({Value.DRAW_FOUR}),
+            },
+        ),
+        Variant("jump_in", "Jump-in", jump_in=True),
+        Variant(
+            "seven_zero",
+            "7-0",
+            effects={
+                Value.SEVEN: ("swap_hands", 0),
+                Value.ZERO: ("rotate_hands", 0),
+            },
+        ),
+        Variant("draw_until_playable", "Draw until playable", draw_until_playable=True),
+    )
+}
+
+
+class Rules:
+    """A variant compiled into lookup tables: the effect method and amount for
+    each value by rank, None for the values without one, the cards that can be
+    played on each top card and the values that pick a player to swap hands with
+    or rotate the hands."""
+
+    def __init__(self, variant: Variant):
+        self.variant = variant
+        effects = {**EFFECTS, **variant.effects}
+        self.effects: tuple[tuple[Callable, int] | None, ...] = tuple(
+            (
+                (getattr(UnoGame, f"effect_{effects[value][0]}"), effects[value][1])
+                if value in effects
+                else None
+            )
+            for value in Value
+        )
+        self.swap_values = frozenset(
+            value for value, (name, _) in effects.items() if name == "swap_hands"
+        )
+        self.rotate_values = frozenset(
+            value for value, (name, _) in effects.items() if name == "rotate_hands"
+        )
+        keys = [(color, value) for color in Color for value in Value]
+        self.playable: dict[tuple[Color, Value], frozenset[tuple[Color, Value]]] = {
+            top: frozenset(
+                key
+                for key in keys
+                if UnoGame.card_is_eligible(Card(key[1], key[0]), Card(top[1], top[0]))
+            )
+            for top in keys
+        }
+        self.stacks = variant.stacks
+        self.last_card_forbidden = LAST_CARD_FORBIDDEN
+        self.jump_in = variant.jump_in
+        self.draw_until_playable = variant.draw_until_playable
+
+    def __reduce__(self):
+        # Pickled and copied games share the compiled rules of their variant
+        return compile_rules, (self.variant.name,)
+
+
+@lru_cache(maxsize=None)
+def compile_rules(variant: str) -> Rules:
+    return Rules(VARIANTS[variant])
+
+
 class UnoGame:
-    def __init__(self, game_id: int, host_id: int, initial_card_count: int = 7):
+    def __init__(
+        self,
+        game_id: int,
+        host_id: int,
+        initial_card_count: int = 7,
+        seed: int = None,
+        recorder=None,
+        variant: str = "standard",
+    ):
         self.id = game_id
         self.host_id = host_id
         self.initial_card_count = initial_card_count
+        # Every random decision goes through the game's own generator so a game can
+        # be replayed from its seed and the moves passed to the recorder
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.recorder = recorder
         self.current_player_id = None
         self.next_player_id = None
         self.play_order: deque[int] = deque()
@@ -101,9 +328,26 @@ class UnoGame:
         self.discard_pile: list[Card] = []
         self.players: dict[int, UnoPlayer] = {}
         self.player_id_that_has_to_say_uno = -1
-
-    @staticmethod
-    def generate_deck():
+        # Players whose moves are made by the bot, the seats it filled and the
+        # players it took over for after they left
+        self.ai_players: set[int] = set()
+        self.variant = variant
+        self.rules = compile_rules(variant)
+        # Cards the current player draws unless they stack a draw card on them
+        self.pending_draw = 0
+
+    def __setstate__(self, state: dict):
+        # Games saved before there were variants play the standard rules
+        state.setdefault("variant", "standard")
+        state.setdefault("rules", compile_rules(state["variant"]))
+        state.setdefault("pending_draw", 0)
+        self.__dict__.update(state)
+
+    def record(self, event: Event, *args) -> None:
+        if self.recorder:
+            self.recorder.record(event, *args)
+
+    def generate_deck(self):
         eligible_values = [
             value
             for value in Value
@@ -118,12 +362,13 @@ class UnoGame:
         for _ in range(4):
             new_deck.append(Card(Value.DRAW_FOUR, Color.BLACK))
             new_deck.append(Card(Value.RAINBOW, Color.BLACK))
-        if random.randint(1, 100) == 50:
+        if self.rng.randint(1, 100) == 50:
             new_deck.append(Card(Value.SWAP_HANDS, Color.WHITE))
-        random.shuffle(new_deck)
+        self.rng.shuffle(new_deck)
         return new_deck
 
     def start_game(self):
+        self.record(Event.START, self)
         self.deck = self.generate_deck()
         for _ in range(self.initial_card_count):
             for player in self.players.values():
@@ -133,7 +378,7 @@ class UnoGame:
             initial_card = self.deck.pop()
         self.discard_pile.append(initial_card)
         self.play_order = deque(self.players.keys())
-        random.shuffle(self.play_order)
+        self.rng.shuffle(self.play_order)
         self.current_player_id = self.play_order[0]
         self.next_player_id = self.play_order[1]
 
@@ -146,42 +391,107 @@ class UnoGame:
             or card.value == top_pile.value
         )
 
+    def can_play(self, player: UnoPlayer, card: Card) -> bool:
+        """Whether the player can play the card from their hand now."""
+        top_card = self.discard_pile[-1]
+        if len(player.hand) == 1 and card.value in self.rules.last_card_forbidden:
+            return False
+        if self.pending_draw:
+            return card.value in self.rules.stacks.get(top_card.value, ())
+        return (card.color, card.value) in self.rules.playable[
+            (top_card.color, top_card.value)
+        ]
+
     def has_eligible_card(self, player: UnoPlayer):
-        if len(player.hand) > 1:
-            return any(
-                card
-                for card in player.hand
-                if self.card_is_eligible(card, self.discard_pile[-1])
-            )
+        hand = player.hand
+        if len(hand) > 1:
+            if self.pending_draw:
+                stackable = self.rules.stacks.get(self.discard_pile[-1].value, ())
+                return any(hand.value_counts[value] for value in stackable)
+            return hand.playable_count(self.discard_pile[-1]) > 0
+        if not hand:
+            return False
+        return self.can_play(player, next(iter(hand)))
+
+    def can_jump_in(self, player: UnoPlayer) -> bool:
+        top_card = self.discard_pile[-1]
         return (
-            self.card_is_eligible(player.hand[-1], self.discard_pile[-1])
-            and not player.hand[-1].is_wildcard()
+            self.rules.jump_in
+            and player.id != self.current_player_id
+            and player.hand.count(top_card.color, top_card.value) > 0
         )
 
+    def jump_in(self, player: UnoPlayer) -> Card:
+        """Makes the player, who holds a card identical to the top card, the current
+        player, returns the card they have to play."""
+        self.record(Event.JUMP_IN, player.id)
+        self.play_order.rotate(-self.play_order.index(player.id))
+        self.current_player_id = player.id
+        self.next_player_id = self.play_order[1]
+        top_card = self.discard_pile[-1]
+        return player.hand.cards[(top_card.color, top_card.value)][-1]
+
     def play_card(
-        self, player: UnoPlayer, card: Card, swapped_player_id: int = None
+        self,
+        player: UnoPlayer,
+        card: Card,
+        swapped_player_id: int = None,
+        color: Color = None,
     ) -> int | None:
+        self.record(Event.PLAY, player.id, card, color, swapped_player_id)
         player.remove_from_hand(card)
+        # Wild cards only take their chosen color once they have left the hand
+        if color:
+            card.color = color
         self.discard_pile.append(card)
-        skipped_player_id = None
-        if swapped_player_id and card.value == Value.SWAP_HANDS:
-            self.swap_hands(player.id, swapped_player_id)
-        elif card.value == Value.DRAW_TWO:
-            skipped_player_id = self.skip_next_player()
-            self.draw_cards(self.players[skipped_player_id], 2)
-        elif card.value == Value.DRAW_FOUR:
-            skipped_player_id = self.skip_next_player()
-            self.draw_cards(self.players[skipped_player_id], 4)
-        elif card.value == Value.BLOCK:
-            skipped_player_id = self.skip_next_player()
-        elif card.value == Value.REVERSE:
-            if len(self.play_order) == 2:
-                skipped_player_id = self.skip_next_player()
-            else:
-                self.reverse_play_order()
+        effect = self.rules.effects[card.value.rank]
+        if effect is None:
+            return None
+        method, amount = effect
+        return method(self, player, swapped_player_id, amount)
+
+    # The effects of the cards, each returns the skipped player if there is one
+
+    def effect_skip(self, player: UnoPlayer, swapped_player_id: int, amount: int):
+        return self.skip_next_player()
+
+    def effect_skip_and_draw(
+        self, player: UnoPlayer, swapped_player_id: int, amount: int
+    ):
+        skipped_player_id = self.skip_next_player()
+        self._draw_cards(self.players[skipped_player_id], amount)
         return skipped_player_id
 
+    def effect_stack_draw(self, player: UnoPlayer, swapped_player_id: int, amount: int):
+        self.pending_draw += amount
+
+    def effect_reverse(self, player: UnoPlayer, swapped_player_id: int, amount: int):
+        if len(self.play_order) == 2:
+            return self.skip_next_player()
+        self.reverse_play_order()
+
+    def effect_swap_hands(self, player: UnoPlayer, swapped_player_id: int, amount: int):
+        if swapped_player_id:
+            self.swap_hands(player.id, swapped_player_id)
+
+    def effect_rotate_hands(
+        self, player: UnoPlayer, swapped_player_id: int, amount: int
+    ):
+        # Every hand moves to the next player in the play order
+        hands = [self.players[player_id].hand for player_id in self.play_order]
+        for player_id, hand in zip(self.play_order, hands[-1:] + hands[:-1]):
+            self.players[player_id].hand = hand
+
+    def take_penalty(self, player: UnoPlayer) -> int:
+        """Makes the player draw the stacked draw cards instead of playing, returns
+        the number of cards drawn."""
+        self.record(Event.PENALTY, player.id)
+        amount, self.pending_draw = self.pending_draw, 0
+        player.turns_skipped += 1
+        return len(self._draw_cards(player, amount))
+
     def advance_turn(self):
+        self.record(Event.ADVANCE)
         self.play_order.rotate(-1)
         self.current_player_id = self.play_order[0]
         self.next_player_id = self.play_order[1]
@@ -199,23 +509,51 @@ class UnoGame:
         self.play_order.rotate(1)
 
     def draw_card(self, player: UnoPlayer) -> Card | None:
+        self.record(Event.DRAW, player.id)
         if len(player.hand) >= 25:
             return None
-        card = self.deck.pop()
+        card = self.pop_deck()
         player.add_to_hand(card)
         return card
 
+    def draw_until_playable(self, player: UnoPlayer) -> list[Card]:
+        """Draws until a card can be played or the hand is full, the playable card
+        is the last one drawn."""
+        drawn_cards = []
+        while card := self.draw_card(player):
+            drawn_cards.append(card)
+            if self.can_play(player, card):
+                break
+        return drawn_cards
+
+    def pop_deck(self) -> Card:
+        # Stacked penalties and drawing until playable can empty the deck mid turn
+        if not self.deck:
+            self.deck.extend(self.generate_deck())
+        return self.deck.pop()
+
     def get_top_card(self):
         return self.discard_pile[-1]
 
     def draw_cards(self, player: UnoPlayer, amount: int) -> list[Card]:
+        self.record(Event.DRAW_MANY, player.id, amount)
+        return self._draw_cards(player, amount)
+
+    def timeout_penalty(self, player: UnoPlayer) -> int:
+        """Makes a player that took too long draw 2 to 4 cards, returns the amount."""
+        self.record(Event.TIMEOUT, player.id)
+        amount = self.rng.randint(2, 4)
+        self._draw_cards(player, amount)
+        return amount
+
+    def _draw_cards(self, player: UnoPlayer, amount: int) -> list[Card]:
         if len(player.hand) >= 25:
             return []
         if len(player.hand) + amount > 25:
             amount = 25 - len(player.hand)
         drawn_cards = []
         for _ in range(amount):
-            card = self.deck.pop()
+            card = self.pop_deck()
             player.add_to_hand(card)
             drawn_cards.append(card)
         return drawn_cards
@@ -230,11 +568,16 @@ class UnoGame:
         return self.players[player_id].one_card_left()
 
     def remove_player(self, player_id: int):
+        self.record(Event.REMOVE, player_id)
         if player_id == self.player_id_that_has_to_say_uno:
             self.player_id_that_has_to_say_uno = -1
         self.players.pop(player_id)
         self.play_order.remove(player_id)
 
+    def end(self, winner_id: int = None):
+        self.record(Event.END, winner_id)
+        self.recorder = None
+
     def swap_hands(self, p1_id: int, p2_id: int):
         self.players[p1_id].hand, self.players[p2_id].hand = (
             self.players[p2_id].hand,
@@ -1,5 +1,7 @@
 import nextcord
 
+from app.helpers.interactions import acknowledged
+
 
 class PaginationView(nextcord.ui.View):
     def __init__(self, embed: nextcord.Embed, pages: list, timeout: int):
@@ -35,6 +37,7 @@ class ConfirmationView(nextcord.ui.View):
         self.value = False
 
     @nextcord.ui.button(label="Yes", style=nextcord.ButtonStyle.green)
+    @acknowledged
     async def btn_yes(
         self, button: nextcord.ui.Button, interaction: nextcord.Interaction
     ):
@@ -42,6 +45,7 @@ class ConfirmationView(nextcord.ui.View):
         self.stop()
 
     @nextcord.ui.button(label="No", style=nextcord.ButtonStyle.red)
+    @acknowledged
     async def btn_no(
         self, button: nextcord.ui.Button, interaction: nextcord.Interaction
     ):
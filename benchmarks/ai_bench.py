@@ -0,0 +1,108 @@
+"""Measures the rollouts per second of the bot's move search and its win rate
+against the random and greedy policies.
+
+python -m benchmarks.ai_bench --games 100 --move-time 0.05 --workers 4
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.helpers.uno_ai import (
+    apply_move,
+    greedy_move,
+    legal_moves,
+    random_move,
+    search,
+    search_state,
+)
+from app.helpers.uno_logic import UnoGame, UnoPlayer
+
+POLICIES = {"random": random_move, "greedy": greedy_move}
+MAX_TURNS = 1000
+
+
+def new_game(player_count: int, seed: int) -> UnoGame:
+    game = UnoGame(seed, 1, seed=seed)
+    for player_id in range(1, player_count + 1):
+        game.players[player_id] = UnoPlayer(player_id, str(player_id))
+    game.start_game()
+    return game
+
+
+def rollout_rate(player_count: int, seconds: float, seed: int) -> float:
+    game = new_game(player_count, seed)
+    # The search returns right away when there is only one move to make
+    while len(legal_moves(game, game.players[game.current_player_id])) == 1:
+        seed += 1
+        game = new_game(player_count, seed)
+    state = search_state(game, game.current_player_id)
+    start = time.perf_counter()
+    _, rollouts = search(state, seconds, seed=seed)
+    return rollouts / (time.perf_counter() - start)
+
+
+def play_game(
+    player_count: int, policy_name: str, move_time: float, seed: int
+) -> int | None:
+    """Plays a game with the searching bot as player 1 and the policy as every
+    other player, returns the winner."""
+    game, rng = new_game(player_count, seed), random.Random(seed)
+    policy = POLICIES[policy_name]
+    for _ in range(MAX_TURNS):
+        player = game.players[game.current_player_id]
+        if player.id == 1:
+            move, _ = search(search_state(game, player.id), move_time, seed=seed)
+        else:
+            move = policy(game, player, rng)
+        apply_move(game, player, move)
+        winner = game.check_winner()
+        if winner is not None:
+            return winner
+        game.advance_turn()
+    return None
+
+
+def main(games: int, player_count: int, move_time: float, workers: int, seed: int):
+    print("rollouts per second")
+    for count in (2, 4):
+        rate = rollout_rate(count, 1.0, seed)
+        print(f"{count} players{'':<31} {rate:>10.0f}")
+    # By chance alone the bot wins one game in player_count
+    print(
+        f"\nwin rate over {games} games, {player_count} players, "
+        f"{move_time * 1000:.0f} ms per move (chance {1 / player_count:.0%})"
+    )
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for policy_name in POLICIES:
+            start = time.perf_counter()
+            winners = list(
+                pool.map(
+                    play_game,
+                    [player_count] * games,
+                    [policy_name] * games,
+                    [move_time] * games,
+                    range(seed, seed + games),
+                )
+            )
+            elapsed = time.perf_counter() - start
+            wins = winners.count(1)
+            print(f"against {policy_name:<32} {wins / games:>10.1%} ({elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--players", type=int, default=2)
+    parser.add_argument("--move-time", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    main(
+        arguments.games,
+        arguments.players,
+        arguments.move_time,
+        arguments.workers,
+        arguments.seed,
+    )
@@ -0,0 +1,380 @@
+"""In-process stand-ins for the parts of Discord and of the storage layer that the
+Uno cog talks to.
+
+Every REST call waits for a random latency and a share of them are rate limited
+first, then retried after retry_after like nextcord's HTTP client does. Views are
+registered in nextcord's own ViewStore, so their timeouts and the dispatch of
+button presses behave like they do with a gateway connection. Messages and views
+sent to a channel or to a user are passed to the listeners set by the benchmark.
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Callable
+
+import nextcord
+from nextcord.ui.view import ViewStore
+
+# Discord ids are far larger than the bot seat ids
+FIRST_ID = 10**17
+# Seconds Discord waits for the first response to an interaction
+ACK_DEADLINE = 3.0
+
+
+class FakeRest:
+    """Answers REST calls after a random latency, rate limiting some of them."""
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.5,
+        rate_limit_chance: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.calls: Counter[str] = Counter()
+        self.rate_limited = 0
+
+    def delay(self) -> float:
+        return self.latency * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def request(self, route: str) -> None:
+        self.calls[route] += 1
+        while self.rng.random() < self.rate_limit_chance:
+            # The 429 response, then the wait it asks for before retrying
+            self.rate_limited += 1
+            await asyncio.sleep(self.delay() + self.retry_after)
+        await asyncio.sleep(self.delay())
+
+
+class FakeDiscord:
+    """State shared by the stand-ins: the REST latency, the views and the ids."""
+
+    def __init__(self, rest: FakeRest):
+        self.rest = rest
+        self.views = ViewStore(None)
+        self.ids = itertools.count(FIRST_ID)
+        self.tasks: set[asyncio.Task] = set()
+        self.on_message: Callable[["FakeMessage"], None] | None = None
+
+    def next_id(self) -> int:
+        return next(self.ids)
+
+    def spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def store_view(self, view: nextcord.ui.View | None, message_id: int) -> None:
+        if view is None or view.is_finished():
+            return
+        # Serializing the components is part of the cost of every send
+        view.to_components()
+        self.views.add_view(view, message_id)
+
+    def press(self, item: nextcord.ui.Item, interaction: "FakeInteraction") -> None:
+        """Dispatches a component interaction like the gateway would."""
+        interaction.data.setdefault("custom_id", item.custom_id)
+        self.views.dispatch(item.type.value, item.custom_id, interaction)
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self.bot = bot
+        self.avatar = None
+        self.display_avatar = SimpleNamespace(
+            url=f"https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png"
+        )
+
+
+class FakeBot:
+    def __init__(self, discord: FakeDiscord):
+        self.discord = discord
+        self.user = FakeUser(discord.next_id(), "Uno", bot=True)
+        self.guilds: dict[int, FakeGuild] = {}
+        self.users: dict[int, FakeUser] = {}
+
+    def get_guild(self, guild_id: int) -> "FakeGuild | None":
+        return self.guilds.get(guild_id)
+
+    def get_user(self, user_id: int) -> FakeUser | None:
+        return self.users.get(user_id)
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await self.discord.rest.request("fetch_user")
+        return self.users.get(user_id) or FakeUser(user_id, str(user_id))
+
+
+class FakeGuild:
+    def __init__(self, discord: FakeDiscord):
+        self.id = discord.next_id()
+        self.name = f"Guild {self.id}"
+        self.roles = []
+        self.channels: dict[int, FakeTextChannel] = {}
+
+    @property
+    def text_channels(self) -> list["FakeTextChannel"]:
+        return list(self.channels.values())
+
+    def get_channel(self, channel_id: int) -> "FakeTextChannel | None":
+        return self.channels.get(channel_id)
+
+    def get_channel_or_thread(self, channel_id: int) -> "FakeTextChannel | None":
+        return self.channels.get(channel_id)
+
+    def get_member(self, user_id: int) -> None:
+        # Members are not cached without the members intent
+        return None
+
+
+class FakeMessage:
+    def __init__(
+        self,
+        discord: FakeDiscord,
+        channel: "FakeTextChannel | None",
+        content: str = None,
+        embeds: list[nextcord.Embed] = (),
+        view: nextcord.ui.View = None,
+    ):
+        self.discord = discord
+        self.id = discord.next_id()
+        self.channel = channel
+        self.content = content
+        self.embeds = list(embeds)
+        self.view = view
+        self.deleted = False
+
+    async def edit(self, content=..., embed=..., view=..., **kwargs) -> "FakeMessage":
+        await self.discord.rest.request("edit_message")
+        if self.deleted:
+            raise nextcord.NotFound(SimpleNamespace(status=404, reason=""), "")
+        if content is not ...:
+            self.content = content
+        if embed is not ...:
+            self.embeds = [embed] if embed else []
+            if embed:
+                embed.to_dict()
+        if view is not ...:
+            self.view = view
+            self.discord.store_view(view, self.id)
+        return self
+
+    async def delete(self, delay: float = None) -> None:
+        if delay:
+            self.discord.spawn(self.delete_later(delay))
+            return
+        await self.discord.rest.request("delete_message")
+        if self.deleted:
+            raise nextcord.NotFound(SimpleNamespace(status=404, reason=""), "")
+        self.deleted = True
+        if self.channel is not None:
+            self.channel.messages.pop(self.id, None)
+
+    async def delete_later(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        try:
+            await self.delete()
+        except nextcord.NotFound:
+            pass
+
+
+class FakeTextChannel:
+    def __init__(self, discord: FakeDiscord, guild: FakeGuild, name: str = "uno"):
+        self.discord = discord
+        self.guild = guild
+        self.id = discord.next_id()
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.messages: dict[int, FakeMessage] = {}
+        guild.channels[self.id] = self
+
+    def __str__(self):
+        return self.name
+
+    async def send(
+        self,
+        content: str = None,
+        embed: nextcord.Embed = None,
+        embeds: list[nextcord.Embed] = None,
+        view: nextcord.ui.View = None,
+        delete_after: float = None,
+        **kwargs,
+    ) -> FakeMessage:
+        embeds = embeds or ([embed] if embed else [])
+        for item in embeds:
+            item.to_dict()
+        await self.discord.rest.request("send_message")
+        message = FakeMessage(self.discord, self, content, embeds, view)
+        self.messages[message.id] = message
+        self.discord.store_view(view, message.id)
+        if delete_after is not None:
+            await message.delete(delay=delete_after)
+        if self.discord.on_message:
+            self.discord.on_message(message)
+        return message
+
+    async def delete_messages(self, messages) -> None:
+        await self.discord.rest.request("bulk_delete")
+        for message in messages:
+            self.messages.pop(message.id, None)
+
+    def get_partial_message(self, message_id: int) -> FakeMessage:
+        return self.messages.get(message_id) or FakeMessage(self.discord, self)
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+        self._responded = False
+
+    def is_done(self) -> bool:
+        return self._responded
+
+    async def defer(self, ephemeral: bool = False, **kwargs) -> None:
+        await self.interaction.discord.rest.request("defer")
+        self.check_deadline()
+        self._responded = True
+
+    async def send_message(self, content: str = None, view=None, **kwargs):
+        await self.interaction.discord.rest.request("interaction_response")
+        self.check_deadline()
+        self._responded = True
+        self.interaction.original = FakeMessage(
+            self.interaction.discord, None, content, view=view
+        )
+        return self.interaction.original
+
+    def check_deadline(self) -> None:
+        """Fails a first response that arrives after Discord's 3 seconds."""
+        age = (nextcord.utils.utcnow() - self.interaction.created_at).total_seconds()
+        if age > ACK_DEADLINE:
+            raise nextcord.NotFound(SimpleNamespace(status=404, reason=""), "")
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction = interaction
+
+    async def send(self, content: str = None, view=None, **kwargs) -> FakeMessage:
+        await self.interaction.discord.rest.request("followup")
+        message = FakeMessage(self.interaction.discord, None, content, view=view)
+        if self.interaction.original is None:
+            self.interaction.original = message
+        return message
+
+    async def edit_message(self, message_id: int, embed=None, **kwargs) -> None:
+        channel = self.interaction.channel
+        message = channel.messages.get(message_id) or FakeMessage(
+            self.interaction.discord, channel
+        )
+        await message.edit(embed=embed, **kwargs)
+
+
+class FakeInteraction:
+    """An application command or component interaction from a user.
+
+    Views sent to the user and message edits are passed to on_view, which is how a
+    simulated player sees the menus it has to pick from.
+    """
+
+    def __init__(
+        self,
+        discord: FakeDiscord,
+        user: FakeUser,
+        guild: FakeGuild,
+        channel: FakeTextChannel,
+        message: FakeMessage = None,
+        on_view: Callable[
+            ["FakeInteraction", nextcord.ui.View | None, str], None
+        ] = None,
+        data: dict = None,
+    ):
+        self.discord = discord
+        self.id = discord.next_id()
+        self.user = user
+        self.guild = guild
+        self.channel = channel
+        self.message = message
+        self.data = data or {}
+        self._state = None
+        self.on_view = on_view
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.original: FakeMessage | None = None
+        self.created_at = nextcord.utils.utcnow()
+
+    def is_expired(self) -> bool:
+        age = (nextcord.utils.utcnow() - self.created_at).total_seconds()
+        return age > 15 * 60
+
+    async def send(
+        self, content: str = None, view: nextcord.ui.View = None, **kwargs
+    ) -> FakeMessage:
+        if self.response.is_done():
+            message = await self.followup.send(content, view=view, **kwargs)
+        else:
+            message = await self.response.send_message(content, view=view, **kwargs)
+        self.discord.store_view(view, message.id)
+        if self.on_view:
+            self.on_view(self, view, content)
+        return message
+
+    async def edit_original_message(
+        self, content: str = ..., view: nextcord.ui.View = ..., **kwargs
+    ) -> FakeMessage:
+        await self.discord.rest.request("edit_original")
+        message = self.original or FakeMessage(self.discord, None)
+        if content is not ...:
+            message.content = content
+        if view is not ...:
+            message.view = view
+            self.discord.store_view(view, message.id)
+        if self.on_view:
+            self.on_view(self, message.view, message.content)
+        return message
+
+    async def delete_original_message(self) -> None:
+        await self.discord.rest.request("delete_original")
+
+
+class FakeStorage:
+    """The stats storage. Its calls block like the Firebase client's do and a
+    share of them fail."""
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.reads = 0
+        self.writes = 0
+        self.failures = 0
+        self.applied: set[str] = set()
+
+    def get_guild_stats(self, guild_id: int, since_day: int) -> tuple[dict, dict]:
+        self.reads += 1
+        time.sleep(self.latency)
+        return {}, {}
+
+    def is_write_applied(self, write) -> bool:
+        return write.write_id in self.applied
+
+    def apply_stats_write(self, write) -> None:
+        time.sleep(self.latency)
+        if self.rng.random() < self.failure_rate:
+            self.failures += 1
+            raise ConnectionError("Storage unavailable")
+        self.writes += 1
+        self.applied.add(write.write_id)
@@ -0,0 +1,92 @@
+"""Compares ranking leaderboard pages by sorting a dict of players against the
+columnar store.
+
+python -m benchmarks.leaderboard_bench --players 1000000
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.data.leaderboard import DictLeaderboard, ColumnarLeaderboard
+
+
+def generate_players(count: int, seed: int) -> dict[int, SimpleNamespace]:
+    rng = np.random.default_rng(seed)
+    played = rng.geometric(0.05, count)
+    wins = rng.binomial(played, rng.uniform(0.05, 0.6, count))
+    drawn_cards = rng.integers(0, 20, count) * played
+    turns_skipped = rng.integers(0, 3, count) * played
+    played_cards = rng.integers(3, 15, count) * played
+    user_ids = rng.choice(2**62, count, replace=False)
+    return {
+        int(user_id): SimpleNamespace(
+            user_id=int(user_id),
+            wins=int(wins[i]),
+            played=int(played[i]),
+            drawn_cards=int(drawn_cards[i]),
+            turns_skipped=int(turns_skipped[i]),
+            played_cards=int(played_cards[i]),
+        )
+        for i, user_id in enumerate(user_ids)
+    }
+
+
+def timed(label: str, function, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<40} {elapsed * 1000:>10.2f} ms")
+    return result
+
+
+def main(player_count: int, page_length: int, seed: int):
+    players = generate_players(player_count, seed)
+    print(f"{player_count} players, {page_length} per page")
+    columnar = timed(
+        "columnar build", lambda: ColumnarLeaderboard.from_players(players)
+    )
+    some_player = next(iter(players.values()))
+    for board in ("wins", "winrate"):
+        print(f"\n{board}")
+        dict_board = DictLeaderboard(players)
+        # Every update invalidates the sorted board, so each request pays for a sort
+        expected = timed(
+            "dict first page (sort)",
+            lambda: dict_board.update(None) or dict_board.page(board, 0, page_length),
+            repeat=3,
+        )
+        first = timed(
+            "columnar first page",
+            lambda: columnar.page(board, 0, page_length),
+            repeat=10,
+        )
+        deep_start = 1000 * page_length
+        deep = timed(
+            "columnar page 1000",
+            lambda: columnar.page(board, deep_start, deep_start + page_length),
+            repeat=10,
+        )
+        timed("columnar count", lambda: columnar.count(board), repeat=10)
+        rank = timed(
+            "columnar rank lookup",
+            lambda: columnar.rank(board, some_player.user_id),
+            repeat=10,
+        )
+        assert first == expected
+        assert deep == dict_board.page(board, deep_start, deep_start + page_length)
+        assert rank == dict_board.rank(board, some_player.user_id)
+    some_player.wins += 1
+    timed("columnar update", lambda: columnar.update(some_player), repeat=1000)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=1_000_000)
+    parser.add_argument("--page-length", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    main(arguments.players, arguments.page_length, arguments.seed)
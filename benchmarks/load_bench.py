@@ -0,0 +1,304 @@
+"""Drives simulated games through the Uno cog with in-process stand-ins for Discord
+and the storage layer, and reports what one process sustains at each number of
+concurrent games.
+
+Every game is hosted with /uno play in its own server, its players join through
+the lobby buttons and play random cards through the game buttons and menus. The
+turn latency is the time from a player's last press in a turn to the message of
+the next turn, the event loop lag is how late a timer that should fire every
+50 ms wakes up and late counts the button presses acknowledged after Discord's
+3 second deadline.
+
+python -m benchmarks.load_bench --games 10,100,300 --latency 0.05 --rate-limit 0.01
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import resource
+import tempfile
+import time
+
+import nextcord
+import numpy as np
+
+from app.helpers import metrics
+from app.helpers.uno_logic import VARIANTS
+from benchmarks.fakes import (
+    FakeBot,
+    FakeDiscord,
+    FakeGuild,
+    FakeInteraction,
+    FakeMessage,
+    FakeRest,
+    FakeStorage,
+    FakeTextChannel,
+    FakeUser,
+)
+
+LAG_INTERVAL = 0.05
+
+
+def rss_megabytes() -> float:
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # The peak instead of the current size where /proc is not available
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SimulatedGame:
+    """The players of one game, reacting to the messages and menus the cog sends them."""
+
+    def __init__(self, bench: "LoadBench", player_count: int):
+        self.bench = bench
+        self.discord = bench.discord
+        self.guild = FakeGuild(self.discord)
+        self.channel = FakeTextChannel(self.discord, self.guild)
+        self.players = [
+            FakeUser(self.discord.next_id(), f"player{index}")
+            for index in range(player_count)
+        ]
+        self.last_press: float | None = None
+        self.turn_message: FakeMessage | None = None
+        bench.bot.guilds[self.guild.id] = self.guild
+        bench.games[self.channel.id] = self
+
+    def interaction(
+        self, user: FakeUser, message: FakeMessage = None, data: dict = None
+    ) -> FakeInteraction:
+        return FakeInteraction(
+            self.discord,
+            user,
+            self.guild,
+            self.channel,
+            message,
+            on_view=self.on_view,
+            data=data,
+        )
+
+    async def press(
+        self, user: FakeUser, message, item, data: dict = None, delay: float = None
+    ) -> None:
+        await asyncio.sleep(self.bench.think_time() if delay is None else delay)
+        if item.view.is_finished():
+            return
+        self.last_press = time.perf_counter()
+        self.discord.press(item, self.interaction(user, message, data))
+
+    async def run(self) -> None:
+        host = self.players[0]
+        await self.bench.uno.Uno.uno_play.callback(
+            self.bench.cog,
+            self.interaction(host),
+            players=len(self.players),
+            cards=self.bench.cards,
+            rules=self.bench.rules,
+        )
+
+    def on_message(self, message: FakeMessage) -> None:
+        uno_ext = self.bench.uno
+        if isinstance(message.view, uno_ext.UnoStartGameView):
+            for user in self.players[1:]:
+                self.discord.spawn(
+                    self.press(user, message, message.view.btn_join_game)
+                )
+        elif isinstance(message.view, uno_ext.UnoOngoingGameView):
+            if self.last_press is not None:
+                self.bench.turn_latencies.append(time.perf_counter() - self.last_press)
+            self.bench.turns += 1
+            self.turn_message = message
+            game = uno_ext.ongoing_games[message.view.game_id]
+            for user in self.players:
+                player = game.players[user.id]
+                if user.id == game.current_player_id:
+                    self.discord.spawn(
+                        self.press(user, message, message.view.btn_play_card)
+                    )
+                elif player.one_card_left() and not player.said_uno:
+                    self.discord.spawn(
+                        self.press(user, message, message.view.btn_say_uno)
+                    )
+                elif game.can_jump_in(player):
+                    self.discord.spawn(
+                        self.press(user, message, message.view.btn_play_card)
+                    )
+
+    def on_view(self, interaction: FakeInteraction, view, content: str | None) -> None:
+        """Picks a random option from the menus sent to a player."""
+        uno_ext, rng = self.bench.uno, self.bench.rng
+        user, message = interaction.user, interaction.original
+        if view is None or view.is_finished():
+            # A menu timed out before the pick arrived, the turn starts over
+            if content and content.endswith("Press play again.") and self.turn_message:
+                self.bench.retries += 1
+                turn_view = self.turn_message.view
+                self.discord.spawn(
+                    self.press(user, self.turn_message, turn_view.btn_play_card)
+                )
+            return
+        if isinstance(view, uno_ext.ChooseCardView):
+            select = next(
+                (item for item in view.children if hasattr(item, "cards")), None
+            )
+            if select is not None:
+                value = rng.choice(list(select.cards))
+                self.discord.spawn(
+                    self.press(user, message, select, data={"values": [value]})
+                )
+                return
+            choices = [item for item in view.children if not item.disabled]
+        elif isinstance(view, (uno_ext.PickColorView, uno_ext.PickPlayerView)):
+            choices = view.children
+        else:
+            return
+        self.discord.spawn(self.press(user, message, rng.choice(choices)))
+
+
+class LoadBench:
+    def __init__(self, uno, cog, discord: FakeDiscord, bot: FakeBot, arguments):
+        self.uno = uno
+        self.cog = cog
+        self.discord = discord
+        self.bot = bot
+        self.cards = arguments.cards
+        self.rules = arguments.rules
+        self.think = arguments.think
+        self.rng = random.Random(arguments.seed)
+        self.games: dict[int, SimulatedGame] = {}
+        self.turns = 0
+        self.retries = 0
+        self.turn_latencies: list[float] = []
+        self.lags: list[float] = []
+        self.peak_rss = 0.0
+        self.errors = 0
+        discord.on_message = self.on_message
+
+    def think_time(self) -> float:
+        return self.think * self.rng.uniform(0.5, 1.5)
+
+    def on_message(self, message: FakeMessage) -> None:
+        game = self.games.get(message.channel.id)
+        if game is not None:
+            game.on_message(message)
+
+    async def monitor(self) -> None:
+        samples = 0
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(time.perf_counter() - start - LAG_INTERVAL)
+            samples += 1
+            if samples % 20 == 0:
+                self.peak_rss = max(self.peak_rss, rss_megabytes())
+
+    async def on_view_error(self, view, error, item, interaction) -> None:
+        self.errors += 1
+
+    async def run(self, game_count: int, player_count: int) -> float:
+        # Errors raised by the button callbacks are counted instead of printed
+        nextcord.ui.View.on_error = lambda view, *args: self.on_view_error(view, *args)
+        games = [SimulatedGame(self, player_count) for _ in range(game_count)]
+        monitor = asyncio.create_task(self.monitor())
+        start = time.perf_counter()
+        await asyncio.gather(*(game.run() for game in games))
+        elapsed = time.perf_counter() - start
+        monitor.cancel()
+        self.peak_rss = max(self.peak_rss, rss_megabytes())
+        return elapsed
+
+
+def deadline_misses() -> int:
+    return sum(
+        count
+        for name, count in metrics.counters.items()
+        if name.startswith("interactions.deadline_misses.")
+    )
+
+
+def milliseconds(samples: list[float], percentile: float) -> str:
+    if not samples:
+        return "-"
+    return f"{np.percentile(samples, percentile) * 1000:.1f}"
+
+
+async def run_level(uno, game_count: int, arguments) -> None:
+    rest = FakeRest(
+        latency=arguments.latency,
+        rate_limit_chance=arguments.rate_limit,
+        retry_after=arguments.retry_after,
+        seed=arguments.seed,
+    )
+    storage = FakeStorage(arguments.storage_latency, arguments.storage_failures)
+    uno.stats_spool.writer = storage.apply_stats_write
+    uno.guild_stats.loader = storage.get_guild_stats
+    uno.guild_stats.is_applied = storage.is_write_applied
+    discord = FakeDiscord(rest)
+    bot = FakeBot(discord)
+    cog = uno.Uno(bot)
+    bench = LoadBench(uno, cog, discord, bot, arguments)
+    misses = deadline_misses()
+    try:
+        elapsed = await bench.run(game_count, arguments.players)
+    finally:
+        cog.cog_unload()
+    print(
+        f"{game_count:>6} {bench.turns:>7} {bench.turns / elapsed:>8.1f} "
+        f"{milliseconds(bench.turn_latencies, 50):>9} "
+        f"{milliseconds(bench.turn_latencies, 99):>9} "
+        f"{milliseconds(bench.lags, 50):>8} {milliseconds(bench.lags, 99):>8} "
+        f"{max(bench.lags, default=0) * 1000:>8.1f} "
+        f"{sum(rest.calls.values()):>7} {rest.rate_limited:>5} "
+        f"{storage.writes:>7} {len(uno.stats_spool):>7} {bench.errors:>6} "
+        f"{deadline_misses() - misses:>5} {bench.peak_rss:>7.1f}"
+    )
+
+
+async def main(arguments) -> None:
+    # Settings are read when the cog is imported, the limits are lifted so games
+    # are not queued nor the simulated players throttled, and the game logs are
+    # kept out of the repository
+    levels = [int(level) for level in arguments.games.split(",")]
+    for name in ("MAX_ACTIVE_GAMES", "MAX_OPEN_LOBBIES"):
+        os.environ[name] = str(max(levels))
+    os.environ["BUTTON_PRESS_RATE"] = "1000"
+    directory = tempfile.mkdtemp(prefix="uno-load-")
+    os.environ.setdefault("GAME_LOG_DIR", os.path.join(directory, "game_logs"))
+    os.environ.setdefault("STATS_SPOOL_DIR", os.path.join(directory, "stats_spool"))
+    from app.extensions import uno_ext
+
+    print(
+        f"{arguments.players} players per game, {arguments.latency * 1000:.0f} ms REST "
+        f"latency, {arguments.rate_limit:.1%} rate limited, "
+        f"{arguments.storage_latency * 1000:.0f} ms storage latency, "
+        f"{arguments.storage_failures:.0%} storage failures"
+    )
+    print(
+        f"{'games':>6} {'turns':>7} {'turns/s':>8} {'turn p50':>9} {'turn p99':>9} "
+        f"{'lag p50':>8} {'lag p99':>8} {'lag max':>8} {'REST':>7} {'429s':>5} "
+        f"{'writes':>7} {'pending':>7} {'errors':>6} {'late':>5} {'RSS MB':>7}"
+    )
+    for game_count in levels:
+        await run_level(uno_ext, game_count, arguments)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", default="10,100,300")
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--cards", type=int, default=7)
+    parser.add_argument("--rules", default="standard", choices=list(VARIANTS))
+    parser.add_argument("--think", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=float, default=0.01)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--storage-latency", type=float, default=0.05)
+    parser.add_argument("--storage-failures", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    # Failed storage writes are counted in the pending column instead of logged
+    logging.basicConfig(level=logging.ERROR)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+"""Compares the lobby edited on every join with the debounced lobby: bursts of
+players press Join / Leave on a lobby within a short window, and each burst reports
+the REST calls it took, the edits of the lobby message and the time from the last
+press to the lobby showing every player that joined.
+
+python -m benchmarks.lobby_bench --bursts 20 --joiners 10 --window 1.0
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.fakes import (
+    FakeDiscord,
+    FakeGuild,
+    FakeInteraction,
+    FakeRest,
+    FakeTextChannel,
+    FakeUser,
+)
+
+SETTLE_TIMEOUT = 30
+POLL_INTERVAL = 0.01
+
+
+def eager_view_class(uno) -> type:
+    class EagerLobbyView(uno.UnoStartGameView):
+        """Edits the lobby on every join and leave, as it was before the edits
+        were debounced."""
+
+        def update_lobby(self, interaction, game):
+            if len(game.players) == self.player_count:
+                self.stop()
+                return
+            embed = interaction.message.embeds[0]
+            embed.description = uno.lobby_description(game, self.player_count)
+            asyncio.create_task(
+                interaction.followup.edit_message(
+                    message_id=interaction.message.id, embed=embed
+                )
+            )
+
+    return EagerLobbyView
+
+
+async def run_burst(uno, view_class: type, arguments, seed: int) -> dict:
+    rng = random.Random(seed)
+    rest = FakeRest(
+        latency=arguments.latency, rate_limit_chance=arguments.rate_limit, seed=seed
+    )
+    discord = FakeDiscord(rest)
+    guild = FakeGuild(discord)
+    channel = FakeTextChannel(discord, guild)
+    host = FakeUser(discord.next_id(), "host")
+    game = uno.UnoGame(discord.next_id(), host.id)
+    uno.register_game(game, channel.id)
+    game.players[host.id] = uno.UnoPlayer(host.id, host.name)
+    # Room for everyone, so the lobby stays open through the burst
+    player_count = arguments.joiners + 2
+    view = view_class(game.id, player_count=player_count, timeout=None)
+    embed = uno.Embed(
+        title="Uno Game", description=uno.lobby_description(game, player_count)
+    )
+    message = await channel.send(embed=embed, view=view)
+    rest.calls.clear()
+    users = [
+        FakeUser(discord.next_id(), f"player{index}")
+        for index in range(arguments.joiners)
+    ]
+    offsets = sorted(rng.uniform(0, arguments.window) for _ in users)
+    start = time.perf_counter()
+    for user, offset in zip(users, offsets):
+        await asyncio.sleep(max(0.0, start + offset - time.perf_counter()))
+        interaction = FakeInteraction(discord, user, guild, channel, message=message)
+        discord.press(view.btn_join_game, interaction)
+    last_press = time.perf_counter()
+    expected = uno.lobby_description(game, player_count)
+    settled = None
+    while time.perf_counter() - last_press < SETTLE_TIMEOUT:
+        await asyncio.sleep(POLL_INTERVAL)
+        joined = len(game.players) - 1 == arguments.joiners
+        expected = uno.lobby_description(game, player_count)
+        if joined and message.embeds[0].description == expected:
+            settled = time.perf_counter() - last_press
+            break
+    # The edits still on their way are counted too
+    await asyncio.sleep(uno.LOBBY_UPDATE_DELAY + arguments.latency * 4)
+    view.stop()
+    uno.unregister_game(game.id, channel.id)
+    return {
+        "rest": sum(rest.calls.values()),
+        "edits": rest.calls["edit_message"],
+        "lost": arguments.joiners - (len(game.players) - 1),
+        "shown": message.embeds[0].description == expected,
+        "settled": settled,
+    }
+
+
+def milliseconds(samples: list[float], percentile: float) -> str:
+    if not samples:
+        return "-"
+    return f"{np.percentile(samples, percentile) * 1000:.0f}"
+
+
+async def main(arguments) -> None:
+    # The game logs and stats spool are kept out of the repository
+    directory = tempfile.mkdtemp(prefix="uno-lobby-")
+    os.environ.setdefault("GAME_LOG_DIR", os.path.join(directory, "game_logs"))
+    os.environ.setdefault("STATS_SPOOL_DIR", os.path.join(directory, "stats_spool"))
+    from app.extensions import uno_ext
+
+    print(
+        f"{arguments.bursts} bursts of {arguments.joiners} joins within "
+        f"{arguments.window:.1f} s, {arguments.latency * 1000:.0f} ms REST latency, "
+        f"{arguments.rate_limit:.1%} rate limited"
+    )
+    print(
+        f"{'':<12} {'REST':>7} {'edits':>7} {'lost':>6} {'stale':>6} "
+        f"{'shown p50':>10} {'shown p99':>10}"
+    )
+    modes = [
+        ("every join", eager_view_class(uno_ext)),
+        ("debounced", uno_ext.UnoStartGameView),
+    ]
+    for label, view_class in modes:
+        results = [
+            await run_burst(uno_ext, view_class, arguments, arguments.seed + index)
+            for index in range(arguments.bursts)
+        ]
+        settled = [r["settled"] for r in results if r["settled"] is not None]
+        print(
+            f"{label:<12} {np.mean([r['rest'] for r in results]):>7.1f} "
+            f"{np.mean([r['edits'] for r in results]):>7.1f} "
+            f"{sum(r['lost'] for r in results):>6} "
+            f"{sum(not r['shown'] for r in results):>6} "
+            f"{milliseconds(settled, 50):>10} {milliseconds(settled, 99):>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--joiners", type=int, default=10)
+    parser.add_argument("--window", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,66 @@
+"""Reports where the import time of the bot goes, like `python -X importtime`.
+
+Every run imports the modules in a fresh interpreter, the storage client
+(firebase_admin and the google and grpc stacks under it) should not show up
+as it is only imported when the first stats are read or written.
+
+python -m benchmarks.startup_bench app.extensions.uno_ext --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFERRED_PACKAGES = ("firebase_admin", "google", "grpc")
+
+
+def import_times(modules: list[str]) -> dict[str, tuple[int, int]]:
+    """Self and cumulative import time in microseconds of every imported module."""
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(self_time), int(cumulative)
+    return times
+
+
+def main(modules: list[str], runs: int, top: int):
+    totals, packages = [], defaultdict(list)
+    for _ in range(runs):
+        times = import_times(modules)
+        totals.append(sum(self_time for self_time, _ in times.values()))
+        by_package = defaultdict(int)
+        for name, (self_time, _) in times.items():
+            by_package[name.split(".")[0]] += self_time
+        for package, total in by_package.items():
+            packages[package].append(total)
+    print(f"Importing {', '.join(modules)}, median of {runs} runs")
+    print(f"{'total':<30} {statistics.median(totals) / 1000:>10.1f} ms")
+    ranked = sorted(packages.items(), key=lambda p: statistics.median(p[1]))
+    for package, package_times in reversed(ranked[-top:]):
+        print(f"{package:<30} {statistics.median(package_times) / 1000:>10.1f} ms")
+    loaded = [package for package in DEFERRED_PACKAGES if package in packages]
+    if loaded:
+        print(f"Deferred packages imported at startup: {', '.join(loaded)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "modules", nargs="*", default=["main", "app.extensions.uno_ext"]
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    arguments = parser.parse_args()
+    main(arguments.modules, arguments.runs, arguments.top)
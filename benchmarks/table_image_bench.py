@@ -0,0 +1,86 @@
+"""Measures the image mode: the time to rasterize the sprite atlas, to draw and
+encode a table, and the cost per turn of random games shown as table images with
+the cache of encoded images.
+
+python -m benchmarks.table_image_bench --games 50 --players 4
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.helpers.table_image import TableRenderer, table_state
+from app.helpers.uno_ai import apply_move, rollout_move
+from app.helpers.uno_logic import UnoGame, UnoPlayer
+
+MAX_TURNS = 1000
+
+
+def game_states(player_count: int, seed: int) -> list:
+    """The table shown at every turn of a random game."""
+    game, rng = UnoGame(seed, 1, seed=seed), random.Random(seed)
+    for player_id in range(1, player_count + 1):
+        game.players[player_id] = UnoPlayer(player_id, f"player{player_id}")
+    game.start_game()
+    states = [table_state(game)]
+    for _ in range(MAX_TURNS):
+        player = game.players[game.current_player_id]
+        apply_move(game, player, rollout_move(game, player, rng))
+        if game.check_winner() is not None:
+            break
+        game.advance_turn()
+        states.append(table_state(game))
+    return states
+
+
+def main(games: int, player_count: int, cache_size: int, seed: int):
+    start = time.perf_counter()
+    renderer = TableRenderer(cache_size)
+    print(f"{'atlas':<40} {(time.perf_counter() - start) * 1000:>10.1f} ms")
+    states = [
+        state
+        for game_seed in range(seed, seed + games)
+        for state in game_states(player_count, game_seed)
+    ]
+    draw_times, encode_times, sizes = [], [], []
+    for state in states[:200]:
+        start = time.perf_counter()
+        image = renderer.draw(state)
+        middle = time.perf_counter()
+        sizes.append(len(renderer.encode(image)))
+        draw_times.append(middle - start)
+        encode_times.append(time.perf_counter() - middle)
+    print(f"{'draw':<40} {statistics.median(draw_times) * 1000:>10.2f} ms")
+    print(f"{'encode':<40} {statistics.median(encode_times) * 1000:>10.2f} ms")
+    print(f"{'image size':<40} {statistics.median(sizes) / 1024:>10.1f} KiB")
+    turn_times, hits = [], 0
+    for state in states:
+        start = time.perf_counter()
+        if renderer.get(state) is None:
+            renderer.put(state, renderer.render(state))
+        else:
+            hits += 1
+        turn_times.append(time.perf_counter() - start)
+    print(
+        f"\n{len(states)} turns of {games} games with {player_count} players, "
+        f"{cache_size} cached images"
+    )
+    print(f"{'cache hits':<40} {hits / len(states):>10.1%}")
+    print(f"{'per turn, median':<40} {statistics.median(turn_times) * 1000:>10.3f} ms")
+    print(f"{'per turn, mean':<40} {statistics.mean(turn_times) * 1000:>10.3f} ms")
+    start = time.perf_counter()
+    for state in states:
+        renderer.get(state)
+    elapsed = time.perf_counter() - start
+    print(f"{'cached turn':<40} {elapsed / len(states) * 1e6:>10.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--cache-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    main(arguments.games, arguments.players, arguments.cache_size, arguments.seed)
@@ -1,29 +1,140 @@
 import os
-from dotenv import load_dotenv
-from firebase_admin import db, credentials, initialize_app as firebase_init
 import json
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    return bool(int(os.environ.get(name, int(default))))
+
+
+@dataclass(frozen=True)
+class Settings:
+    dev: bool
+    bot_token: str | None
+    server_ids: list[int]
+    max_games_per_channel: int
+    max_active_games: int
+    max_guild_games: int
+    max_open_lobbies: int
+    max_guild_lobbies: int
+    lobby_queue_length: int
+    lobby_queue_timeout: int
+    lobby_idle_timeout: int
+    lobby_max_lifetime: int
+    matchmaking_max_wait: int
+    game_log_dir: str
+    stats_spool_dir: str
+    snapshot_dir: str
+    insights_path: str
+    columnar_leaderboard: bool
+    guild_stats_idle_timeout: int
+    members_intent: bool
+    profile_cache_size: int
+    image_mode: bool
+    button_press_rate: float
+    button_press_burst: int
+    ai_move_time: float
+    ai_workers: int
+    shutdown_drain_timeout: int
+    shutdown_flush_timeout: int
+    worker_count: int
+    shard_count: int
+    firebase_credentials: str | None
+    firebase_db_url: str | None
+    firebase_db_name: str | None
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        dev = os.environ.get("PY_ENV") != "PROD"
+        worker_count = env_int("WORKER_COUNT", 1)
+        return cls(
+            dev=dev,
+            bot_token=os.environ.get("BOT_TOKEN" if not dev else "BOT_TOKEN_DEV"),
+            server_ids=[
+                int(server_id)
+                for server_id in os.environ.get("SERVER_IDS", "").split(",")
+                if server_id.isdigit()
+            ],
+            max_games_per_channel=env_int("MAX_GAMES_PER_CHANNEL", 3),
+            max_active_games=env_int("MAX_ACTIVE_GAMES", 200),
+            max_guild_games=env_int("MAX_GUILD_GAMES", 20),
+            max_open_lobbies=env_int("MAX_OPEN_LOBBIES", 50),
+            max_guild_lobbies=env_int("MAX_GUILD_LOBBIES", 5),
+            lobby_queue_length=env_int("LOBBY_QUEUE_LENGTH", 100),
+            lobby_queue_timeout=env_int("LOBBY_QUEUE_TIMEOUT", 300),
+            lobby_idle_timeout=env_int("LOBBY_IDLE_TIMEOUT", 120),
+            lobby_max_lifetime=env_int("LOBBY_MAX_LIFETIME", 600),
+            matchmaking_max_wait=env_int("MATCHMAKING_MAX_WAIT", 120),
+            game_log_dir=os.environ.get("GAME_LOG_DIR", "game_logs"),
+            stats_spool_dir=os.environ.get("STATS_SPOOL_DIR", "stats_spool"),
+            snapshot_dir=os.environ.get("SNAPSHOT_DIR", "snapshots"),
+            insights_path=os.environ.get("INSIGHTS_PATH", "insights.npz"),
+            columnar_leaderboard=env_bool("COLUMNAR_LEADERBOARD", False),
+            guild_stats_idle_timeout=env_int("GUILD_STATS_IDLE_TIMEOUT", 1800),
+            members_intent=env_bool("MEMBERS_INTENT", False),
+            profile_cache_size=env_int("PROFILE_CACHE_SIZE", 1000),
+            image_mode=env_bool("IMAGE_MODE", False),
+            button_press_rate=env_float("BUTTON_PRESS_RATE", 1.0),
+            button_press_burst=env_int("BUTTON_PRESS_BURST", 5),
+            ai_move_time=env_float("AI_MOVE_TIME", 1.0),
+            # The search processes of every worker share the machine's cores
+            ai_workers=env_int(
+                "AI_WORKERS", max(1, (os.cpu_count() or 1) // worker_count)
+            ),
+            shutdown_drain_timeout=env_int("SHUTDOWN_DRAIN_TIMEOUT", 15),
+            shutdown_flush_timeout=env_int("SHUTDOWN_FLUSH_TIMEOUT", 5),
+            worker_count=worker_count,
+            shard_count=max(env_int("SHARD_COUNT", worker_count), worker_count),
+            firebase_credentials=os.environ.get("FIREBASE_CREDS"),
+            firebase_db_url=os.environ.get("FIREBASE_DB_URL"),
+            firebase_db_name=os.environ.get(
+                "FIREBASE_DB_NAME" if not dev else "FIREBASE_DB_NAME_DEV"
+            ),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    load_dotenv()
+    return Settings.from_env()
 
-load_dotenv()
 
-DEV = os.environ.get("PY_ENV") != "PROD"
+def __getattr__(name: str):
+    # Settings are read the first time one of them is imported, e.g.
+    # `from config import SERVER_IDS` reads get_settings().server_ids
+    settings = get_settings()
+    if name.isupper() and hasattr(settings, name.lower()):
+        return getattr(settings, name.lower())
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-BOT_TOKEN = os.environ.get("BOT_TOKEN" if not DEV else "BOT_TOKEN_DEV")
 
-SERVER_IDS = [
-    int(server_id)
-    for server_id in os.environ.get("SERVER_IDS").split(",")
-    if server_id.isdigit()
-]
+database_lock = threading.Lock()
+firebase_database = None
 
-FIREBASE_CREDENTIALS = os.environ.get("FIREBASE_CREDS")
-FIREBASE_DB_URL = os.environ.get("FIREBASE_DB_URL")
 
-firebase_init(
-    credentials.Certificate(json.loads(FIREBASE_CREDENTIALS)),
-    {"databaseURL": FIREBASE_DB_URL},
-)
+def get_database():
+    """Connects to Firebase the first time the storage layer needs it, the
+    firebase_admin client and its dependencies are only imported then."""
+    global firebase_database
+    with database_lock:
+        if firebase_database is None:
+            from firebase_admin import db, credentials, initialize_app
 
-FIREBASE_DB_NAME = os.environ.get(
-    "FIREBASE_DB_NAME" if not DEV else "FIREBASE_DB_NAME_DEV"
-)
-firebase_database = db.reference(f"/{FIREBASE_DB_NAME}")
+            settings = get_settings()
+            initialize_app(
+                credentials.Certificate(json.loads(settings.firebase_credentials)),
+                {"databaseURL": settings.firebase_db_url},
+            )
+            firebase_database = db.reference(f"/{settings.firebase_db_name}")
+        return firebase_database
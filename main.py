@@ -1,35 +1,160 @@
+import asyncio
 import os
+import signal
+import time
+import threading
+import multiprocessing
 import nextcord.ext
-from nextcord.ext.commands import Bot
-from config import BOT_TOKEN
+from nextcord.ext.commands import Bot, AutoShardedBot
+from config import (
+    BOT_TOKEN,
+    WORKER_COUNT,
+    SHARD_COUNT,
+    MEMBERS_INTENT,
+    SHUTDOWN_DRAIN_TIMEOUT,
+    SHUTDOWN_FLUSH_TIMEOUT,
+)
+from app.helpers import cluster
 import logging
 
-
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-intents = nextcord.Intents.default()
-intents.message_content = True
-intents.members = True
-intents.dm_messages = False
-activity = nextcord.Activity(
-    name="Uno", type=nextcord.ActivityType.playing
-)
-bot = Bot(command_prefix="!u", intents=intents, activity=activity)
 
+def create_bot(**kwargs) -> Bot:
+    intents = nextcord.Intents.default()
+    intents.message_content = True
+    # Game rendering only needs the profiles of the players, see app.helpers.profiles
+    intents.members = MEMBERS_INTENT
+    intents.dm_messages = False
+    activity = nextcord.Activity(name="Uno", type=nextcord.ActivityType.playing)
+    bot_class = AutoShardedBot if "shard_ids" in kwargs else Bot
+    bot = bot_class(command_prefix="!u", intents=intents, activity=activity, **kwargs)
 
-@bot.event
-async def on_ready():
-    logger.info(f"Connected to bot: {bot.user.name}")
+    @bot.event
+    async def on_ready():
+        logger.info(f"Connected to bot: {bot.user.name}")
 
+    return bot
 
-def main():
+
+def load_extensions(bot: Bot):
     extensions_dir = os.path.join("app", "extensions")
     for extension in filter(lambda x: x.endswith("ext.py"), os.listdir(extensions_dir)):
         bot.load_extension(f"app.extensions.{extension[:-3]}")
-    bot.run(BOT_TOKEN)
+
+
+def run_bot(bot: Bot):
+    """Runs the bot until it receives SIGTERM or SIGINT, then lets the Uno cog pause
+    its games and send the pending stats writes before disconnecting."""
+    loop = bot.loop
+    stopping = asyncio.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stopping.set)
+        except NotImplementedError:
+            # Windows, where the bot stops without draining
+            pass
+
+    async def runner():
+        bot_task = asyncio.create_task(bot.start(BOT_TOKEN))
+        stop_task = asyncio.create_task(stopping.wait())
+        await asyncio.wait((bot_task, stop_task), return_when=asyncio.FIRST_COMPLETED)
+        stop_task.cancel()
+        if stopping.is_set():
+            logger.info("Shutting down")
+            uno = bot.get_cog("Uno")
+            try:
+                if uno is not None:
+                    await uno.shutdown(SHUTDOWN_DRAIN_TIMEOUT, SHUTDOWN_FLUSH_TIMEOUT)
+            finally:
+                await bot.close()
+        await bot_task
+
+    loop.run_until_complete(runner())
+
+
+def run_worker(
+    worker_id: int,
+    shard_ids: list[int],
+    inbox: multiprocessing.Queue,
+    outbox: multiprocessing.Queue,
+):
+    logger.info(f"Worker {worker_id} starting with shards {shard_ids}/{SHARD_COUNT}")
+    cluster.cluster_link = cluster.ClusterLink(
+        worker_id, WORKER_COUNT, inbox, outbox, SHARD_COUNT
+    )
+    bot = create_bot(shard_ids=shard_ids, shard_count=SHARD_COUNT)
+    load_extensions(bot)
+    cluster.cluster_link.start(bot.loop)
+    run_bot(bot)
+
+
+def run_supervisor():
+    """Runs one bot process per worker, each owning a disjoint set of shards.
+
+    Guild events are routed by shard, so every worker only ever sees (and keeps
+    the ongoing games of) its own guilds. Workers that exit are restarted.
+    """
+    context = multiprocessing.get_context("spawn")
+    outbox = context.Queue()
+    inboxes = {worker_id: context.Queue() for worker_id in range(WORKER_COUNT)}
+    threading.Thread(
+        target=cluster.relay_messages, args=(outbox, inboxes), daemon=True
+    ).start()
+
+    def spawn(worker_id: int) -> multiprocessing.Process:
+        process = context.Process(
+            target=run_worker,
+            name=f"unocord-worker-{worker_id}",
+            args=(
+                worker_id,
+                cluster.shards_for_worker(worker_id, WORKER_COUNT, SHARD_COUNT),
+                inboxes[worker_id],
+                outbox,
+            ),
+        )
+        process.start()
+        return process
+
+    def handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    workers = {}
+    try:
+        for worker_id in range(WORKER_COUNT):
+            workers[worker_id] = spawn(worker_id)
+            # Discord only allows one shard to identify every 5 seconds
+            time.sleep(5)
+        while True:
+            time.sleep(5)
+            for worker_id, process in workers.items():
+                if not process.is_alive():
+                    logger.error(
+                        f"Worker {worker_id} exited with code {process.exitcode}, restarting"
+                    )
+                    workers[worker_id] = spawn(worker_id)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Workers pause their games and send their pending writes before exiting
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join()
+        outbox.put(None)
+
+
+def main():
+    if WORKER_COUNT > 1:
+        run_supervisor()
+        return
+    bot = create_bot()
+    load_extensions(bot)
+    run_bot(bot)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from app.helpers.admission import AdmissionController
+
+
+def full_controller() -> AdmissionController:
+    admission = AdmissionController(
+        max_games=1,
+        max_guild_games=1,
+        max_lobbies=1,
+        max_guild_lobbies=1,
+        max_queue_length=10,
+    )
+    assert admission.try_open_lobby(1)
+    return admission
+
+
+def test_slot_is_released_when_the_notice_fails_after_admission():
+    async def run():
+        admission = full_controller()
+
+        async def notify(position: int):
+            if position == 1 and admission.queue:
+                # Admitted while the first notice is being sent, which then fails
+                admission.close_lobby(1)
+                raise RuntimeError("notice failed")
+
+        with pytest.raises(RuntimeError):
+            await admission.open_lobby(1, notify, max_wait=5)
+        return admission
+
+    admission = asyncio.run(run())
+    assert admission.lobby_count == 0
+    assert admission.try_open_lobby(1)
+
+
+def test_slot_is_released_when_cancelled_after_admission():
+    async def run():
+        admission = full_controller()
+        notifying = asyncio.Event()
+
+        async def notify(position: int):
+            notifying.set()
+            await asyncio.Event().wait()
+
+        task = asyncio.create_task(admission.open_lobby(1, notify, max_wait=5))
+        await notifying.wait()
+        # Admitted while the notice is being sent, then cancelled
+        admission.close_lobby(1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return admission
+
+    admission = asyncio.run(run())
+    assert admission.lobby_count == 0
+    assert not admission.queue
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from app.data import guild_stats
+from app.data.guild_stats import GuildStatsCache
+from app.data.stats_spool import StatsSpool
+from app.data.uno_players import UnoLeaderboardPlayer, stats_writes
+
+DAY = 20000
+DELTA = {
+    "wins": 1,
+    "played": 1,
+    "drawn_cards": 0,
+    "turns_skipped": 0,
+    "played_cards": 0,
+}
+
+
+def guild_write(user_id: int):
+    return stats_writes(1, user_id, str(user_id), DELTA, DAY)[0]
+
+
+def test_load_adds_each_game_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(guild_stats, "SETTLE_TIMEOUT", 0.01)
+    stored = {1: UnoLeaderboardPlayer(1, "1", wins=5, played=5)}
+    applied = set()
+    held_during_read = []
+
+    async def run():
+        spool = StatsSpool(str(tmp_path / "stats.log"), writer=None)
+        spool.load()
+        # Applied before the load but never confirmed, the read has it
+        sent = guild_write(1)
+        applied.add(sent.write_id)
+        # Not applied yet, the read misses it
+        unsent = guild_write(2)
+        # Still being sent, it may or may not be in the read
+        sending = guild_write(3)
+        for write_id, write in enumerate((sent, unsent, sending)):
+            spool.pending[write_id] = write
+        spool.sending[2] = asyncio.get_running_loop().create_future()
+
+        def loader(guild_id: int, since_day: int):
+            held_during_read.append(spool.sendable((1, unsent)))
+            time.sleep(0.05)
+            return dict(stored), {}
+
+        cache = GuildStatsCache(
+            600, loader, spool=spool, is_applied=lambda w: w.write_id in applied
+        )
+        loading = asyncio.create_task(cache.get(1))
+        await asyncio.sleep(0.01)
+        # A game ending during the load
+        cache.apply(1, UnoLeaderboardPlayer(4, "4"), DELTA, DAY)
+        stats = await loading
+        assert spool.sendable((1, unsent))
+        return stats
+
+    stats = asyncio.run(run())
+    assert held_during_read == [False]
+    assert {user_id: player.wins for user_id, player in stats.players.items()} == {
+        1: 5,
+        2: 1,
+        4: 1,
+    }
@@ -0,0 +1,36 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.helpers import messages
+
+
+class FailingChannel:
+    def __init__(self):
+        self.sent = []
+        self.fail = True
+
+    async def send(self, embeds):
+        if self.fail:
+            raise RuntimeError("send failed")
+        self.sent.extend(embed.description for embed in embeds)
+
+
+def test_errors_are_kept_when_sending_fails(monkeypatch):
+    channel = FailingChannel()
+    guild = SimpleNamespace(id=1)
+    monkeypatch.setattr(messages, "LOG_FLUSH_DELAY", 0)
+    monkeypatch.setattr(messages, "get_logging_channel", lambda guild: channel)
+
+    async def run():
+        context = SimpleNamespace(guild=guild)
+        messages.log_error_message(context, "first")
+        messages.log_error_message(context, "first")
+        await messages.flush_tasks[guild.id]
+        channel.fail = False
+        messages.log_error_message(context, "first")
+        messages.log_error_message(context, "second")
+        await messages.flush_tasks[guild.id]
+
+    asyncio.run(run())
+    assert sorted(channel.sent) == ["first (x3)", "second"]
+    assert guild.id not in messages.pending_errors
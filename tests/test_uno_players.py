@@ -0,0 +1,106 @@
+from unittest import mock
+
+import pytest
+
+from app.data import uno_players
+from app.data.uno_players import (
+    APPLIED_WRITE_DAYS,
+    apply_stats_write,
+    prune_applied_writes,
+    stats_writes,
+)
+
+DELTA = {
+    "wins": 1,
+    "played": 1,
+    "drawn_cards": 4,
+    "turns_skipped": 1,
+    "played_cards": 6,
+}
+
+
+class FakeReference:
+    """The parts of a Realtime Database reference used by the stats writes, with
+    multi-path updates, server side increments and None deleting a key."""
+
+    def __init__(self, root: dict, path: tuple[str, ...] = ()):
+        self.root = root
+        self.path = path
+
+    def child(self, key: str) -> "FakeReference":
+        return FakeReference(self.root, (*self.path, *key.split("/")))
+
+    def node(self, create: bool = False) -> dict | None:
+        node = self.root
+        for key in self.path:
+            if key not in node:
+                if not create:
+                    return None
+                node[key] = {}
+            node = node[key]
+        return node
+
+    def get(self, shallow: bool = False):
+        node = self.node()
+        if shallow and isinstance(node, dict):
+            return {key: True for key in node}
+        return node
+
+    def update(self, value: dict) -> None:
+        for path, new in value.items():
+            *parents, key = path.split("/")
+            parent = self.child("/".join(parents)) if parents else self
+            node = parent.node(create=True)
+            if new is None:
+                node.pop(key, None)
+            elif isinstance(new, dict) and ".sv" in new:
+                node[key] = node.get(key, 0) + new[".sv"]["increment"]
+            else:
+                node[key] = new
+
+
+@pytest.fixture
+def database():
+    root = {}
+    with mock.patch.object(uno_players, "get_database", lambda: FakeReference(root)):
+        yield root
+
+
+def test_retried_write_counts_once(database):
+    writes = stats_writes(1, 2, "player", DELTA, day=20000)
+    for write in writes:
+        apply_stats_write(write)
+    stats = database["uno"]["guilds"]["1"]["leaderboard"]["2"]
+    keys = set(stats)
+    for write in writes:
+        apply_stats_write(write)
+    assert stats == {"username": "player", **DELTA}
+    assert set(stats) == keys
+    assert database["uno"]["leaderboard"]["2"] == {"username": "player", **DELTA}
+    assert database["uno"]["guilds"]["1"]["days"]["20000"]["2"] == {
+        "username": "player",
+        "wins": 1,
+        "played": 1,
+    }
+
+
+def test_ids_left_in_the_stats_are_removed(database):
+    [write, *_] = stats_writes(1, 2, "player", DELTA, day=20000)
+    database["uno"] = {
+        "guilds": {"1": {"leaderboard": {"2": {"wins": 3, "applied_writes": ["a"]}}}}
+    }
+    apply_stats_write(write)
+    stats = database["uno"]["guilds"]["1"]["leaderboard"]["2"]
+    assert "applied_writes" not in stats
+    assert stats["wins"] == 4
+
+
+def test_prune_keeps_recent_markers(database):
+    [old, recent] = [
+        stats_writes(1, 2, "player", DELTA, day=20000)[0] for _ in range(2)
+    ]
+    old.day, recent.day = 20000 - APPLIED_WRITE_DAYS, 20000
+    apply_stats_write(old)
+    apply_stats_write(recent)
+    prune_applied_writes(20000)
+    assert set(database["uno"]["applied"]) == {"20000"}